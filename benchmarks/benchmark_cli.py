@@ -0,0 +1,69 @@
+"""Mede o tempo de inicialização e de cada subcomando de ``python -m pipeline_enem``.
+
+Executa os comandos em uma pasta temporária (com ``dados/`` apontando para a
+do projeto), para não sobrescrever os arquivos gerados no repositório. Para
+referência, mede também o custo de importar as bibliotecas pesadas, que os
+scripts antigos importavam sempre, e o script completo analise-dados-enem.py.
+
+Uso:
+    python benchmarks/benchmark_cli.py --repeticoes 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from comum import RAIZ, ampliar_amostra, executar_medindo
+
+PASTAS_SAIDA = ['analises', 'visualizacoes', 'dados_tratados', 'dados_para_dashboard']
+
+
+def preparar_pasta(pasta):
+    os.symlink(os.path.join(RAIZ, 'dados'), os.path.join(pasta, 'dados'))
+    for nome in PASTAS_SAIDA:
+        os.makedirs(os.path.join(pasta, nome))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fator', type=int, default=1, help='Repetições da amostra do ENEM (5 mil linhas cada)')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções de cada comando (vale a menor)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar_pasta(tmp)
+        arquivo = os.path.join(RAIZ, 'dados', 'enem_2022_amostra.csv')
+        if args.fator > 1:
+            arquivo = os.path.join(tmp, 'enem_ampliado.csv')
+            ampliar_amostra(arquivo, args.fator)
+
+        cli = [sys.executable, '-m', 'pipeline_enem']
+        casos = [
+            ('python -c pass', [sys.executable, '-c', 'pass']),
+            ('import pandas', [sys.executable, '-c', 'import pandas']),
+            ('import matplotlib/seaborn/plotly',
+             [sys.executable, '-c', 'import matplotlib.pyplot, seaborn, plotly.express, plotly.graph_objects']),
+            ('--help', cli + ['--help']),
+            ('tratar --sem-cache', cli + ['tratar', '--arquivo-enem', arquivo, '--sem-cache']),
+            ('tratar (cache)', cli + ['tratar', '--arquivo-enem', arquivo]),
+            ('analisar', cli + ['analisar']),
+            ('analisar --apenas correlacao_notas', cli + ['analisar', '--apenas', 'correlacao_notas']),
+            ('analisar --apenas distribuicao_infra', cli + ['analisar', '--apenas', 'distribuicao_infraestrutura']),
+            ('visualizar', cli + ['visualizar']),
+            ('visualizar --apenas radar', cli + ['visualizar', '--apenas', 'radar']),
+            ('analise-dados-enem.py (tudo)',
+             [sys.executable, os.path.join(RAIZ, 'analises', 'analise-dados-enem.py'), '--arquivo-enem', arquivo]),
+        ]
+
+        ambiente = {'PYTHONPATH': RAIZ, 'MPLBACKEND': 'Agg'}
+        print(f"{'Comando':<40}{'tempo (s)':>11}{'pico (MB)':>11}")
+        for nome, comando in casos:
+            medidas = [executar_medindo(comando, cwd=tmp, env=ambiente, silencioso=True)
+                       for _ in range(args.repeticoes)]
+            tempo = min(tempo for tempo, _ in medidas)
+            pico = max(pico for _, pico in medidas)
+            print(f"{nome:<40}{tempo:>11.2f}{pico:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Compara o gráfico de dispersão de infraestrutura vs desempenho por candidato e pelo resumo por escola.
+
+Para cada tamanho, gera candidatos sintéticos distribuídos em
+``--escolas`` escolas (com nível e categoria de infraestrutura, matrículas e
+nome), monta o resumo por escola como o tratamento (pipeline_enem.resumos) e
+mede o tempo e o tamanho do HTML gravado com:
+
+- um ponto por candidato (até ``--maximo-completo`` linhas), como antes do resumo;
+- um ponto por escola;
+- a amostra estratificada de ``--pontos`` escolas de ``resumir_dispersao``.
+
+Confere que as estatísticas por categoria exibidas, calculadas com as somas
+das escolas, são as mesmas do ``groupby`` do pandas sobre todos os candidatos
+e que a escola de menor e a de maior média de cada categoria estão na amostra.
+
+Uso:
+    python benchmarks/benchmark_dispersao.py --linhas 100000 1000000 5000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import comum  # noqa: F401 (coloca a raiz do projeto no sys.path)
+
+from pipeline_enem.comandos import PONTOS_DISPERSAO
+from pipeline_enem.comandos.visualizar import desenhar_infraestrutura_vs_desempenho, resumir_dispersao
+from pipeline_enem.dimensoes import Dimensao
+from pipeline_enem.pontuacao import categorizar
+from pipeline_enem.resumos import montar_resumo, somar
+from pipeline_enem.tratamento import CODIGOS_INFRAESTRUTURA, LABELS_INFRAESTRUTURA
+
+COLUNAS_ESCOLAS = ['NO_ENTIDADE', 'NU_MATRICULAS', 'NIVEL_INFRAESTRUTURA', 'CATEGORIA_INFRAESTRUTURA']
+
+
+def gerar_escolas(escolas, semente=0):
+    rng = np.random.default_rng(semente)
+    nivel = rng.binomial(6, 0.55, escolas)
+    return pd.DataFrame({
+        'CO_ENTIDADE': pd.array([f'E{i:06d}' for i in range(escolas)], dtype='string'),
+        'NO_ENTIDADE': pd.array([f'ESCOLA ESTADUAL {i}' for i in range(escolas)], dtype='string'),
+        'NU_MATRICULAS': rng.integers(50, 3000, escolas),
+        'NIVEL_INFRAESTRUTURA': nivel,
+        'CATEGORIA_INFRAESTRUTURA': categorizar(CODIGOS_INFRAESTRUTURA[nivel], LABELS_INFRAESTRUTURA),
+    })
+
+
+def gerar_candidatos(linhas, escolas_df, semente=0):
+    rng = np.random.default_rng(semente + 1)
+    escola = rng.integers(0, len(escolas_df), linhas)
+    codigos = escolas_df['CO_ENTIDADE'].to_numpy(dtype=object)[escola]
+    codigos[rng.random(linhas) < 0.1] = None  # candidatos sem escola informada
+    nivel = escolas_df['NIVEL_INFRAESTRUTURA'].to_numpy()[escola]
+    media = np.clip(rng.normal(480 + 12 * nivel, 70), 0, 1000)
+    media[rng.random(linhas) < 0.05] = np.nan  # ausentes
+    return pd.DataFrame({'CO_ESCOLA': pd.Categorical(codigos), 'MEDIA_NOTAS': media.astype('float32')})
+
+
+def por_candidato(candidatos_df, escolas_df):
+    # Os candidatos com os atributos da escola, como as linhas de dados_completos
+    atributos = Dimensao(escolas_df, 'CO_ENTIDADE', COLUNAS_ESCOLAS).buscar(candidatos_df['CO_ESCOLA'])
+    return pd.concat([candidatos_df, atributos], axis=1).assign(N_MEDIA_NOTAS=1)
+
+
+def desenhar(dados, caminho):
+    inicio = time.perf_counter()
+    desenhar_infraestrutura_vs_desempenho(dados, caminho)
+    return time.perf_counter() - inicio, os.path.getsize(caminho) / 1024 ** 2
+
+
+def conferir(completos, resumo, pontos, estatisticas):
+    validos = completos.dropna(subset=['NIVEL_INFRAESTRUTURA', 'MEDIA_NOTAS', 'CATEGORIA_INFRAESTRUTURA'])
+    # Em float64, como as somas do resumo (o groupby em float32 acumula em precisão simples)
+    esperado = validos['MEDIA_NOTAS'].astype('float64').groupby(
+        validos['CATEGORIA_INFRAESTRUTURA'], observed=True).agg(['size', 'mean', 'std', 'min', 'max'])
+    obtido = estatisticas.set_index('CATEGORIA_INFRAESTRUTURA').loc[esperado.index]
+    exatas = (np.array_equal(esperado['size'], obtido['CANDIDATOS'])
+              and np.allclose(esperado['mean'], obtido['MEDIA'], rtol=1e-12)
+              and np.allclose(esperado['std'], obtido['DESVIO_PADRAO'], rtol=1e-9)
+              and np.array_equal(esperado['min'], obtido['MINIMO'])
+              and np.array_equal(esperado['max'], obtido['MAXIMO']))
+    escolas = resumo.dropna(subset=['MEDIA_NOTAS', 'CATEGORIA_INFRAESTRUTURA'])
+    extremas = escolas.groupby('CATEGORIA_INFRAESTRUTURA', observed=True)['MEDIA_NOTAS'].agg(['min', 'max'])
+    na_amostra = pontos.groupby('CATEGORIA_INFRAESTRUTURA', observed=True)['MEDIA_NOTAS'].agg(['min', 'max'])
+    return exatas, na_amostra.loc[extremas.index].equals(extremas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--escolas', type=int, default=28_000, help='Escolas de ensino médio sintéticas')
+    parser.add_argument('--pontos', type=int, default=PONTOS_DISPERSAO, help='Orçamento de escolas da amostra')
+    parser.add_argument('--maximo-completo', type=int, default=1_000_000,
+                        help='Maior tamanho para o qual o HTML com um ponto por candidato é gerado')
+    args = parser.parse_args()
+
+    escolas_df = gerar_escolas(args.escolas)
+    dimensao = Dimensao(escolas_df, 'CO_ENTIDADE', COLUNAS_ESCOLAS)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'dispersao.html')
+        for linhas in args.linhas:
+            candidatos_df = gerar_candidatos(linhas, escolas_df)
+            completos = por_candidato(candidatos_df, escolas_df)
+            if linhas <= args.maximo_completo:
+                validos = completos.dropna(subset=['NIVEL_INFRAESTRUTURA', 'MEDIA_NOTAS'])
+                medias_por_nivel = validos.groupby('NIVEL_INFRAESTRUTURA', as_index=False)['MEDIA_NOTAS'].mean()
+                tempo, tamanho = desenhar({'pontos': validos, 'estatisticas': pd.DataFrame(),
+                                           'medias_por_nivel': medias_por_nivel, 'total': len(validos)}, caminho)
+                resultados.append({'linhas': linhas, 'modo': 'por candidato', 'pontos': len(validos),
+                                   'resumo_s': None, 'desenho_s': tempo, 'html_mb': tamanho})
+
+            inicio = time.perf_counter()
+            resumo = montar_resumo(somar(candidatos_df, 'CO_ESCOLA'), 'CO_ESCOLA', dimensao)
+            tempo_resumo = time.perf_counter() - inicio
+            for modo, orcamento in [('por escola', len(resumo)), ('amostra de escolas', args.pontos)]:
+                inicio = time.perf_counter()
+                pontos, estatisticas, medias_por_nivel, total = resumir_dispersao(resumo, orcamento)
+                tempo_amostra = time.perf_counter() - inicio
+                exatas, extremos = conferir(completos, resumo, pontos, estatisticas)
+                tempo, tamanho = desenhar({'pontos': pontos, 'estatisticas': estatisticas,
+                                           'medias_por_nivel': medias_por_nivel, 'total': total}, caminho)
+                resultados.append({'linhas': linhas, 'modo': modo, 'pontos': len(pontos),
+                                   'resumo_s': tempo_resumo + tempo_amostra, 'desenho_s': tempo, 'html_mb': tamanho,
+                                   'estatisticas_exatas': 'sim' if exatas else 'NÃO',
+                                   'extremos': 'sim' if extremos else 'NÃO'})
+
+    print()
+    with pd.option_context('display.width', None, 'display.float_format', '{:.2f}'.format):
+        print(pd.DataFrame(resultados).set_index(['linhas', 'modo']))
+
+
+if __name__ == '__main__':
+    main()
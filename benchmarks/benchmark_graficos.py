@@ -0,0 +1,74 @@
+"""Mede o tempo de desenhar todos os gráficos (analisar e visualizar) com e sem o pool e o cache de figuras.
+
+Trata uma única vez um ENEM sintético de ``--linhas`` candidatos (gerado ou
+reaproveitado como em ``benchmark_pipeline.py``) e executa ``analisar`` e
+``visualizar`` com ``--perfil`` em três cenários:
+
+- sequencial: um processo e sem o cache de figuras, como antes do pool;
+- paralelo: ``--processos`` processos, ainda sem o cache;
+- cache: de novo, sem nada ter mudado, então nenhum gráfico é redesenhado.
+
+Para cada cenário são informados o tempo da etapa ``renderizar`` (só o
+desenho e a gravação dos arquivos) e o tempo total dos dois subcomandos.
+
+Uso:
+    python benchmarks/benchmark_graficos.py --linhas 1000000 --processos 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmark_pipeline import PASTA_DADOS, PASTAS_SAIDA, preparar_dados
+from comum import RAIZ, executar_medindo
+from dados_sinteticos import SEMENTE
+
+CENARIOS = {
+    'sequencial': ['--processos-graficos', '1', '--sem-cache-graficos'],
+    'paralelo': ['--sem-cache-graficos'],
+    'cache': [],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Candidatos do ENEM sintético')
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help='Processos do cenário paralelo')
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS, help='Onde os dados sintéticos são gerados e guardados')
+    args = parser.parse_args()
+
+    pasta_dados = preparar_dados(args.linhas, SEMENTE, args.pasta_dados)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.symlink(pasta_dados, os.path.join(tmp, 'dados'))
+        for nome in PASTAS_SAIDA:
+            os.makedirs(os.path.join(tmp, nome))
+        ambiente = {'PYTHONPATH': RAIZ, 'MPLBACKEND': 'Agg'}
+        print(f"Tratando {args.linhas} linhas...")
+        executar_medindo([sys.executable, '-m', 'pipeline_enem', 'tratar', '--streaming'],
+                         cwd=tmp, env=ambiente, silencioso=True)
+
+        linhas = []
+        for cenario, opcoes in CENARIOS.items():
+            if cenario == 'paralelo':
+                opcoes = opcoes + ['--processos-graficos', str(args.processos)]
+            relatorio = os.path.join(tmp, f'perfil-{cenario}.jsonl')
+            total = 0.0
+            for subcomando in ('analisar', 'visualizar'):
+                comando = [sys.executable, '-m', 'pipeline_enem', subcomando, '--perfil',
+                           '--arquivo-perfil', relatorio] + opcoes
+                tempo, _ = executar_medindo(comando, cwd=tmp, env=ambiente, silencioso=True)
+                total += tempo
+            etapas = pd.read_json(relatorio, lines=True)
+            renderizar = etapas.loc[etapas['etapa'].str.endswith('/renderizar'), 'parede_s'].sum()
+            linhas.append({'cenário': cenario, 'renderizar_s': round(renderizar, 2), 'total_s': round(total, 2)})
+
+    tabela = pd.DataFrame(linhas).set_index('cenário')
+    tabela['ganho'] = (tabela.loc['sequencial', 'renderizar_s'] / tabela['renderizar_s'].clip(lower=0.01)).round(1)
+    print(f"\n{args.linhas} linhas, {args.processos} processos no cenário paralelo ({os.cpu_count()} processadores)")
+    print(tabela)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Mede a vazão (MB/s) de leitura do CSV bruto do ENEM com cada motor de pipeline_enem.leitura.
+
+Compara a leitura antiga (todas as colunas, tipos inferidos), o leitor C do
+pandas com colunas e tipos declarados, o motor pyarrow e a leitura do cache de
+leitura. Cada caso roda em um processo separado, para medir também o pico de
+memória; a vazão desconta o tempo de iniciar o processo e importar o pandas.
+Sem ``--arquivo``, gera um ENEM sintético com ``--linhas`` candidatos (30
+milhões de linhas dão um arquivo de ~2 GB).
+
+Uso:
+    python benchmarks/benchmark_leitura.py --linhas 30000000
+    python benchmarks/benchmark_leitura.py --arquivo MICRODADOS_ENEM_2022.csv --repeticoes 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from comum import executar_medindo
+from dados_sinteticos import gerar_dados
+
+CASOS = ['importação', 'pandas (inferência)', 'pandas', 'pyarrow', 'cache']
+
+
+def ler(caso, arquivo, pasta_cache):
+    import pandas as pd
+
+    from pipeline_enem.leitura import ler_bruto, ler_csv
+
+    if caso == 'importação':
+        return
+    if caso == 'pandas (inferência)':
+        df = pd.read_csv(arquivo, sep=';', encoding='latin1')
+    elif caso == 'cache':
+        df = ler_bruto(arquivo, 'enem', pasta_cache=pasta_cache)
+    else:
+        df = ler_csv(arquivo, 'enem', motor=caso)
+    print(f"{len(df)} linhas, {df.memory_usage(deep=True).sum() / 1024 ** 2:.0f} MB em memória")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arquivo', help='CSV do ENEM a ler (por padrão, um sintético)')
+    parser.add_argument('--linhas', type=int, default=5_000_000, help='Candidatos do ENEM sintético')
+    parser.add_argument('--repeticoes', type=int, default=1, help='Execuções de cada caso (vale a menor)')
+    parser.add_argument('--caso', choices=CASOS, help=argparse.SUPPRESS)
+    parser.add_argument('--pasta-cache', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.caso:
+        ler(args.caso, args.arquivo, args.pasta_cache)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = args.arquivo
+        if arquivo is None:
+            print(f"Gerando ENEM sintético com {args.linhas} linhas...")
+            arquivo = gerar_dados(tmp, args.linhas)['enem']
+        tamanho_mb = os.path.getsize(arquivo) / 1024 ** 2
+        pasta_cache = os.path.join(tmp, 'cache_leitura')
+
+        # Preenche o cache de leitura antes de medi-lo
+        executar_medindo([sys.executable, __file__, '--caso', 'cache', '--arquivo', arquivo,
+                          '--pasta-cache', pasta_cache], silencioso=True)
+
+        print(f"\nArquivo: {arquivo} ({tamanho_mb:.0f} MB)")
+        print(f"{'Leitura':<22}{'tempo (s)':>11}{'MB/s':>9}{'pico (MB)':>11}")
+        inicio = 0
+        for caso in CASOS:
+            comando = [sys.executable, __file__, '--caso', caso, '--arquivo', arquivo, '--pasta-cache', pasta_cache]
+            medidas = [executar_medindo(comando, silencioso=True) for _ in range(args.repeticoes)]
+            tempo = min(tempo for tempo, _ in medidas)
+            pico = max(pico for _, pico in medidas)
+            if caso == 'importação':
+                inicio = tempo
+                print(f"{caso:<22}{tempo:>11.2f}{'':>9}{pico:>11.0f}")
+            else:
+                print(f"{caso:<22}{tempo:>11.2f}{tamanho_mb / max(tempo - inicio, 1e-9):>9.0f}{pico:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
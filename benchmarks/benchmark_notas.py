@@ -0,0 +1,123 @@
+"""Compara o armazém de notas mapeado em memória (pipeline_enem.notas) com o ENEM tratado em Parquet.
+
+Para as mesmas operações (carregar as notas, médias por faixa etária, matriz
+de correlação e histograma de MEDIA_NOTAS), mede o caminho pelo DataFrame
+lido do Parquet e o caminho pelo armazém, e confere que os resultados
+coincidem. Em seguida, ``--processos`` processos calculam a correlação ao
+mesmo tempo, cada um lendo o Parquet ou abrindo o armazém, e é informada a
+memória anônima de cada um (as páginas do armazém são compartilhadas entre
+eles pelo sistema operacional).
+
+Sem ``--pasta``, gera e trata um ENEM sintético com ``--linhas`` candidatos.
+
+Uso:
+    python benchmarks/benchmark_notas.py --linhas 5000000 --processos 4
+    python benchmarks/benchmark_notas.py --pasta dados_tratados
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import comum  # noqa: F401 (coloca a raiz do projeto no sys.path)
+from dados_sinteticos import gerar_dados
+
+from pipeline_enem.armazenamento import caminho_tratado, salvar_tratado
+from pipeline_enem.exploratorias import BORDAS_NOTAS, NOTAS_COLS
+from pipeline_enem.leitura import ler_csv
+from pipeline_enem.notas import COLUNAS_NOTAS, ArmazemNotas, salvar_notas
+from pipeline_enem.tratamento import tratar_enem
+
+
+def preparar(pasta, linhas):
+    print(f"Gerando e tratando um ENEM sintético com {linhas} linhas...")
+    arquivo = gerar_dados(os.path.join(pasta, 'dados'), linhas)['enem']
+    enem_df = tratar_enem(ler_csv(arquivo, 'enem'))
+    salvar_tratado(enem_df, 'enem_tratado', 'parquet', pasta)
+    salvar_notas(enem_df, os.path.join(pasta, 'notas_enem'))
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def memoria_anonima_mb():
+    """Memória anônima do processo (sem as páginas de arquivos mapeados), de /proc/self/smaps_rollup."""
+    try:
+        with open('/proc/self/smaps_rollup') as arquivo:
+            campos = dict(linha.split(':', 1) for linha in arquivo if ':' in linha)
+    except OSError:
+        return float('nan')
+    return int(campos['Anonymous'].split()[0]) / 1024
+
+
+def correlacao_em_processo(tarefa):
+    modo, pasta = tarefa
+    if modo == 'parquet':
+        df = pd.read_parquet(caminho_tratado('enem_tratado', 'parquet', pasta), columns=NOTAS_COLS)
+        df[NOTAS_COLS].corr()
+    else:
+        ArmazemNotas(os.path.join(pasta, 'notas_enem')).correlacao(NOTAS_COLS)
+    return memoria_anonima_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pasta', help='Pasta com enem_tratado.parquet e notas_enem/ (por padrão, um sintético)')
+    parser.add_argument('--linhas', type=int, default=5_000_000, help='Candidatos do ENEM sintético')
+    parser.add_argument('--processos', type=int, default=4, help='Processos que calculam a correlação ao mesmo tempo')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = args.pasta
+        if pasta is None:
+            pasta = tmp
+            preparar(pasta, args.linhas)
+
+        tempo_parquet, df = medir(lambda: pd.read_parquet(
+            caminho_tratado('enem_tratado', 'parquet', pasta), columns=COLUNAS_NOTAS + ['FAIXA_ETARIA']))
+        tempo_armazem, armazem = medir(lambda: ArmazemNotas(os.path.join(pasta, 'notas_enem')))
+        faixas = df['FAIXA_ETARIA']
+        print(f"\n{len(armazem)} linhas; notas em memória no DataFrame: "
+              f"{df[COLUNAS_NOTAS].memory_usage(index=False).sum() / 1024 ** 2:.0f} MB")
+
+        casos = [
+            ('médias por faixa', lambda: df.groupby('FAIXA_ETARIA', observed=False)[COLUNAS_NOTAS].mean(),
+             lambda: armazem.medias_por_grupo(faixas.cat.codes.to_numpy(), len(faixas.cat.categories)),
+             lambda esperado, obtido: np.allclose(esperado.to_numpy(), obtido[COLUNAS_NOTAS].to_numpy(),
+                                                  rtol=1e-5, equal_nan=True)),
+            ('correlação', lambda: df[NOTAS_COLS].corr(), lambda: armazem.correlacao(NOTAS_COLS),
+             lambda esperado, obtido: np.allclose(esperado.to_numpy(), obtido.to_numpy(), atol=1e-6)),
+            ('histograma', lambda: np.histogram(df['MEDIA_NOTAS'].dropna(), BORDAS_NOTAS)[0],
+             lambda: armazem.histograma('MEDIA_NOTAS', BORDAS_NOTAS).contagens,
+             lambda esperado, obtido: np.array_equal(esperado, obtido)),
+        ]
+
+        print(f"\n{'Operação':<20}{'DataFrame (s)':>15}{'armazém (s)':>13}{'iguais':>8}")
+        print(f"{'carregar':<20}{tempo_parquet:>15.3f}{tempo_armazem:>13.3f}")
+        for nome, antigo, novo, comparar in casos:
+            tempo_antigo, esperado = medir(antigo)
+            tempo_novo, obtido = medir(novo)
+            iguais = 'sim' if comparar(esperado, obtido) else 'NÃO'
+            print(f"{nome:<20}{tempo_antigo:>15.3f}{tempo_novo:>13.3f}{iguais:>8}")
+
+        # Processos novos (spawn), para que não herdem a memória deste
+        contexto = multiprocessing.get_context('spawn')
+        print(f"\nCorrelação em {args.processos} processos simultâneos:")
+        for modo in ('parquet', 'armazem'):
+            with contexto.Pool(args.processos) as pool:
+                inicio = time.perf_counter()
+                memorias = pool.map(correlacao_em_processo, [(modo, pasta)] * args.processos)
+                tempo = time.perf_counter() - inicio
+            print(f"  {modo:<8} {tempo:>7.2f} s, memória anônima por processo: "
+                  f"{np.mean(memorias):.0f} MB (total {np.sum(memorias):.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
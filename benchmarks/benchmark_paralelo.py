@@ -0,0 +1,116 @@
+"""Mede o ganho do tratamento paralelo do ENEM com 1, 2, 4 e 8 processos.
+
+Também confere que enem_tratado e dados_completos são idênticos aos do
+processamento sequencial em blocos. O cubo é idêntico entre execuções com
+qualquer número de processos (as partições são as mesmas e são somadas na
+mesma ordem); em relação ao sequencial, cujos blocos têm outros limites, as
+somas podem diferir apenas no último bit, pela ordem das adições.
+
+Uso:
+    python benchmarks/benchmark_paralelo.py --fator 400
+    python benchmarks/benchmark_paralelo.py --arquivo MICRODADOS_ENEM_2022.csv --workers 1 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from comum import RAIZ, ampliar_amostra
+
+from pipeline_enem.armazenamento import GravadorTratado, caminho_tratado
+from pipeline_enem.cubo import combinar_cubos, construir_cubo
+from pipeline_enem.dimensoes import dimensao_escolas, dimensao_municipios, enriquecer
+from pipeline_enem.paralelo import TAMANHO_PARTICAO_MB, tratar_em_paralelo
+from pipeline_enem.streaming import blocos_enem_tratados
+from pipeline_enem.tratamento import tratar_censo, tratar_municipios
+
+
+def carregar_dimensoes():
+    municipios_df = tratar_municipios(
+        pd.read_csv(os.path.join(RAIZ, 'dados', 'indicadores_municipios.csv'), sep=';', encoding='latin1'))
+    censo_escolar_df = tratar_censo(
+        pd.read_csv(os.path.join(RAIZ, 'dados', 'censo_escolar_2022_amostra.csv'), sep=';', encoding='latin1'))
+    return municipios_df, censo_escolar_df
+
+
+def executar(arquivo, pasta, municipios_df, censo_escolar_df, workers, tamanho_particao_mb):
+    os.makedirs(pasta)
+    dimensoes = [dimensao_municipios(municipios_df), dimensao_escolas(censo_escolar_df)]
+    inicio = time.perf_counter()
+    with GravadorTratado('enem_tratado', ['parquet'], pasta) as gravador_enem, \
+            GravadorTratado('dados_completos', ['parquet'], pasta) as gravador_completos:
+        if workers is None:
+            cubo_df = None
+            tamanho_bloco = tamanho_particao_mb * 1024 ** 2 // 140  # ~140 bytes por linha no arquivo bruto
+            for enem_bloco in blocos_enem_tratados(arquivo, tamanho_bloco):
+                gravador_enem.gravar(enem_bloco)
+                completos_bloco = enriquecer(enem_bloco, dimensoes)
+                gravador_completos.gravar(completos_bloco)
+                cubo_df = combinar_cubos([cubo_df, construir_cubo(completos_bloco)])
+        else:
+            cubo_df, _ = tratar_em_paralelo(arquivo, municipios_df, censo_escolar_df, gravador_enem,
+                                            gravador_completos, dimensoes, workers, tamanho_particao_mb)
+    return time.perf_counter() - inicio, cubo_df
+
+
+def tabelas_iguais(pasta_a, pasta_b):
+    for nome in ('enem_tratado', 'dados_completos'):
+        a = pd.read_parquet(caminho_tratado(nome, 'parquet', pasta_a))
+        b = pd.read_parquet(caminho_tratado(nome, 'parquet', pasta_b))
+        if not a.astype(str).equals(b.astype(str)):
+            return False
+    return True
+
+
+def diferenca_cubos(cubo_a, cubo_b):
+    """Maior diferença relativa entre as somas de dois cubos (0.0 quando idênticos)."""
+    chaves = list(cubo_a.columns[:5])
+    a = cubo_a.sort_values(chaves, ignore_index=True).select_dtypes('number').to_numpy(dtype=float)
+    b = cubo_b.sort_values(chaves, ignore_index=True).select_dtypes('number').to_numpy(dtype=float)
+    if a.shape != b.shape:
+        return float('inf')
+    return float(np.nanmax(np.abs(a - b) / np.maximum(np.abs(a), 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arquivo', help='Arquivo do ENEM a usar; se omitido, a amostra é ampliada')
+    parser.add_argument('--fator', type=int, default=400, help='Repetições da amostra (5 mil linhas cada)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--tamanho-particao-mb', type=int, default=TAMANHO_PARTICAO_MB)
+    args = parser.parse_args()
+
+    municipios_df, censo_escolar_df = carregar_dimensoes()
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = args.arquivo
+        if arquivo is None:
+            arquivo = os.path.join(tmp, 'enem_ampliado.csv')
+            linhas = ampliar_amostra(arquivo, args.fator)
+            print(f"Entrada sintética: {linhas} linhas")
+        print(f"Tamanho da entrada: {os.path.getsize(arquivo) / 1024 ** 2:.1f} MB "
+              f"(partições de {args.tamanho_particao_mb} MB; {os.cpu_count()} CPUs)\n")
+
+        referencia = os.path.join(tmp, 'sequencial')
+        tempo_referencia, cubo_referencia = executar(arquivo, referencia, municipios_df, censo_escolar_df,
+                                                     None, args.tamanho_particao_mb)
+        print(f"{'Processos':<12}{'Tempo (s)':>11}{'Aceleração':>12}{'Tabelas iguais':>16}"
+              f"{'Cubo vs seq.':>14}{'Cubo vs 1º':>12}")
+        print(f"{'sequencial':<12}{tempo_referencia:>11.2f}{1:>12.2f}{'-':>16}{'-':>14}{'-':>12}")
+
+        cubo_primeiro = None
+        for workers in args.workers:
+            pasta = os.path.join(tmp, f'paralelo-{workers}')
+            tempo, cubo_df = executar(arquivo, pasta, municipios_df, censo_escolar_df,
+                                      workers, args.tamanho_particao_mb)
+            if cubo_primeiro is None:
+                cubo_primeiro = cubo_df
+            iguais = 'sim' if tabelas_iguais(referencia, pasta) else 'NÃO'
+            print(f"{workers:<12}{tempo:>11.2f}{tempo_referencia / tempo:>12.2f}{iguais:>16}"
+                  f"{diferenca_cubos(cubo_referencia, cubo_df):>14.1e}{diferenca_cubos(cubo_primeiro, cubo_df):>12.1e}")
+
+
+if __name__ == '__main__':
+    main()
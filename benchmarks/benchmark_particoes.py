@@ -0,0 +1,119 @@
+"""Compara consultas às partições por ano e UF com a leitura de todas as partições seguida de um filtro.
+
+Trata ``--anos`` edições sintéticas de ``--linhas`` candidatos (cada uma com
+uma semente, geradas ou reaproveitadas como em ``benchmark_pipeline.py``) com
+``tratar --ano``, no mesmo diretório, e mede, só com as colunas das notas:
+
+- uma edição: as partições do ano pedido contra todas as edições filtradas por NU_ANO;
+- uma UF de uma edição: a partição do estado contra todas filtradas por NU_ANO e UF;
+- variação anual por UF: ``variacao_anual`` sobre os cubos das edições contra
+  o ``groupby`` por UF e ano de todos os candidatos.
+
+Confere que cada par de resultados é o mesmo.
+
+Uso:
+    python benchmarks/benchmark_particoes.py --linhas 1000000 --anos 2020 2021 2022 --uf SP
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark_pipeline import PASTA_DADOS, PASTAS_SAIDA, preparar_dados
+from comum import RAIZ, executar_medindo
+from dados_sinteticos import ARQUIVO_CENSO, ARQUIVO_ENEM, ARQUIVO_MUNICIPIOS, SEMENTE
+
+from pipeline_enem.cubo import variacao_anual
+from pipeline_enem.particoes import ler_particoes, selecionar_particoes
+
+COLUNAS = ['SG_UF_RESIDENCIA', 'NU_NOTA_MT', 'MEDIA_NOTAS']
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def todas_filtradas(pasta, ano, ufs=None):
+    enem = ler_particoes('enem_tratado', colunas=COLUNAS + ['NU_ANO'], pasta=pasta)
+    manter = enem['NU_ANO'] == ano
+    if ufs is not None:
+        manter &= enem['SG_UF_RESIDENCIA'].isin(ufs)
+    return enem.loc[manter, COLUNAS]
+
+
+def resumo(enem):
+    # Contagem e médias por UF, para comparar as duas leituras independentemente da ordem das linhas
+    return (enem.astype({'NU_NOTA_MT': 'float64', 'MEDIA_NOTAS': 'float64'})
+            .groupby('SG_UF_RESIDENCIA', observed=True).agg(['count', 'mean']).sort_index())
+
+
+def variacao_por_candidato(pasta):
+    enem = ler_particoes('enem_tratado', colunas=['NU_ANO', 'SG_UF_RESIDENCIA', 'MEDIA_NOTAS'], pasta=pasta)
+    medias = (enem['MEDIA_NOTAS'].astype('float64')
+              .groupby([enem['SG_UF_RESIDENCIA'], enem['NU_ANO']], observed=True).mean().unstack())
+    return medias.diff(axis=1).iloc[:, 1:].sort_index()
+
+
+def variacao_por_cubo(pasta):
+    cubos = ler_particoes('cubo_enem', colunas=['NU_ANO', 'SG_UF_RESIDENCIA', 'N_MEDIA_NOTAS', 'SOMA_MEDIA_NOTAS',
+                                                'SOMA2_MEDIA_NOTAS'], pasta=pasta)
+    variacao = variacao_anual(cubos, 'SG_UF_RESIDENCIA', ['MEDIA_NOTAS'])
+    deltas = variacao.pivot(index='SG_UF_RESIDENCIA', columns='NU_ANO', values='DELTA_MEDIA_NOTAS')
+    return deltas.iloc[:, 1:].sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Candidatos de cada edição sintética')
+    parser.add_argument('--anos', type=int, nargs='+', default=[2020, 2021, 2022], help='Edições tratadas')
+    parser.add_argument('--uf', default='SP', help='UF da consulta de um estado')
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS, help='Onde os dados sintéticos são gerados e guardados')
+    args = parser.parse_args()
+
+    ano = args.anos[-1]
+    linhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome in PASTAS_SAIDA:
+            os.makedirs(os.path.join(tmp, nome))
+        for indice, ano_tratado in enumerate(args.anos):
+            pasta_dados = preparar_dados(args.linhas, SEMENTE + indice, args.pasta_dados)
+            print(f"Tratando a edição {ano_tratado} ({args.linhas} linhas)...")
+            executar_medindo([sys.executable, '-m', 'pipeline_enem', 'tratar', '--streaming', '--ano', str(ano_tratado),
+                              '--arquivo-enem', os.path.join(pasta_dados, ARQUIVO_ENEM),
+                              '--arquivo-censo', os.path.join(pasta_dados, ARQUIVO_CENSO),
+                              '--arquivo-municipios', os.path.join(pasta_dados, ARQUIVO_MUNICIPIOS)],
+                             cwd=tmp, env={'PYTHONPATH': RAIZ}, silencioso=True)
+        pasta = os.path.join(tmp, 'dados_tratados', 'particoes')
+        total = len(selecionar_particoes('enem_tratado', pasta=pasta))
+
+        for consulta, anos, ufs in [(f'edição {ano}', [ano], None), (f'{args.uf} em {ano}', [ano], [args.uf])]:
+            lidas = len(selecionar_particoes('enem_tratado', anos, ufs, pasta=pasta))
+            tempo_todas, esperado = medir(lambda: todas_filtradas(pasta, ano, ufs))
+            tempo_podadas, obtido = medir(lambda: ler_particoes('enem_tratado', anos, ufs, COLUNAS, pasta=pasta))
+            iguais = len(esperado) == len(obtido) and np.allclose(resumo(esperado), resumo(obtido), equal_nan=True)
+            linhas.append({'consulta': consulta, 'linhas': len(obtido), 'particoes_lidas': f'{lidas}/{total}',
+                           'todas_s': tempo_todas, 'podadas_s': tempo_podadas, 'iguais': 'sim' if iguais else 'NÃO'})
+
+        tempo_candidatos, esperado = medir(lambda: variacao_por_candidato(pasta))
+        tempo_cubo, obtido = medir(lambda: variacao_por_cubo(pasta))
+        # O cubo soma MEDIA_NOTAS em float64, antes da conversão para float32 do ENEM gravado
+        iguais = esperado.shape == obtido.shape and np.allclose(esperado, obtido, atol=1e-3, equal_nan=True)
+        linhas.append({'consulta': 'variação anual por UF', 'linhas': args.linhas * len(args.anos),
+                       'particoes_lidas': f'{len(args.anos)} cubos', 'todas_s': tempo_candidatos,
+                       'podadas_s': tempo_cubo, 'iguais': 'sim' if iguais else 'NÃO'})
+
+    tabela = pd.DataFrame(linhas).set_index('consulta')
+    tabela['ganho'] = tabela['todas_s'] / tabela['podadas_s']
+    print(f"\n{len(args.anos)} edições de {args.linhas} candidatos")
+    with pd.option_context('display.width', None, 'display.float_format', '{:.2f}'.format):
+        print(tabela)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Mede o pipeline completo sobre dados sintéticos e compara com uma linha de base gravada.
+
+Para cada tamanho pedido, gera (ou reaproveita) os três arquivos de entrada com
+``dados_sinteticos.py`` e executa, em uma pasta temporária, ``tratar``,
+``analisar`` e ``visualizar`` com ``--perfil``. Do relatório de cada execução
+saem o tempo, o tempo de CPU e o aumento do pico de memória de cada etapa
+(leituras, tratamentos, as duas mesclagens, gravações e cada gráfico); de cada
+subcomando, o tempo total e o pico de RSS do processo.
+
+Com ``--gravar-linha-base`` os resultados são gravados em
+``benchmarks/linha_base.json`` (um registro por tamanho, com a máquina em que
+foram medidos). Sem ele, cada etapa é comparada com a linha de base do mesmo
+tamanho, e o script termina com erro se alguma ficou mais lenta (ou usou mais
+memória) do que a tolerância permite.
+
+Uso:
+    python benchmarks/benchmark_pipeline.py --tamanhos 10000 1000000
+    python benchmarks/benchmark_pipeline.py --tamanhos 10000 1000000 5000000 --streaming --gravar-linha-base
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import pandas as pd
+
+from comum import RAIZ, executar_medindo
+from dados_sinteticos import ESCOLAS_ENSINO_MEDIO, SEMENTE, gerar_dados
+
+ARQUIVO_LINHA_BASE = os.path.join(RAIZ, 'benchmarks', 'linha_base.json')
+PASTA_DADOS = os.path.join(tempfile.gettempdir(), 'enem_sintetico')
+PASTAS_SAIDA = ['analises', 'visualizacoes', 'dados_tratados', 'dados_para_dashboard']
+SUBCOMANDOS = ['tratar', 'analisar', 'visualizar']
+
+# Diferenças abaixo destes mínimos são ruído de medição
+TOLERANCIA = 1.25
+MINIMO_S = 0.05
+MINIMO_MB = 10
+
+
+def preparar_dados(linhas, semente, pasta_dados):
+    """Pasta ``dados/`` com os arquivos sintéticos de ``linhas`` candidatos, gerados uma única vez."""
+    pasta = os.path.join(pasta_dados, f'{linhas}_{semente}', 'dados')
+    parametros = {'linhas': linhas, 'semente': semente, 'escolas': ESCOLAS_ENSINO_MEDIO}
+    arquivo_parametros = os.path.join(pasta, 'parametros.json')
+    if os.path.exists(arquivo_parametros):
+        with open(arquivo_parametros) as arquivo:
+            if json.load(arquivo) == parametros:
+                return pasta
+    print(f"Gerando dados sintéticos com {linhas} candidatos em {pasta}...")
+    gerar_dados(pasta, linhas, semente)
+    with open(arquivo_parametros, 'w') as arquivo:
+        json.dump(parametros, arquivo)
+    return pasta
+
+
+def medir(linhas, pasta_dados, streaming):
+    """Executa os subcomandos sobre os dados de ``pasta_dados`` e retorna as medidas por etapa."""
+    medidas = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.symlink(pasta_dados, os.path.join(tmp, 'dados'))
+        for nome in PASTAS_SAIDA:
+            os.makedirs(os.path.join(tmp, nome))
+        relatorio = os.path.join(tmp, 'perfil.jsonl')
+        ambiente = {'PYTHONPATH': RAIZ, 'MPLBACKEND': 'Agg'}
+
+        for subcomando in SUBCOMANDOS:
+            comando = [sys.executable, '-m', 'pipeline_enem', subcomando, '--perfil', '--arquivo-perfil', relatorio]
+            if subcomando == 'tratar':
+                comando += ['--sem-cache', '--sem-cache-leitura'] + (['--streaming'] if streaming else [])
+            tempo, pico = executar_medindo(comando, cwd=tmp, env=ambiente, silencioso=True)
+            medidas[f'{subcomando} (processo)'] = {
+                'parede_s': round(tempo, 4), 'cpu_s': None, 'pico_mb': round(pico, 1)}
+
+        # Cada subcomando é uma execução do relatório; dentro dela, as etapas na ordem de início
+        etapas = pd.read_json(relatorio, lines=True)
+        etapas['execucao'] = pd.Categorical(etapas['execucao'], categories=etapas['execucao'].unique())
+        etapas = etapas.sort_values(['execucao', 'ordem'])
+        por_etapa = etapas.groupby('etapa', sort=False).agg(
+            parede_s=('parede_s', 'sum'), cpu_s=('cpu_s', 'sum'), pico_mb=('pico_delta_mb', 'max'))
+        for etapa, linha in por_etapa.iterrows():
+            medidas[etapa] = {coluna: round(float(valor), 4) for coluna, valor in linha.items()}
+    print(f"{linhas} linhas: {len(medidas)} etapas medidas")
+    return medidas
+
+
+def comparar(medidas, base, tolerancia):
+    """Tabela das medidas com a razão em relação à linha de base; retorna (tabela, etapas que regrediram)."""
+    tabela = pd.DataFrame.from_dict(medidas, orient='index')
+    regressoes = []
+    if base:
+        base_df = pd.DataFrame.from_dict(base, orient='index').reindex(tabela.index)
+        tabela['base_s'] = base_df['parede_s']
+        tabela['razao_tempo'] = (tabela['parede_s'] / tabela['base_s']).round(2)
+        tabela['base_pico_mb'] = base_df['pico_mb']
+        mais_lenta = (tabela['razao_tempo'] > tolerancia) & (tabela['parede_s'] - tabela['base_s'] > MINIMO_S)
+        mais_memoria = ((tabela['pico_mb'] > tabela['base_pico_mb'] * tolerancia)
+                        & (tabela['pico_mb'] - tabela['base_pico_mb'] > MINIMO_MB))
+        tabela['regressao'] = (mais_lenta | mais_memoria).map({True: 'SIM', False: ''})
+        regressoes = list(tabela.index[mais_lenta | mais_memoria])
+    return tabela, regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000],
+                        help='Candidatos nos dados sintéticos (por exemplo 10000 1000000 5000000)')
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--streaming', action='store_true', help='Executa o tratamento no modo streaming')
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS, help='Onde os dados sintéticos são gerados e guardados')
+    parser.add_argument('--linha-base', default=ARQUIVO_LINHA_BASE)
+    parser.add_argument('--gravar-linha-base', action='store_true',
+                        help='Grava os resultados como linha de base em vez de comparar')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='Razão em relação à linha de base acima da qual uma etapa regrediu')
+    args = parser.parse_args()
+
+    linha_base = {}
+    if os.path.exists(args.linha_base):
+        with open(args.linha_base, encoding='utf-8') as arquivo:
+            linha_base = json.load(arquivo)
+    maquina = {'plataforma': platform.platform(), 'processador': platform.processor() or platform.machine(),
+               'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+    regressoes = []
+    for linhas in args.tamanhos:
+        chave = f'{linhas}{" streaming" if args.streaming else ""}'
+        medidas = medir(linhas, preparar_dados(linhas, args.semente, args.pasta_dados), args.streaming)
+        base = linha_base.get(chave)
+        if base and not args.gravar_linha_base and base['maquina'] != maquina:
+            print(f"Aviso: a linha de base de {chave} foi medida em outra máquina ({base['maquina']})")
+
+        tabela, regressoes_tamanho = comparar(medidas, None if args.gravar_linha_base or not base else base['etapas'],
+                                              args.tolerancia)
+        print(f"\n===== {chave} linhas =====")
+        with pd.option_context('display.max_rows', None, 'display.width', None, 'display.max_colwidth', None):
+            print(tabela)
+        regressoes += [f'{chave}: {etapa}' for etapa in regressoes_tamanho]
+        if args.gravar_linha_base:
+            linha_base[chave] = {'maquina': maquina, 'etapas': medidas}
+
+    if args.gravar_linha_base:
+        with open(args.linha_base, 'w', encoding='utf-8') as arquivo:
+            json.dump(linha_base, arquivo, indent=1, ensure_ascii=False)
+        print(f"\nLinha de base gravada em {args.linha_base}")
+    elif regressoes:
+        print(f"\n{len(regressoes)} etapas acima da tolerância de {args.tolerancia}x:")
+        for regressao in regressoes:
+            print(f"  {regressao}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
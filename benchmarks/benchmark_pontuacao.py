@@ -0,0 +1,130 @@
+"""Compara a pontuação vetorizada (pipeline_enem.pontuacao) com o caminho por pd.cut.
+
+Gera dados sintéticos (idade, IDH, os seis itens de infraestrutura e as
+notas, com nulos) e mede, para cada coluna derivada, a soma por linha +
+``pd.cut`` e a máscara de bits + ``searchsorted``; para ``MEDIA_NOTAS``, a
+média por linha do pandas e a passada única pela matriz de notas com a
+máscara de presença. Confere que os resultados são idênticos, informa quantas
+escolas sem nenhum item ficavam sem categoria com as faixas antigas
+``[0, 2, 4, 6]`` e quanto o preenchimento das notas ausentes com zero
+baixava a média geral.
+
+Uso:
+    python benchmarks/benchmark_pontuacao.py --linhas 5000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import comum  # noqa: F401 (coloca a raiz do projeto no sys.path)
+
+from pipeline_enem.pontuacao import (
+    categorizar, contar_itens, faixas, mascara_itens, mascara_presenca, media_presentes
+)
+from pipeline_enem.tratamento import (
+    AREAS_COLS, BINS_IDADE, BINS_IDH, BINS_INFRAESTRUTURA, CODIGOS_INFRAESTRUTURA, INFRA_COLS, LABELS_IDADE,
+    LABELS_IDH, LABELS_INFRAESTRUTURA, MASCARA_AREAS, PROVAS_COLS
+)
+
+BINS_INFRAESTRUTURA_ANTIGOS = [0, 2, 4, 6]
+
+
+def gerar_dados(linhas, semente=0):
+    rng = np.random.default_rng(semente)
+    dados = {
+        'NU_IDADE': pd.array(rng.integers(14, 70, linhas), dtype='Int64'),
+        'IDH': rng.uniform(0.4, 0.95, linhas),
+    }
+    dados['NU_IDADE'][rng.random(linhas) < 0.01] = pd.NA
+    dados['IDH'][rng.random(linhas) < 0.01] = np.nan
+    for col in INFRA_COLS:
+        item = rng.integers(0, 2, linhas).astype('float64')
+        item[rng.random(linhas) < 0.02] = np.nan
+        dados[col] = item
+    # Quem falta a um dia fica sem as notas daquele dia: CH, LC e redação no primeiro, CN e MT no segundo
+    faltou_dia1 = rng.random(linhas) < 0.25
+    faltou_dia2 = faltou_dia1 | (rng.random(linhas) < 0.05)
+    for col in PROVAS_COLS:
+        nota = rng.normal(500, 100, linhas)
+        nota[faltou_dia2 if col in ('NU_NOTA_CN', 'NU_NOTA_MT') else faltou_dia1] = np.nan
+        dados[col] = nota
+    return pd.DataFrame(dados)
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def infraestrutura_pd_cut(df, bins):
+    nivel = df[INFRA_COLS].sum(axis=1)
+    return nivel, pd.cut(nivel, bins=bins, labels=LABELS_INFRAESTRUTURA[-(len(bins) - 1):])
+
+
+def infraestrutura_mascara(df):
+    nivel = contar_itens(mascara_itens(df, INFRA_COLS))
+    return nivel, categorizar(CODIGOS_INFRAESTRUTURA[nivel], LABELS_INFRAESTRUTURA)
+
+
+def media_por_presenca(df):
+    notas = df[PROVAS_COLS].to_numpy(dtype='float64', na_value=np.nan)
+    qtd_areas = contar_itens(mascara_presenca(notas) & MASCARA_AREAS)
+    return pd.Series(media_presentes(notas[:, :len(AREAS_COLS)], qtd_areas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=5_000_000, help='Linhas sintéticas')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições de cada medida (vale a menor)')
+    args = parser.parse_args()
+
+    df = gerar_dados(args.linhas)
+    print(f"{args.linhas} linhas sintéticas\n")
+
+    casos = [
+        ('FAIXA_ETARIA',
+         lambda: pd.cut(df['NU_IDADE'], bins=BINS_IDADE, labels=LABELS_IDADE),
+         lambda: faixas(df['NU_IDADE'], BINS_IDADE, LABELS_IDADE)),
+        ('CATEGORIA_IDH',
+         lambda: pd.cut(df['IDH'], bins=BINS_IDH, labels=LABELS_IDH),
+         lambda: faixas(df['IDH'], BINS_IDH, LABELS_IDH)),
+        ('INFRAESTRUTURA',
+         lambda: infraestrutura_pd_cut(df, BINS_INFRAESTRUTURA),
+         lambda: infraestrutura_mascara(df)),
+        ('MEDIA_NOTAS',
+         lambda: df[AREAS_COLS].mean(axis=1),
+         lambda: media_por_presenca(df)),
+    ]
+
+    print(f"{'Coluna':<18}{'pandas (ms)':>13}{'códigos (ms)':>14}{'ganho':>8}{'iguais':>8}")
+    for nome, antigo, novo in casos:
+        tempo_antigo, esperado = medir(antigo, args.repeticoes)
+        tempo_novo, obtido = medir(novo, args.repeticoes)
+        if nome == 'INFRAESTRUTURA':
+            iguais = (np.array_equal(esperado[0].to_numpy(), obtido[0])
+                      and np.array_equal(np.asarray(esperado[1]), np.asarray(obtido[1])))
+        else:
+            iguais = esperado.equals(obtido)
+        print(f"{nome:<18}{tempo_antigo * 1000:>13.1f}{tempo_novo * 1000:>14.1f}"
+              f"{tempo_antigo / tempo_novo:>7.1f}x{'sim' if iguais else 'NÃO':>8}")
+
+    _, categorias_antigas = infraestrutura_pd_cut(df, BINS_INFRAESTRUTURA_ANTIGOS)
+    nivel, categorias = infraestrutura_mascara(df)
+    sem_itens = int((nivel == 0).sum())
+    print(f"\nEscolas sem nenhum item de infraestrutura: {sem_itens}")
+    print(f"Sem categoria com as faixas antigas {BINS_INFRAESTRUTURA_ANTIGOS}: {int(categorias_antigas.isna().sum())}")
+    print(f"Sem categoria com as faixas atuais {BINS_INFRAESTRUTURA}: {int(pd.isna(categorias).sum())}")
+
+    com_zeros = df[AREAS_COLS].fillna(0).mean(axis=1)
+    print(f"\nMédia geral de MEDIA_NOTAS com as ausentes como zero: {com_zeros.mean():.1f}; "
+          f"só com as áreas feitas: {media_por_presenca(df).mean():.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Compara as análises de infraestrutura e de IDH por candidato e pelos resumos por escola e por município.
+
+Trata uma única vez um ENEM sintético de ``--linhas`` candidatos (gerado ou
+reaproveitado como em ``benchmark_pipeline.py``) e mede, lendo de
+dados_tratados/ só as colunas necessárias:
+
+- infraestrutura: média, desvio padrão e candidatos por categoria de
+  infraestrutura, de ``dados_completos`` (``groupby``) e de ``resumo_escolas``
+  (``agregar_cubo`` sobre as somas das escolas);
+- IDH: média dos candidatos de cada município, com o seu IDH, de
+  ``dados_completos`` e de ``resumo_municipios``;
+- acréscimo: os últimos ``--lote`` candidatos somados com ``acrescentar_lote``
+  aos resumos dos demais, contra refazer os resumos com todos os candidatos.
+
+Confere que cada par de resultados é o mesmo.
+
+Uso:
+    python benchmarks/benchmark_resumos.py --linhas 1000000 --lote 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark_pipeline import PASTA_DADOS, PASTAS_SAIDA, preparar_dados
+from comum import RAIZ, executar_medindo
+from dados_sinteticos import SEMENTE
+
+from pipeline_enem.armazenamento import carregar_tratado, carregar_tratado_em_blocos
+from pipeline_enem.cubo import agregar_cubo
+from pipeline_enem.resumos import COLUNAS_ENEM_RESUMOS, RESUMOS, acrescentar_lote, construir_resumos
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def infraestrutura_por_candidato(pasta):
+    completos = carregar_tratado('dados_completos', ['CATEGORIA_INFRAESTRUTURA', 'MEDIA_NOTAS'], pasta)
+    estatisticas = completos['MEDIA_NOTAS'].astype('float64').groupby(
+        completos['CATEGORIA_INFRAESTRUTURA'], observed=True).agg(['mean', 'std', 'count'])
+    return len(completos), estatisticas.to_numpy()
+
+
+def infraestrutura_por_escola(pasta):
+    resumo = carregar_tratado('resumo_escolas', ['CATEGORIA_INFRAESTRUTURA', 'N_MEDIA_NOTAS', 'SOMA_MEDIA_NOTAS',
+                                                 'SOMA2_MEDIA_NOTAS'], pasta)
+    estatisticas = agregar_cubo(resumo, 'CATEGORIA_INFRAESTRUTURA', ['MEDIA_NOTAS'], desvio_padrao=True)
+    return len(resumo), estatisticas[['MEDIA_NOTAS', 'DP_MEDIA_NOTAS', 'N_MEDIA_NOTAS']].to_numpy()
+
+
+def idh_por_candidato(pasta):
+    completos = carregar_tratado('dados_completos', ['CO_MUNICIPIO_RESIDENCIA', 'IDH', 'MEDIA_NOTAS'], pasta)
+    completos['MEDIA_NOTAS'] = completos['MEDIA_NOTAS'].astype('float64')
+    municipios = completos.groupby('CO_MUNICIPIO_RESIDENCIA').agg(IDH=('IDH', 'first'), MEDIA=('MEDIA_NOTAS', 'mean'))
+    return len(completos), municipios.dropna().sort_index().to_numpy()
+
+
+def idh_por_municipio(pasta):
+    resumo = carregar_tratado('resumo_municipios', ['CO_MUNICIPIO_RESIDENCIA', 'IDH', 'MEDIA_NOTAS'], pasta)
+    municipios = resumo.set_index('CO_MUNICIPIO_RESIDENCIA')[['IDH', 'MEDIA_NOTAS']]
+    return len(resumo), municipios.dropna().sort_index().to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Candidatos do ENEM sintético')
+    parser.add_argument('--lote', type=int, default=10_000, help='Candidatos acrescentados aos resumos')
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS, help='Onde os dados sintéticos são gerados e guardados')
+    args = parser.parse_args()
+
+    pasta_dados = preparar_dados(args.linhas, SEMENTE, args.pasta_dados)
+    linhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.symlink(pasta_dados, os.path.join(tmp, 'dados'))
+        for nome in PASTAS_SAIDA:
+            os.makedirs(os.path.join(tmp, nome))
+        print(f"Tratando {args.linhas} linhas...")
+        executar_medindo([sys.executable, '-m', 'pipeline_enem', 'tratar', '--streaming'],
+                         cwd=tmp, env={'PYTHONPATH': RAIZ}, silencioso=True)
+        pasta = os.path.join(tmp, 'dados_tratados')
+
+        for analise, por_candidato, por_resumo in [
+            ('infraestrutura', infraestrutura_por_candidato, infraestrutura_por_escola),
+            ('IDH', idh_por_candidato, idh_por_municipio),
+        ]:
+            tempo_candidato, (lidas_candidato, esperado) = medir(lambda: por_candidato(pasta))
+            tempo_resumo, (lidas_resumo, obtido) = medir(lambda: por_resumo(pasta))
+            iguais = esperado.shape == obtido.shape and np.allclose(esperado, obtido, rtol=1e-9)
+            linhas.append({'análise': analise, 'linhas_candidatos': lidas_candidato,
+                           'por_candidato_s': tempo_candidato, 'linhas_resumo': lidas_resumo, 'resumo_s': tempo_resumo,
+                           'iguais': 'sim' if iguais else 'NÃO'})
+
+        # Acréscimo de um lote: os resumos sem os últimos candidatos, somados ao lote
+        censo_df = carregar_tratado('censo_escolar_tratado', pasta=pasta)
+        municipios_df = carregar_tratado('municipios_tratado', pasta=pasta)
+        enem_df = carregar_tratado('enem_tratado', COLUNAS_ENEM_RESUMOS, pasta)
+        anteriores = construir_resumos([enem_df.iloc[:-args.lote]], censo_df, municipios_df)
+        lote_df = enem_df.iloc[-args.lote:]
+        del enem_df
+        tempo_refazer, refeitos = medir(lambda: construir_resumos(
+            carregar_tratado_em_blocos('enem_tratado', COLUNAS_ENEM_RESUMOS, pasta=pasta), censo_df, municipios_df))
+        tempo_acrescentar, acrescidos = medir(lambda: acrescentar_lote(lote_df, anteriores, censo_df, municipios_df))
+        iguais = True
+        for nome, chave in RESUMOS.items():
+            esperado = refeitos[nome].set_index(chave).sort_index().select_dtypes('number')
+            obtido = acrescidos[nome].set_index(chave).sort_index()[esperado.columns]
+            iguais &= np.allclose(esperado.astype('float64'), obtido.astype('float64'), rtol=1e-9, equal_nan=True)
+        linhas.append({'análise': f'acréscimo de {args.lote}', 'linhas_candidatos': args.linhas,
+                       'por_candidato_s': tempo_refazer, 'linhas_resumo': args.lote, 'resumo_s': tempo_acrescentar,
+                       'iguais': 'sim' if iguais else 'NÃO'})
+
+    tabela = pd.DataFrame(linhas).set_index('análise')
+    tabela['ganho'] = tabela['por_candidato_s'] / tabela['resumo_s']
+    print(f"\n{args.linhas} candidatos")
+    with pd.option_context('display.width', None, 'display.float_format', '{:.2f}'.format):
+        print(tabela)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compara o ``tratar`` em memória com o ``tratar --streaming`` (com e sem ``--workers``).
+
+Cada execução roda pela linha de comando, em um processo próprio e em um
+diretório temporário novo, para que o pico de RSS medido seja só dela e nenhum
+cache seja reaproveitado. Os modos leem o ENEM com os mesmos tipos declarados
+em ``pipeline_enem.leitura`` e devem mostrar o mesmo relatório das consultas às
+dimensões (cada chave do ENEM consultada uma única vez), o que é conferido ao fim.
+
+Uso:
+    python benchmarks/benchmark_streaming.py --fator 200
+    python benchmarks/benchmark_streaming.py --arquivo MICRODADOS_ENEM_2022.csv --limites 256 512
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmark_pipeline import PASTAS_SAIDA
+from comum import RAIZ, ampliar_amostra, executar_medindo
+
+ARQUIVO_CENSO = os.path.join(RAIZ, 'dados', 'censo_escolar_2022_amostra.csv')
+ARQUIVO_MUNICIPIOS = os.path.join(RAIZ, 'dados', 'indicadores_municipios.csv')
+
+
+def relatorio_dimensoes(saida):
+    """Linhas do relatório das consultas às dimensões na saída do ``tratar``."""
+    linhas = saida.splitlines()
+    if 'Consultas às dimensões:' not in linhas:
+        return []
+    inicio = linhas.index('Consultas às dimensões:') + 1
+    fim = linhas.index('', inicio) if '' in linhas[inicio:] else len(linhas)
+    return linhas[inicio:fim]
+
+
+def executar_tratar(arquivo, extra):
+    """Executa ``tratar`` sobre ``arquivo`` em um diretório novo.
+
+    Retorna (tempo em s, pico de RSS em MB, relatório das consultas às dimensões).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome in PASTAS_SAIDA:
+            os.makedirs(os.path.join(tmp, nome))
+        comando = [sys.executable, '-m', 'pipeline_enem', 'tratar', '--sem-cache', '--sem-cache-leitura',
+                   '--arquivo-enem', arquivo, '--arquivo-censo', ARQUIVO_CENSO,
+                   '--arquivo-municipios', ARQUIVO_MUNICIPIOS, *extra]
+        with open(os.path.join(tmp, 'saida.txt'), 'w+', encoding='utf-8') as saida:
+            tempo, pico = executar_medindo(comando, cwd=tmp, env={'PYTHONPATH': RAIZ, 'PYTHONIOENCODING': 'utf-8'},
+                                           saida=saida)
+            saida.seek(0)
+            return tempo, pico, relatorio_dimensoes(saida.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arquivo', help='Arquivo do ENEM a usar; se omitido, a amostra é ampliada')
+    parser.add_argument('--fator', type=int, default=200, help='Repetições da amostra (5 mil linhas cada)')
+    parser.add_argument('--limites', type=int, nargs='+', default=[64, 256], help='Tetos de memória (MB) testados')
+    parser.add_argument('--workers', type=int, default=2, help='Processos do caso com --workers')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = args.arquivo
+        if arquivo is None:
+            arquivo = os.path.join(tmp, 'enem_ampliado.csv')
+            linhas = ampliar_amostra(arquivo, args.fator)
+            print(f"Entrada sintética: {linhas} linhas")
+        arquivo = os.path.abspath(arquivo)
+        print(f"Tamanho da entrada: {os.path.getsize(arquivo) / 1024 ** 2:.1f} MB\n")
+
+        casos = [('em memória', [])]
+        casos += [(f'streaming ({limite} MB)', ['--streaming', '--limite-memoria-mb', str(limite)])
+                  for limite in args.limites]
+        casos.append((f'{args.workers} workers', ['--streaming', '--workers', str(args.workers)]))
+
+        print(f"{'Modo':<22}{'Tempo (s)':>12}{'Pico RSS (MB)':>16}")
+        relatorios = {}
+        for nome, extra in casos:
+            tempo, pico, relatorios[nome] = executar_tratar(arquivo, extra)
+            print(f"{nome:<22}{tempo:>12.2f}{pico:>16.1f}")
+
+    referencia = relatorios['em memória']
+    divergentes = [nome for nome, relatorio in relatorios.items() if relatorio != referencia]
+    print(f"\nRelatório das dimensões igual em todos os modos: {'NÃO' if divergentes else 'sim'}")
+    print('\n'.join(referencia))
+    for nome in divergentes:
+        print(f"\n{nome}:\n" + '\n'.join(relatorios[nome]))
+
+
+if __name__ == '__main__':
+    main()
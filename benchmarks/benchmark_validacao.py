@@ -0,0 +1,150 @@
+"""Mede o custo da validação do ENEM em relação ao tratamento e confere as regras com linhas corrompidas.
+
+Com um ENEM sintético de ``--linhas`` candidatos (gerado ou reaproveitado como
+em ``benchmark_pipeline.py``):
+
+- lê o arquivo em blocos de ``--tamanho-bloco`` linhas e mede, em cada bloco,
+  a leitura com ``tratar_enem`` (a etapa ``ler_tratar_bloco`` do ``tratar``) e
+  ``ValidadorEnem.separar``;
+- corrompe ``--corrompidas`` linhas sem violações do primeiro bloco para cada
+  regra e confere as contagens e as linhas em quarentena;
+- executa ``tratar --streaming`` com e sem ``--sem-validacao``.
+
+Uso:
+    python benchmarks/benchmark_validacao.py --linhas 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark_pipeline import PASTA_DADOS, PASTAS_SAIDA, preparar_dados
+from comum import RAIZ, executar_medindo
+from dados_sinteticos import ARQUIVO_CENSO, ARQUIVO_ENEM, ARQUIVO_MUNICIPIOS, SEMENTE
+
+from pipeline_enem.leitura import ler_csv, opcoes_pandas
+from pipeline_enem.tratamento import COLUNA_VALORES_INVALIDOS, tratar_censo, tratar_enem, tratar_municipios
+from pipeline_enem.validacao import REGRAS_QUARENTENA, REGRAS_VALIDACAO, ValidadorEnem
+
+
+def medir_blocos(caminho, tamanho_bloco, validador):
+    """Tempo total de leitura e tratamento e de ``separar`` nos blocos do arquivo; retorna também o primeiro bloco."""
+    tempo_tratamento = tempo_validacao = 0.0
+    primeiro = None
+    with pd.read_csv(caminho, chunksize=tamanho_bloco, **opcoes_pandas(caminho, 'enem')) as leitor:
+        while True:
+            inicio = time.perf_counter()
+            bloco = next(leitor, None)
+            if bloco is None:
+                break
+            bloco = tratar_enem(bloco)
+            meio = time.perf_counter()
+            validador.separar(bloco)
+            fim = time.perf_counter()
+            tempo_tratamento += meio - inicio
+            tempo_validacao += fim - meio
+            if primeiro is None:
+                primeiro = bloco
+    return tempo_tratamento, tempo_validacao, primeiro
+
+
+def _trocar(df, col, linhas, valor):
+    if isinstance(df[col].dtype, pd.CategoricalDtype) and pd.notna(valor) and valor not in df[col].cat.categories:
+        df[col] = df[col].cat.add_categories([valor])
+    df.loc[df.index[linhas], col] = valor
+
+
+def corromper(bloco, validador, quantidade, rng):
+    """Corrompe ``quantidade`` linhas sem violações para cada regra; retorna o bloco e as linhas de cada regra."""
+    bloco = bloco.copy()
+    violadas = np.logical_or.reduce(list(validador.violacoes(bloco).values()))
+    livres = rng.permutation(np.flatnonzero(~violadas))
+    linhas = {regra: livres[i * quantidade:(i + 1) * quantidade] for i, regra in enumerate(REGRAS_VALIDACAO)}
+
+    # Como a leitura anota um valor que não converte (ver pipeline_enem.leitura.converter_tolerante)
+    _trocar(bloco, 'NU_NOTA_CN', linhas['tipo_invalido'], np.nan)
+    bloco[COLUNA_VALORES_INVALIDOS] = pd.Series(pd.NA, index=bloco.index, dtype='string')
+    bloco.loc[bloco.index[linhas['tipo_invalido']], COLUNA_VALORES_INVALIDOS] = 'NU_NOTA_CN'
+    _trocar(bloco, 'SG_UF_RESIDENCIA', linhas['chave_nula'], np.nan)
+    _trocar(bloco, 'SG_UF_RESIDENCIA', linhas['uf_invalida'], 'XX')
+    _trocar(bloco, 'NU_NOTA_MT', linhas['nota_fora_do_intervalo'], 1200)
+    _trocar(bloco, 'NU_IDADE', linhas['idade_fora_dos_limites'], 5)
+    _trocar(bloco, 'CO_MUNICIPIO_RESIDENCIA', linhas['municipio_inexistente'], 9999999)
+    _trocar(bloco, 'CO_ESCOLA', linhas['escola_inexistente'], 'NAOEXISTE')
+    # Outra UF válida, diferente da do município
+    divergentes = linhas['uf_divergente']
+    ufs = bloco['SG_UF_RESIDENCIA'].iloc[divergentes].astype(str).to_numpy()
+    _trocar(bloco, 'SG_UF_RESIDENCIA', divergentes[ufs != 'SP'], 'SP')
+    _trocar(bloco, 'SG_UF_RESIDENCIA', divergentes[ufs == 'SP'], 'RJ')
+    return bloco, linhas
+
+
+def conferir_regras(bloco, municipios_df, censo_df, quantidade, rng):
+    validador = ValidadorEnem(municipios_df, censo_df)
+    validador.separar(bloco)
+    base, base_quarentena = dict(validador.contagens), validador.linhas_quarentena
+
+    corrompido, linhas = corromper(bloco, validador, quantidade, rng)
+    validador.zerar_estatisticas()
+    _, quarentena_df = validador.separar(corrompido)
+    esperadas = set(corrompido['NU_INSCRICAO'].iloc[np.concatenate([linhas[r] for r in REGRAS_QUARENTENA])])
+
+    resultado = []
+    for regra in REGRAS_VALIDACAO:
+        contagem = validador.contagens[regra] - base[regra]
+        resultado.append({'regra': regra, 'corrompidas': quantidade, 'detectadas': contagem,
+                          'ok': 'sim' if contagem == quantidade else 'NÃO'})
+    novas = validador.linhas_quarentena - base_quarentena
+    obtidas = set(quarentena_df['NU_INSCRICAO'].dropna())
+    quarentena_ok = novas == len(esperadas) and esperadas <= obtidas
+    resultado.append({'regra': 'quarentena', 'corrompidas': len(esperadas), 'detectadas': novas,
+                      'ok': 'sim' if quarentena_ok else 'NÃO'})
+    return pd.DataFrame(resultado).set_index('regra')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Candidatos do ENEM sintético')
+    parser.add_argument('--tamanho-bloco', type=int, default=500_000, help='Linhas de cada bloco lido')
+    parser.add_argument('--corrompidas', type=int, default=100, help='Linhas corrompidas para cada regra')
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS, help='Onde os dados sintéticos são gerados e guardados')
+    args = parser.parse_args()
+
+    pasta_dados = preparar_dados(args.linhas, SEMENTE, args.pasta_dados)
+    arquivos = {fonte: os.path.join(pasta_dados, nome) for fonte, nome in
+                [('enem', ARQUIVO_ENEM), ('censo', ARQUIVO_CENSO), ('municipios', ARQUIVO_MUNICIPIOS)]}
+    municipios_df = tratar_municipios(ler_csv(arquivos['municipios'], 'municipios'))
+    censo_df = tratar_censo(ler_csv(arquivos['censo'], 'censo'))
+
+    validador = ValidadorEnem(municipios_df, censo_df)
+    tempo_tratamento, tempo_validacao, primeiro = medir_blocos(arquivos['enem'], args.tamanho_bloco, validador)
+    print(f"\n{args.linhas} candidatos em blocos de {args.tamanho_bloco} linhas")
+    print(f"leitura e tratar_enem: {tempo_tratamento:.2f} s | validação: {tempo_validacao:.2f} s "
+          f"({100 * tempo_validacao / tempo_tratamento:.1f}% da leitura e tratamento)")
+    validador.relatorio()
+
+    print(f"\nRegras com {args.corrompidas} linhas corrompidas por regra:")
+    print(conferir_regras(primeiro, municipios_df, censo_df, args.corrompidas, np.random.default_rng(SEMENTE)))
+
+    tempos = {}
+    for rotulo, extra in [('com validação', []), ('sem validação', ['--sem-validacao'])]:
+        with tempfile.TemporaryDirectory() as tmp:
+            for nome in PASTAS_SAIDA:
+                os.makedirs(os.path.join(tmp, nome))
+            print(f"\nTratando ({rotulo})...")
+            tempos[rotulo], _ = executar_medindo(
+                [sys.executable, '-m', 'pipeline_enem', 'tratar', '--streaming', '--sem-cache', *extra,
+                 '--arquivo-enem', arquivos['enem'], '--arquivo-censo', arquivos['censo'],
+                 '--arquivo-municipios', arquivos['municipios']],
+                cwd=tmp, env={'PYTHONPATH': RAIZ}, silencioso=True)
+    print(f"\ntratar --streaming: {tempos['com validação']:.2f} s com validação, "
+          f"{tempos['sem validação']:.2f} s sem "
+          f"({100 * (tempos['com validação'] / tempos['sem validação'] - 1):+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
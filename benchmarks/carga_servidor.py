@@ -0,0 +1,163 @@
+"""Teste de carga do servidor de consultas (pipeline_enem.servidor).
+
+Monta o cubo a partir da amostra ampliada, sobe o servidor em um processo
+separado e dispara consultas de clientes concorrentes (conexões keep-alive),
+sorteadas de um conjunto fixo de filtros e agrupamentos. Informa a vazão e
+as latências p50/p99 para cada nível de concorrência, com e sem o cache LRU.
+
+Uso:
+    python benchmarks/carga_servidor.py --fator 20 --clientes 1 10 50
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from comum import RAIZ, ampliar_amostra
+
+from pipeline_enem.armazenamento import salvar_tratado
+from pipeline_enem.cubo import construir_cubo
+from pipeline_enem.dimensoes import dimensao_escolas, dimensao_municipios, enriquecer
+from pipeline_enem.servidor import DIMENSOES_CONSULTA
+from pipeline_enem.tratamento import tratar_censo, tratar_enem, tratar_municipios
+
+DIMENSOES = list(DIMENSOES_CONSULTA)
+FILTROS = {
+    'UF': ['SP', 'RJ', 'MG', 'BA', 'RS'],
+    'TIPO_ESCOLA': ['Pública', 'Privada'],
+    'SEXO': ['F', 'M'],
+    'CATEGORIA_IDH': ['Baixo', 'Médio', 'Alto'],
+}
+
+
+def gerar_cubo(pasta, fator):
+    arquivo = os.path.join(pasta, 'enem_ampliado.csv')
+    ampliar_amostra(arquivo, fator)
+    enem_df = tratar_enem(pd.read_csv(arquivo, sep=';', encoding='latin1'))
+    municipios_df = tratar_municipios(
+        pd.read_csv(os.path.join(RAIZ, 'dados', 'indicadores_municipios.csv'), sep=';', encoding='latin1'))
+    censo_escolar_df = tratar_censo(
+        pd.read_csv(os.path.join(RAIZ, 'dados', 'censo_escolar_2022_amostra.csv'), sep=';', encoding='latin1'))
+    completos = enriquecer(enem_df, [dimensao_municipios(municipios_df), dimensao_escolas(censo_escolar_df)],
+                           colunas=['CATEGORIA_IDH', 'CATEGORIA_INFRAESTRUTURA'])
+    cubo = construir_cubo(completos)
+    salvar_tratado(cubo, 'cubo_enem', pasta=pasta)
+    return len(enem_df), len(cubo)
+
+
+def gerar_consultas(quantidade, semente=0):
+    """Conjunto fixo de consultas: 1 ou 2 dimensões de agrupamento e até 2 filtros."""
+    rng = random.Random(semente)
+    consultas = []
+    for _ in range(quantidade):
+        parametros = {'agrupar': ','.join(rng.sample(DIMENSOES, rng.randint(1, 2)))}
+        for nome in rng.sample(sorted(FILTROS), rng.randint(0, 2)):
+            parametros[nome] = ','.join(rng.sample(FILTROS[nome], rng.randint(1, 2)))
+        if rng.random() < 0.3:
+            parametros['desvio_padrao'] = '1'
+        consultas.append('/consulta?' + urlencode(parametros))
+    return consultas
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def requisitar(leitor, escritor, caminho):
+    escritor.write(f'GET {caminho} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('utf-8'))
+    await escritor.drain()
+    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+    status = int(cabecalho.split(b' ', 2)[1])
+    tamanho = next(int(linha.split(b':')[1]) for linha in cabecalho.split(b'\r\n')
+                   if linha.lower().startswith(b'content-length'))
+    await leitor.readexactly(tamanho)
+    return status
+
+
+async def cliente(porta, consultas, latencias):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    for caminho in consultas:
+        inicio = time.perf_counter()
+        status = await requisitar(leitor, escritor, caminho)
+        latencias.append(time.perf_counter() - inicio)
+        assert status == 200, f"{caminho}: status {status}"
+    escritor.close()
+
+
+async def rodada(porta, consultas, clientes, por_cliente, semente):
+    rng = random.Random(semente)
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        cliente(porta, [rng.choice(consultas) for _ in range(por_cliente)], latencias)
+        for _ in range(clientes)
+    ))
+    return time.perf_counter() - inicio, np.array(latencias)
+
+
+async def aguardar_servidor(porta, processo, tempo_limite=60):
+    limite = time.perf_counter() + tempo_limite
+    while time.perf_counter() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor terminou antes de aceitar conexões")
+        try:
+            leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+        except OSError:
+            await asyncio.sleep(0.2)
+            continue
+        await requisitar(leitor, escritor, '/saude')
+        escritor.close()
+        return
+    raise TimeoutError("O servidor não respondeu a tempo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fator', type=int, default=20, help='Repetições da amostra (5 mil linhas cada)')
+    parser.add_argument('--clientes', type=int, nargs='+', default=[1, 10, 50], help='Clientes concorrentes')
+    parser.add_argument('--requisicoes', type=int, default=2000, help='Requisições por rodada')
+    parser.add_argument('--consultas-distintas', type=int, default=200)
+    args = parser.parse_args()
+
+    consultas = gerar_consultas(args.consultas_distintas)
+    with tempfile.TemporaryDirectory() as tmp:
+        linhas, linhas_cubo = gerar_cubo(tmp, args.fator)
+        print(f"Cubo de {linhas} candidatos com {linhas_cubo} linhas; "
+              f"{len(consultas)} consultas distintas, {args.requisicoes} requisições por rodada\n")
+        print(f"{'Cache':<8}{'Clientes':>9}{'req/s':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+
+        for tamanho_cache, clientes in itertools.product([0, 1024], args.clientes):
+            porta = porta_livre()
+            processo = subprocess.Popen(
+                [sys.executable, '-m', 'pipeline_enem.servidor', '--porta', str(porta), '--pasta', tmp,
+                 '--tamanho-cache', str(tamanho_cache)],
+                cwd=RAIZ, stdout=subprocess.DEVNULL,
+            )
+            try:
+                asyncio.run(aguardar_servidor(porta, processo))
+                # Aquecimento: no caso com cache, todas as consultas passam a ser acertos
+                asyncio.run(rodada(porta, consultas, 1, len(consultas), semente=1))
+                duracao, latencias = asyncio.run(
+                    rodada(porta, consultas, clientes, max(args.requisicoes // clientes, 1), semente=2))
+            finally:
+                processo.terminate()
+                processo.wait()
+            p50, p99 = np.percentile(latencias, [50, 99]) * 1000
+            print(f"{'sim' if tamanho_cache else 'não':<8}{clientes:>9}{len(latencias) / duracao:>10.0f}"
+                  f"{p50:>11.2f}{p99:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Utilitários compartilhados pelos benchmarks do pipeline."""
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+AMOSTRA_ENEM = os.path.join(RAIZ, 'dados', 'enem_2022_amostra.csv')
+
+
+def ampliar_amostra(destino, fator):
+    """Grava em ``destino`` a amostra do ENEM repetida ``fator`` vezes, com inscrições únicas."""
+    amostra = pd.read_csv(AMOSTRA_ENEM, sep=';', encoding='latin1')
+    for i in range(fator):
+        copia = amostra.copy()
+        copia['NU_INSCRICAO'] += i * len(amostra)
+        copia.to_csv(destino, sep=';', encoding='latin1', index=False,
+                     mode='w' if i == 0 else 'a', header=(i == 0))
+    return len(amostra) * fator
+
+
+def executar_medindo(comando, cwd=RAIZ, env=None, silencioso=False, saida=None):
+    """Executa ``comando`` em um processo filho e retorna (tempo em s, pico de RSS em MB).
+
+    ``env`` acrescenta variáveis ao ambiente atual; ``silencioso`` descarta a saída do
+    comando e ``saida`` (um arquivo aberto) a recebe.
+    """
+    ambiente = {**os.environ, **env} if env else None
+    if saida is None and silencioso:
+        saida = subprocess.DEVNULL
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(comando, cwd=cwd, env=ambiente, stdout=saida)
+    _, status, uso = os.wait4(processo.pid, 0)
+    tempo = time.perf_counter() - inicio
+    processo.returncode = os.waitstatus_to_exitcode(status)
+    if processo.returncode != 0:
+        raise RuntimeError(f"Comando falhou ({processo.returncode}): {' '.join(comando)}")
+    # ru_maxrss é informado em KB no Linux
+    return tempo, uso.ru_maxrss / 1024
@@ -0,0 +1,210 @@
+"""Gerador determinístico de dados sintéticos do ENEM, do Censo Escolar e dos indicadores municipais.
+
+Os três arquivos têm os mesmos nomes, colunas e formato (``;``, latin1) das
+amostras de ``dados/``, com cardinalidades próximas das reais: 5.570
+municípios distribuídos pelas UFs como no IBGE (o código começa pelo código
+da UF), cerca de 28 mil escolas de ensino médio (mais escolas sem ensino
+médio, que o tratamento descarta) e candidatos sorteados pela população dos
+municípios. Os faltantes aparecem como nos microdados: quem faltou a um dia
+de prova fica sem as notas daquele dia (CH, LC e redação no primeiro; CN e MT
+no segundo), e só os concluintes informam a escola.
+
+A mesma semente gera sempre os mesmos arquivos. O ENEM é gerado e gravado em
+blocos (cada um com sua semente derivada), então 5 milhões de linhas não
+precisam caber em memória.
+
+Uso:
+    python benchmarks/dados_sinteticos.py --linhas 1000000 --pasta /tmp/enem_1m
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SEMENTE = 2022
+ESCOLAS_ENSINO_MEDIO = 28_000
+FRACAO_SEM_ENSINO_MEDIO = 0.1
+TAMANHO_BLOCO_GERACAO = 500_000
+
+ARQUIVO_ENEM = 'enem_2022_amostra.csv'
+ARQUIVO_CENSO = 'censo_escolar_2022_amostra.csv'
+ARQUIVO_MUNICIPIOS = 'indicadores_municipios.csv'
+
+# Código IBGE e número de municípios de cada UF (total: 5.570)
+MUNICIPIOS_POR_UF = {
+    'RO': (11, 52), 'AC': (12, 22), 'AM': (13, 62), 'RR': (14, 15), 'PA': (15, 144), 'AP': (16, 16),
+    'TO': (17, 139), 'MA': (21, 217), 'PI': (22, 224), 'CE': (23, 184), 'RN': (24, 167), 'PB': (25, 223),
+    'PE': (26, 185), 'AL': (27, 102), 'SE': (28, 75), 'BA': (29, 417), 'MG': (31, 853), 'ES': (32, 78),
+    'RJ': (33, 92), 'SP': (35, 645), 'PR': (41, 399), 'SC': (42, 295), 'RS': (43, 497), 'MS': (50, 79),
+    'MT': (51, 141), 'GO': (52, 246), 'DF': (53, 1),
+}
+
+# Probabilidades de faltar a cada dia de prova (no segundo, dado que compareceu ao primeiro)
+FALTA_PRIMEIRO_DIA = 0.28
+FALTA_SEGUNDO_DIA = 0.05
+CONCLUINTES = 0.35
+TREINEIROS = 0.05
+
+
+def gerar_municipios(rng):
+    """Indicadores dos 5.570 municípios, com IDH e PIB per capita correlacionados."""
+    ufs = np.repeat(list(MUNICIPIOS_POR_UF), [n for _, n in MUNICIPIOS_POR_UF.values()])
+    codigos_uf = np.repeat([codigo for codigo, _ in MUNICIPIOS_POR_UF.values()],
+                           [n for _, n in MUNICIPIOS_POR_UF.values()])
+    sequencia = np.concatenate([np.arange(n) for _, n in MUNICIPIOS_POR_UF.values()])
+    n = len(ufs)
+
+    idh = np.clip(rng.normal(0.66, 0.07, n), 0.40, 0.89)
+    return pd.DataFrame({
+        'CODIGO_IBGE': codigos_uf * 100_000 + sequencia * 10 + rng.integers(0, 10, n),
+        'NOME_MUNICIPIO': [f'Município {i}' for i in range(1, n + 1)],
+        'UF': ufs,
+        'IDH': idh,
+        'PIB_PER_CAPITA': np.exp(rng.normal(9.2 + 3.0 * (idh - 0.66), 0.5)),
+        # Poucos municípios grandes e muitos pequenos, como no país
+        'POPULACAO': np.maximum(np.exp(rng.normal(9.4, 1.2, n)), 800).astype(np.int64),
+        'TAXA_ANALFABETISMO': np.clip(rng.normal(40 - 45 * idh, 2.5), 1, 40),
+        'TAXA_ESCOLARIZACAO': np.clip(rng.normal(60 + 40 * idh, 3), 60, 100),
+    })
+
+
+def gerar_escolas(rng, municipios_df, escolas_ensino_medio=ESCOLAS_ENSINO_MEDIO):
+    """Escolas do Censo Escolar ordenadas por município (todo município tem ao menos uma de ensino médio).
+
+    As escolas privadas (``TP_DEPENDENCIA`` 4) e as de municípios com IDH mais alto
+    têm mais itens de infraestrutura.
+    """
+    n_municipios = len(municipios_df)
+    peso = municipios_df['POPULACAO'].to_numpy() / municipios_df['POPULACAO'].sum()
+    extras = rng.choice(n_municipios, escolas_ensino_medio - n_municipios, p=peso)
+    municipio_ensino_medio = np.sort(np.concatenate([np.arange(n_municipios), extras]))
+    municipio_outras = rng.choice(n_municipios, int(escolas_ensino_medio * FRACAO_SEM_ENSINO_MEDIO), p=peso)
+    municipio = np.concatenate([municipio_ensino_medio, municipio_outras])
+    ensino_medio = np.r_[np.ones(len(municipio_ensino_medio)), np.zeros(len(municipio_outras))]
+    ordem = np.argsort(municipio, kind='stable')
+    municipio, ensino_medio = municipio[ordem], ensino_medio[ordem]
+    n = len(municipio)
+
+    dependencia = rng.choice([1, 2, 3, 4], n, p=[0.02, 0.68, 0.02, 0.28])
+    idh = municipios_df['IDH'].to_numpy()[municipio]
+    propensao = -0.4 + 2.5 * (idh - 0.66) + 0.8 * (dependencia == 4)
+    itens = {
+        'IN_BIBLIOTECA': 0.6, 'IN_LABORATORIO_INFORMATICA': 0.4, 'IN_LABORATORIO_CIENCIAS': -0.3,
+        'IN_QUADRA_ESPORTES': 0.5, 'IN_SALA_ATENDIMENTO_ESPECIAL': -0.2, 'IN_INTERNET': 1.5,
+    }
+    escolas_df = pd.DataFrame({
+        'CO_ENTIDADE': [f'ESC{i:05d}' for i in range(1, n + 1)],
+        'NO_ENTIDADE': [f'Escola {i}' for i in range(1, n + 1)],
+        'CO_MUNICIPIO': municipios_df['CODIGO_IBGE'].to_numpy()[municipio],
+        'NO_MUNICIPIO': municipios_df['NOME_MUNICIPIO'].to_numpy()[municipio],
+        'SG_UF': municipios_df['UF'].to_numpy()[municipio],
+        'TP_DEPENDENCIA': dependencia,
+        'IN_ENSINO_MEDIO': ensino_medio,
+    })
+    for item, base in itens.items():
+        escolas_df[item] = (rng.random(n) < 1 / (1 + np.exp(-(base + propensao)))).astype(np.int64)
+    escolas_df['NU_MATRICULAS'] = rng.integers(50, 1500, n)
+    return escolas_df
+
+
+def gerar_bloco_enem(rng, inicio, linhas, municipios_df, escolas_df):
+    """``linhas`` candidatos a partir da inscrição ``inicio``."""
+    peso = municipios_df['POPULACAO'].to_numpy() / municipios_df['POPULACAO'].sum()
+    municipio = rng.choice(len(municipios_df), linhas, p=peso)
+
+    # Os concluintes informam uma escola de ensino médio do próprio município
+    escolas_em = escolas_df[escolas_df['IN_ENSINO_MEDIO'] == 1]
+    codigos_municipios = municipios_df['CODIGO_IBGE'].to_numpy()
+    primeira = np.searchsorted(escolas_em['CO_MUNICIPIO'].to_numpy(), codigos_municipios, side='left')
+    quantidade = np.searchsorted(escolas_em['CO_MUNICIPIO'].to_numpy(), codigos_municipios, side='right') - primeira
+    # As escolas estão ordenadas pela ordem dos municípios, que coincide com a ordem dos códigos
+    escola = primeira[municipio] + (rng.random(linhas) * quantidade[municipio]).astype(np.int64)
+    concluinte = rng.random(linhas) < CONCLUINTES
+    privada_escola = escolas_em['TP_DEPENDENCIA'].to_numpy()[escola] == 4
+
+    tipo_escola = np.where(concluinte, np.where(privada_escola, 2, 1),
+                           rng.choice([1, 2, 3], linhas, p=[0.78, 0.215, 0.005]))
+    co_escola = np.where(concluinte, escolas_em['CO_ENTIDADE'].to_numpy()[escola], None)
+
+    adulto = rng.random(linhas) < 0.12
+    idade = np.where(adulto, rng.integers(20, 61, linhas), np.minimum(14 + rng.geometric(0.35, linhas), 25))
+
+    # Proficiência latente: depende do IDH do município e do tipo de escola
+    idh = municipios_df['IDH'].to_numpy()[municipio]
+    base = 500 + 350 * (idh - 0.66) + 60 * (tipo_escola == 2) + rng.normal(0, 65, linhas)
+    notas = {
+        area: np.clip(base + deslocamento + rng.normal(0, 55, linhas), 0, 1000).round(1)
+        for area, deslocamento in [('NU_NOTA_CN', -10), ('NU_NOTA_CH', 20), ('NU_NOTA_LC', 0), ('NU_NOTA_MT', 30)]
+    }
+    redacao = np.clip(np.round((base + 100 + rng.normal(0, 130, linhas)) / 20) * 20, 0, 1000)
+    notas['NU_NOTA_REDACAO'] = np.where(rng.random(linhas) < 0.03, 0.0, redacao)
+
+    falta_primeiro = rng.random(linhas) < FALTA_PRIMEIRO_DIA
+    falta_segundo = falta_primeiro | (rng.random(linhas) < FALTA_SEGUNDO_DIA)
+    for area in ['NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_REDACAO']:
+        notas[area][falta_primeiro] = np.nan
+    for area in ['NU_NOTA_CN', 'NU_NOTA_MT']:
+        notas[area][falta_segundo] = np.nan
+
+    # Tipo de ensino só é informado pelos concluintes (1: regular, 2: educação especial)
+    tipo_ensino = pd.array(rng.choice([1, 2], linhas, p=[0.9, 0.1]), dtype='Int8')
+    tipo_ensino[~concluinte] = pd.NA
+    return pd.DataFrame({
+        'NU_INSCRICAO': np.arange(inicio, inicio + linhas, dtype=np.int64),
+        'TP_SEXO': np.where(rng.random(linhas) < 0.6, 'F', 'M'),
+        'NU_IDADE': idade,
+        'CO_MUNICIPIO_RESIDENCIA': codigos_municipios[municipio],
+        'NO_MUNICIPIO_RESIDENCIA': municipios_df['NOME_MUNICIPIO'].to_numpy()[municipio],
+        'SG_UF_RESIDENCIA': municipios_df['UF'].to_numpy()[municipio],
+        'TP_ESCOLA': tipo_escola,
+        'TP_ENSINO': tipo_ensino,
+        'IN_TREINEIRO': (~concluinte & (rng.random(linhas) < TREINEIROS / (1 - CONCLUINTES))).astype(np.int64),
+        'CO_ESCOLA': co_escola,
+        **notas,
+    })
+
+
+def gerar_dados(pasta, linhas, semente=SEMENTE, escolas_ensino_medio=ESCOLAS_ENSINO_MEDIO,
+                tamanho_bloco=TAMANHO_BLOCO_GERACAO):
+    """Grava em ``pasta`` os três arquivos de entrada, com ``linhas`` candidatos no ENEM.
+
+    Retorna o dicionário com os caminhos gravados (chaves ``enem``, ``censo`` e ``municipios``).
+    """
+    os.makedirs(pasta, exist_ok=True)
+    rng = np.random.default_rng(semente)
+    municipios_df = gerar_municipios(rng)
+    escolas_df = gerar_escolas(rng, municipios_df, escolas_ensino_medio)
+
+    caminhos = {
+        'enem': os.path.join(pasta, ARQUIVO_ENEM),
+        'censo': os.path.join(pasta, ARQUIVO_CENSO),
+        'municipios': os.path.join(pasta, ARQUIVO_MUNICIPIOS),
+    }
+    municipios_df.to_csv(caminhos['municipios'], sep=';', encoding='latin1', index=False)
+    escolas_df.to_csv(caminhos['censo'], sep=';', encoding='latin1', index=False)
+
+    for numero, inicio in enumerate(range(0, linhas, tamanho_bloco)):
+        rng_bloco = np.random.default_rng([semente, numero])
+        bloco = gerar_bloco_enem(rng_bloco, 210_000_000_001 + inicio, min(tamanho_bloco, linhas - inicio),
+                                 municipios_df, escolas_df)
+        bloco.to_csv(caminhos['enem'], sep=';', encoding='latin1', index=False, float_format='%.1f',
+                     mode='w' if numero == 0 else 'a', header=(numero == 0))
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=10_000, help='Candidatos no arquivo do ENEM')
+    parser.add_argument('--pasta', required=True, help='Pasta onde os três arquivos são gravados')
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--escolas', type=int, default=ESCOLAS_ENSINO_MEDIO, help='Escolas de ensino médio')
+    args = parser.parse_args()
+
+    caminhos = gerar_dados(args.pasta, args.linhas, args.semente, args.escolas)
+    for caminho in caminhos.values():
+        print(f"{caminho}: {os.path.getsize(caminho) / 1024 ** 2:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Confere se as médias obtidas do cubo são iguais às dos agrupamentos por candidato.
+
+Reproduz os agrupamentos dos gráficos de pipeline_enem/comandos/visualizar.py (UF, tipo de
+escola, faixa etária e radar) das duas formas e mede o tempo de cada uma.
+
+Uso:
+    python benchmarks/verificar_cubo.py --fator 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from comum import RAIZ, ampliar_amostra
+
+from pipeline_enem.cubo import agregar_cubo, construir_cubo
+from pipeline_enem.dimensoes import dimensao_municipios, enriquecer
+from pipeline_enem.tratamento import tratar_enem, tratar_municipios
+
+NOTAS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
+
+# (nome do gráfico, dimensão, medidas)
+GRAFICOS = [
+    ('mapa_notas_por_uf', 'SG_UF_RESIDENCIA', ['MEDIA_NOTAS']),
+    ('media_por_tipo_escola', 'TP_ESCOLA', ['MEDIA_NOTAS']),
+    ('notas_por_area_e_idade', 'FAIXA_ETARIA', NOTAS[:4]),
+    ('radar_notas_tipo_escola', 'TP_ESCOLA', NOTAS),
+]
+
+
+def carregar_base(arquivo):
+    enem_df = tratar_enem(pd.read_csv(arquivo, sep=';', encoding='latin1'))
+    municipios_df = pd.read_csv(os.path.join(RAIZ, 'dados', 'indicadores_municipios.csv'), sep=';', encoding='latin1')
+    return enriquecer(enem_df, [dimensao_municipios(tratar_municipios(municipios_df))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fator', type=int, default=200, help='Repetições da amostra (5 mil linhas cada)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, 'enem_ampliado.csv')
+        linhas = ampliar_amostra(arquivo, args.fator)
+        dados = carregar_base(arquivo)
+    print(f"Base com {linhas} linhas\n")
+
+    inicio = time.perf_counter()
+    cubo = construir_cubo(dados)
+    tempo_cubo = time.perf_counter() - inicio
+    print(f"Construção do cubo: {tempo_cubo:.3f} s ({len(cubo)} linhas)\n")
+
+    print(f"{'Gráfico':<26}{'groupby (ms)':>14}{'cubo (ms)':>12}{'maior diferença':>18}")
+    for nome, dimensao, medidas in GRAFICOS:
+        inicio = time.perf_counter()
+        esperado = dados.groupby(dimensao, observed=True)[medidas].mean().reset_index()
+        tempo_groupby = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        obtido = agregar_cubo(cubo, dimensao, medidas)
+        tempo_agregado = time.perf_counter() - inicio
+
+        diferenca = np.abs(esperado[medidas].to_numpy() - obtido[medidas].to_numpy()).max()
+        assert (esperado[dimensao].astype(str).to_numpy() == obtido[dimensao].astype(str).to_numpy()).all()
+        assert diferenca < 1e-6, f"{nome}: diferença de {diferenca}"
+        print(f"{nome:<26}{tempo_groupby * 1000:>14.1f}{tempo_agregado * 1000:>12.1f}{diferenca:>18.2e}")
+
+
+if __name__ == '__main__':
+    main()
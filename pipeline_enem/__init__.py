@@ -0,0 +1 @@
+"""Funções compartilhadas pelos scripts de análise e visualização do ENEM 2022."""
@@ -0,0 +1,157 @@
+"""Gravação e leitura dos conjuntos de dados tratados.
+
+O formato padrão é Parquet (colunar, com os tipos de ``esquemas``), que permite
+ler apenas as colunas necessárias. CSV continua disponível, por exemplo para
+conferência manual dos dados tratados.
+"""
+import os
+
+import pandas as pd
+
+from pipeline_enem.esquemas import aplicar_esquema
+from pipeline_enem.instrumentacao import etapa
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele os dados tratados ficam em CSV
+    pa = None
+    pq = None
+
+PASTA_TRATADOS = 'dados_tratados'
+EXTENSOES = {'parquet': '.parquet', 'csv': '.csv'}
+
+
+def parquet_disponivel():
+    return pq is not None
+
+
+def normalizar_formatos(formatos):
+    """Converte a opção de formato ('parquet', 'csv' ou 'ambos') em uma lista de formatos."""
+    if isinstance(formatos, str):
+        formatos = ['parquet', 'csv'] if formatos == 'ambos' else [formatos]
+    if 'parquet' in formatos and not parquet_disponivel():
+        print("pyarrow não está instalado; os dados tratados serão gravados em CSV.")
+        formatos = [f for f in formatos if f != 'parquet'] or ['csv']
+    return list(dict.fromkeys(formatos))
+
+
+def caminho_tratado(nome, formato, pasta=PASTA_TRATADOS):
+    return os.path.join(pasta, nome + EXTENSOES[formato])
+
+
+def salvar_tratado(df, nome, formatos='parquet', pasta=PASTA_TRATADOS):
+    """Grava ``df`` com o esquema de ``nome`` em cada um dos formatos pedidos."""
+    df = aplicar_esquema(df.copy(deep=False), nome)
+    for formato in normalizar_formatos(formatos):
+        caminho = caminho_tratado(nome, formato, pasta)
+        with etapa(f'{"to_parquet" if formato == "parquet" else "to_csv"}:{nome}', linhas_entrada=len(df)):
+            if formato == 'parquet':
+                df.to_parquet(caminho, index=False)
+            else:
+                df.to_csv(caminho, index=False)
+
+
+def carregar_tratado(nome, colunas=None, pasta=PASTA_TRATADOS):
+    """Lê um conjunto tratado, preferindo Parquet, apenas com ``colunas`` (quando informadas).
+
+    Colunas pedidas que não existem no arquivo são ignoradas.
+    """
+    if colunas is not None:
+        colunas = list(dict.fromkeys(colunas))
+
+    with etapa(f'carregar:{nome}') as medicao:
+        caminho_parquet = caminho_tratado(nome, 'parquet', pasta)
+        if parquet_disponivel() and os.path.exists(caminho_parquet):
+            if colunas is not None:
+                existentes = pq.read_schema(caminho_parquet).names
+                colunas = [col for col in colunas if col in existentes]
+            df = pd.read_parquet(caminho_parquet, columns=colunas)
+        else:
+            usecols = None if colunas is None else (lambda col: col in colunas)
+            df = aplicar_esquema(pd.read_csv(caminho_tratado(nome, 'csv', pasta), usecols=usecols), nome)
+        medicao.linhas_saida = len(df)
+    return df
+
+
+def carregar_tratado_em_blocos(nome, colunas=None, tamanho_bloco=500_000, pasta=PASTA_TRATADOS):
+    """Como ``carregar_tratado``, mas gera o conjunto em blocos de até ``tamanho_bloco`` linhas."""
+    if colunas is not None:
+        colunas = list(dict.fromkeys(colunas))
+
+    caminho_parquet = caminho_tratado(nome, 'parquet', pasta)
+    if parquet_disponivel() and os.path.exists(caminho_parquet):
+        arquivo = pq.ParquetFile(caminho_parquet)
+        if colunas is not None:
+            colunas = [col for col in colunas if col in arquivo.schema_arrow.names]
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield lote.to_pandas()
+        return
+
+    usecols = None if colunas is None else (lambda col: col in colunas)
+    for bloco in pd.read_csv(caminho_tratado(nome, 'csv', pasta), usecols=usecols, chunksize=tamanho_bloco):
+        yield aplicar_esquema(bloco, nome)
+
+
+def linhas_tratado(nome, pasta=PASTA_TRATADOS):
+    """Número de linhas de um conjunto tratado, lido dos metadados do Parquet (None sem o Parquet)."""
+    caminho_parquet = caminho_tratado(nome, 'parquet', pasta)
+    if parquet_disponivel() and os.path.exists(caminho_parquet):
+        return pq.ParquetFile(caminho_parquet).metadata.num_rows
+    return None
+
+
+def _normalizar_dicionarios(esquema):
+    # Os códigos dos categóricos podem variar de int8 a int32 entre blocos;
+    # fixar int32 mantém o mesmo esquema em todo o arquivo
+    # (um primeiro bloco só com nulos deixa o dicionário sem tipo; assume-se texto)
+    campos = []
+    for campo in esquema:
+        if pa.types.is_dictionary(campo.type):
+            tipo_valor = campo.type.value_type
+            if pa.types.is_null(tipo_valor):
+                tipo_valor = pa.string()
+            campo = campo.with_type(pa.dictionary(pa.int32(), tipo_valor, campo.type.ordered))
+        campos.append(campo)
+    return pa.schema(campos, metadata=esquema.metadata)
+
+
+class GravadorTratado:
+    """Grava um conjunto tratado bloco a bloco, em Parquet e/ou CSV."""
+
+    def __init__(self, nome, formatos='parquet', pasta=PASTA_TRATADOS):
+        self.nome = nome
+        self.pasta = pasta
+        self.formatos = normalizar_formatos(formatos)
+        self.linhas = 0
+        self.colunas = []
+        self._escritor_parquet = None
+        self._esquema_parquet = None
+
+    def gravar(self, df):
+        with etapa(f'gravar:{self.nome}', linhas_entrada=len(df)):
+            df = aplicar_esquema(df.copy(deep=False), self.nome)
+            primeiro_bloco = self.linhas == 0
+            for formato in self.formatos:
+                caminho = caminho_tratado(self.nome, formato, self.pasta)
+                if formato == 'parquet':
+                    tabela = pa.Table.from_pandas(df, preserve_index=False)
+                    if self._escritor_parquet is None:
+                        self._esquema_parquet = _normalizar_dicionarios(tabela.schema)
+                        self._escritor_parquet = pq.ParquetWriter(caminho, self._esquema_parquet)
+                    self._escritor_parquet.write_table(tabela.cast(self._esquema_parquet))
+                else:
+                    df.to_csv(caminho, mode='w' if primeiro_bloco else 'a', header=primeiro_bloco, index=False)
+            self.linhas += len(df)
+            self.colunas = list(df.columns)
+
+    def fechar(self):
+        if self._escritor_parquet is not None:
+            self._escritor_parquet.close()
+            self._escritor_parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,143 @@
+"""Cache das etapas do tratamento.
+
+Cada etapa recebe uma chave calculada a partir da impressão digital dos
+arquivos de entrada, do código que a implementa e das chaves das etapas de que
+depende. Se a chave é a mesma da última execução e as saídas ainda existem, a
+etapa é reaproveitada; caso contrário é refeita, junto com tudo o que depende
+dela.
+"""
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+ARQUIVO_MANIFESTO = os.path.join('dados_tratados', '.cache_etapas.json')
+
+TAMANHO_LEITURA = 8 * 1024 ** 2
+
+
+def impressao_codigo(*funcoes):
+    """Hash do código-fonte das funções e das constantes de módulo que elas usam."""
+    h = hashlib.sha256()
+    for funcao in funcoes:
+        h.update(inspect.getsource(funcao).encode('utf-8'))
+        for nome in funcao.__code__.co_names:
+            valor = funcao.__globals__.get(nome)
+            if isinstance(valor, (str, int, float, list, tuple, dict)):
+                h.update(f'{nome}={valor!r}'.encode('utf-8'))
+            elif isinstance(valor, np.ndarray):
+                h.update(nome.encode('utf-8') + valor.tobytes())
+    return h.hexdigest()
+
+
+def _atualizar_impressao(h, valor):
+    if isinstance(valor, pd.DataFrame):
+        h.update(repr(list(valor.columns)).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, pd.Series):
+        h.update(repr(valor.name).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(f'{valor.dtype.str}{valor.shape}'.encode('utf-8'))
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, dict):
+        for chave in sorted(valor, key=repr):
+            h.update(repr(chave).encode('utf-8'))
+            _atualizar_impressao(h, valor[chave])
+    elif isinstance(valor, (list, tuple)):
+        h.update(f'{type(valor).__name__}{len(valor)}'.encode('utf-8'))
+        for item in valor:
+            _atualizar_impressao(h, item)
+    else:
+        h.update(repr(valor).encode('utf-8'))
+
+
+def impressao_dados(valor):
+    """Hash de dados já agregados: DataFrames, Series, arrays e listas ou dicionários deles."""
+    h = hashlib.sha256()
+    _atualizar_impressao(h, valor)
+    return h.hexdigest()
+
+
+def _hash_conteudo(caminho):
+    h = hashlib.blake2b(digest_size=20)
+    with open(caminho, 'rb') as arquivo:
+        while bloco := arquivo.read(TAMANHO_LEITURA):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CacheEtapas:
+    """Registro das chaves das etapas já executadas, persistido em ``ARQUIVO_MANIFESTO``."""
+
+    def __init__(self, caminho=ARQUIVO_MANIFESTO, ativo=True):
+        self.caminho = caminho
+        self.ativo = ativo
+        self.reaproveitadas = []
+        self.executadas = []
+        self._manifesto = {'arquivos': {}, 'etapas': {}}
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as arquivo:
+                self._manifesto = json.load(arquivo)
+
+    def impressao_arquivo(self, caminho):
+        """Hash do conteúdo de ``caminho``.
+
+        O hash só é recalculado quando o tamanho ou a data de modificação mudam,
+        então arquivos grandes inalterados não são relidos a cada execução.
+        """
+        info = os.stat(caminho)
+        chave = os.path.abspath(caminho)
+        anterior = self._manifesto['arquivos'].get(chave)
+        if anterior and anterior['tamanho'] == info.st_size and anterior['mtime_ns'] == info.st_mtime_ns:
+            return anterior['hash']
+
+        impressao = _hash_conteudo(caminho)
+        self._manifesto['arquivos'][chave] = {
+            'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns, 'hash': impressao
+        }
+        return impressao
+
+    @staticmethod
+    def chave(etapa, *partes):
+        """Combina o nome da etapa e as impressões das suas entradas em uma chave."""
+        h = hashlib.sha256(etapa.encode('utf-8'))
+        for parte in partes:
+            h.update(b'\0' + str(parte).encode('utf-8'))
+        return h.hexdigest()
+
+    def reaproveitavel(self, etapa, chave, saidas):
+        """Indica se ``etapa`` pode ser reaproveitada e registra a decisão no relatório.
+
+        Além da chave igual, as ``saidas`` pedidas precisam ter sido gravadas pela
+        execução registrada e ainda existir.
+        """
+        registro = self._manifesto['etapas'].get(etapa, {})
+        reaproveitar = (
+            self.ativo
+            and registro.get('chave') == chave
+            and set(saidas) <= set(registro.get('saidas', []))
+            and all(os.path.exists(saida) for saida in saidas)
+        )
+        (self.reaproveitadas if reaproveitar else self.executadas).append(etapa)
+        return reaproveitar
+
+    def registrar(self, etapa, chave, saidas):
+        """Marca ``etapa`` como concluída com ``chave``, tendo gravado ``saidas``, e grava o manifesto."""
+        self._manifesto['etapas'][etapa] = {'chave': chave, 'saidas': list(saidas)}
+        self.salvar()
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self._manifesto, arquivo, indent=2)
+        os.replace(temporario, self.caminho)
+
+    def relatorio(self):
+        print("\n===== Cache de etapas =====")
+        print(f"Reaproveitadas: {', '.join(self.reaproveitadas) or 'nenhuma'}")
+        print(f"Executadas: {', '.join(self.executadas) or 'nenhuma'}")
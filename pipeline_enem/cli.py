@@ -0,0 +1,153 @@
+"""Linha de comando do pipeline: ``python -m pipeline_enem <subcomando>``.
+
+Subcomandos:
+    tratar (treat)          carrega, trata e mescla as bases e grava dados_tratados/
+    analisar (analyze)      gráficos exploratórios em analises/
+    visualizar (viz)        gráficos interativos em visualizacoes/ e arquivos do dashboard
+
+``--apenas`` (ou ``--only``) escolhe os gráficos; basta um prefixo que
+identifique o nome (``viz --only radar``). Os gráficos cujos dados não mudaram
+não são redesenhados (``--sem-cache-graficos`` redesenha todos), e os demais
+são desenhados por ``--processos-graficos`` processos. Só este módulo é importado para
+interpretar os argumentos: pandas, matplotlib, seaborn e plotly são
+importados pelo subcomando executado, e apenas quando ele precisa deles.
+
+Com ``--perfil``, cada etapa medida (leituras, tratamentos, gravações e
+gráficos; ver pipeline_enem.instrumentacao) aparece em uma tabela ao final e é
+anexada ao relatório JSON lines de ``--arquivo-perfil``.
+"""
+import argparse
+import sys
+
+from .comandos import ANO_PADRAO, GRAFICOS_ANALISES, GRAFICOS_VISUALIZACOES, PONTOS_DISPERSAO
+from .instrumentacao import ARQUIVO_RELATORIO, etapa, gravar_relatorio, imprimir_resumo
+
+
+def _nomes_graficos(disponiveis):
+    def resolver(valor):
+        if valor in disponiveis:
+            return valor
+        candidatos = [nome for nome in disponiveis if nome.startswith(valor)]
+        if len(candidatos) != 1:
+            raise argparse.ArgumentTypeError(
+                f"gráfico '{valor}' {'ambíguo' if candidatos else 'desconhecido'}; opções: {', '.join(disponiveis)}")
+        return candidatos[0]
+    return resolver
+
+
+def _regra_validacao(valor):
+    # As regras ficam em pipeline_enem.validacao, importado só quando --quarentena é usado
+    from .validacao import REGRAS_VALIDACAO
+    if valor not in REGRAS_VALIDACAO:
+        raise argparse.ArgumentTypeError(f"regra '{valor}' desconhecida; opções: {', '.join(REGRAS_VALIDACAO)}")
+    return valor
+
+
+def finalizar_perfil(args, argv):
+    """Com ``--perfil``, mostra a tabela das etapas medidas e as anexa ao relatório."""
+    if args.perfil:
+        imprimir_resumo()
+        gravar_relatorio(args.arquivo_perfil, comando=' '.join(argv))
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog='python -m pipeline_enem', description='Pipeline dos dados do ENEM')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    # Opções comuns a todos os subcomandos
+    perfil = argparse.ArgumentParser(add_help=False)
+    perfil.add_argument('--perfil', action='store_true',
+                        help='Mostra tempo, CPU, memória e linhas de cada etapa e as anexa ao relatório')
+    perfil.add_argument('--arquivo-perfil', default=ARQUIVO_RELATORIO,
+                        help=f'Relatório JSON lines das etapas medidas (padrão: {ARQUIVO_RELATORIO})')
+
+    # Opções dos subcomandos que desenham gráficos (ver pipeline_enem.graficos)
+    graficos = argparse.ArgumentParser(add_help=False)
+    graficos.add_argument('--processos-graficos', type=int,
+                          help='Processos que desenham os gráficos (padrão: um por processador)')
+    graficos.add_argument('--sem-cache-graficos', action='store_true',
+                          help='Redesenha todos os gráficos, mesmo aqueles cujos dados não mudaram')
+
+    # --streaming processa o ENEM em blocos, para os microdados completos que não cabem em memória
+    tratar = subcomandos.add_parser('tratar', aliases=['treat'], parents=[perfil],
+                                    help='Tratamento e mesclagem das bases')
+    tratar.add_argument('--ano', type=int, default=ANO_PADRAO,
+                        help=f'Edição do ENEM tratada, gravada nas partições por ano e UF (padrão: {ANO_PADRAO})')
+    tratar.add_argument('--arquivo-enem',
+                        help='Caminho do arquivo do ENEM (padrão: dados/enem_<ano>_amostra.csv)')
+    tratar.add_argument('--arquivo-censo',
+                        help='Caminho do arquivo do Censo Escolar (padrão: dados/censo_escolar_<ano>_amostra.csv)')
+    tratar.add_argument('--arquivo-municipios', default='dados/indicadores_municipios.csv',
+                        help='Caminho do arquivo de indicadores municipais')
+    tratar.add_argument('--streaming', action='store_true',
+                        help='Processa o ENEM em blocos, gravando os arquivos tratados incrementalmente')
+    tratar.add_argument('--limite-memoria-mb', type=int, default=512,
+                        help='Teto de memória usado para dimensionar os blocos no modo streaming '
+                             '(com --workers, as partições de cada processo)')
+    tratar.add_argument('--formato', choices=['parquet', 'csv', 'ambos'], default='parquet',
+                        help='Formato dos arquivos em dados_tratados/ (Parquet preserva os tipos das colunas)')
+    tratar.add_argument('--sem-cache', action='store_true',
+                        help='Refaz todas as etapas do tratamento, mesmo as que não mudaram')
+    tratar.add_argument('--sem-cache-leitura', action='store_true',
+                        help='Interpreta os CSVs brutos mesmo que não tenham mudado desde a última leitura')
+    tratar.add_argument('--motor-leitura', choices=['pandas', 'pyarrow'], default='pandas',
+                        help='Leitor dos CSVs brutos (pyarrow: várias threads, requer o pyarrow)')
+    tratar.add_argument('--workers', type=int, default=1,
+                        help='Processos usados para tratar o ENEM no modo streaming (partições por faixa de bytes)')
+    tratar.add_argument('--tamanho-particao-mb', type=int,
+                        help='Tamanho, no arquivo bruto, de cada partição do modo paralelo '
+                             '(padrão: o teto de --limite-memoria-mb dividido entre os processos)')
+    tratar.add_argument('--explorar', action='store_true',
+                        help='Mostra head(), info() e nulos por coluna das bases brutas lidas')
+    tratar.add_argument('--quarentena', nargs='*', type=_regra_validacao, metavar='REGRA',
+                        help='Regras da validação (ver pipeline_enem.validacao) cujas linhas vão para '
+                             'dados_tratados/quarentena_enem (padrão: tipo_invalido, chave_nula, uf_invalida, '
+                             'nota_fora_do_intervalo, idade_fora_dos_limites e municipio_inexistente; '
+                             'sem regras, só conta as violações)')
+    tratar.add_argument('--sem-validacao', action='store_true',
+                        help='Não valida o ENEM (esquema, notas, idades, chaves e UF)')
+
+    analisar = subcomandos.add_parser('analisar', aliases=['analyze'], parents=[perfil, graficos],
+                                      help='Gráficos exploratórios (PNG)')
+    analisar.add_argument('--apenas', '--only', nargs='+', type=_nomes_graficos(GRAFICOS_ANALISES),
+                          metavar='GRAFICO', help=f"Gráficos a gerar: {', '.join(GRAFICOS_ANALISES)}")
+    analisar.add_argument('--explorar', action='store_true',
+                          help='Mostra as estatísticas descritivas das notas')
+    analisar.add_argument('--ano', type=int,
+                          help='Edição das estatísticas do ENEM, lida das partições por ano (tratar --ano)')
+    analisar.add_argument('--uf', nargs='+', type=str.upper, metavar='UF',
+                          help='Estados das estatísticas do ENEM (padrão: todos), lidos das partições por UF')
+
+    visualizar = subcomandos.add_parser('visualizar', aliases=['viz'], parents=[perfil, graficos],
+                                        help='Gráficos interativos (HTML)')
+    visualizar.add_argument('--apenas', '--only', nargs='+', type=_nomes_graficos(GRAFICOS_VISUALIZACOES),
+                            metavar='GRAFICO', help=f"Gráficos a gerar: {', '.join(GRAFICOS_VISUALIZACOES)}")
+    visualizar.add_argument('--csv-detalhado', action='store_true',
+                            help='Grava também dados_para_dashboard/dados_dashboard.csv, com uma linha por candidato')
+    visualizar.add_argument('--pontos-dispersao', type=int, default=PONTOS_DISPERSAO,
+                            help='Escolas do gráfico de dispersão, amostradas por categoria de infraestrutura '
+                                 f'(padrão: {PONTOS_DISPERSAO}; 0 inclui todas as escolas)')
+    visualizar.add_argument('--ano', type=int,
+                            help='Edição dos gráficos calculados do cubo, lida das partições por ano '
+                                 '(padrão: a tratada por último)')
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = criar_parser().parse_args(argv)
+    if args.comando in ('tratar', 'treat'):
+        from .comandos import tratar as comando
+    elif args.comando in ('analisar', 'analyze'):
+        from .comandos import analisar as comando
+    else:
+        from .comandos import visualizar as comando
+
+    with etapa(comando.__name__.rsplit('.', 1)[-1]):
+        resultado = comando.executar(args)
+    finalizar_perfil(args, argv)
+    return resultado
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
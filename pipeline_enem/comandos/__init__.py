@@ -0,0 +1,25 @@
+"""Subcomandos da linha de comando (``python -m pipeline_enem``).
+
+Este módulo não importa nada pesado: os nomes dos gráficos ficam aqui para
+que ``--help`` e a validação de ``--apenas`` não dependam do pandas. Cada
+subcomando é importado só quando é executado.
+"""
+
+# Gráficos do subcomando analisar (PNG em analises/)
+GRAFICOS_ANALISES = [
+    'distribuicao_notas', 'notas_por_genero', 'correlacao_notas',
+    'media_por_faixa_etaria', 'distribuicao_infraestrutura', 'idh_vs_media',
+]
+
+# Gráficos do subcomando visualizar (HTML em visualizacoes/) e arquivos do dashboard
+GRAFICOS_VISUALIZACOES = [
+    'mapa_notas_por_uf', 'media_por_tipo_escola', 'infraestrutura_vs_desempenho',
+    'notas_por_area_e_idade', 'distribuicao_infraestrutura_pizza', 'radar_notas_tipo_escola',
+    'variacao_anual', 'dashboard',
+]
+
+# Escolas (pontos) do gráfico de dispersão de infraestrutura vs desempenho (visualizar --pontos-dispersao)
+PONTOS_DISPERSAO = 20_000
+
+# Edição do ENEM tratada por padrão (tratar --ano)
+ANO_PADRAO = 2022
@@ -0,0 +1,320 @@
+"""Subcomando ``analisar``: gráficos exploratórios gravados em analises/.
+
+Etapa 8 do antigo analises/analise-dados-enem.py. As estatísticas dos gráficos
+são acumuladas bloco a bloco (ver pipeline_enem.exploratorias): histogramas de
+faixas fixas no lugar de histplot/KDE, quantis aproximados nos boxplots e
+co-momentos na correlação. O ENEM tratado é lido de dados_tratados/ em blocos
+(ou fatiado, quando já está em memória), e só se algum gráfico pedido precisar
+dele; as notas vêm do armazém mapeado em memória (ver pipeline_enem.notas),
+e do Parquet só as demais colunas. A relação entre IDH e média usa o resumo
+por município gravado pelo tratamento (ver pipeline_enem.resumos), uma linha
+por município em vez de uma por candidato.
+
+Com ``--ano`` e/ou ``--uf``, as estatísticas do ENEM são calculadas só com as
+partições da edição e dos estados pedidos (ver pipeline_enem.particoes), sem
+ler as demais; só ``--uf`` usa a edição mais recente das partições. Os
+gráficos de infraestrutura e de IDH continuam com a edição tratada por último.
+
+Cada análise separa os dados agregados do gráfico (montados aqui) do desenho,
+feito por pipeline_enem.graficos: os gráficos cujos dados não mudaram não são
+redesenhados, e os demais são desenhados em paralelo com o backend Agg. O
+matplotlib e o seaborn só são importados pelas funções de desenho.
+"""
+from functools import cache
+
+import numpy as np
+import pandas as pd
+
+from . import GRAFICOS_ANALISES
+from ..armazenamento import carregar_tratado, carregar_tratado_em_blocos, linhas_tratado
+from ..exploratorias import FATOR_EXIBICAO, NOTAS_COLS, TAMANHO_BLOCO_ANALISES, EstatisticasExploratorias
+from ..graficos import Figura, renderizar, usar_backend_agg
+from ..instrumentacao import etapa
+from ..notas import ArmazemNotas, armazem_disponivel
+from ..particoes import anos_disponiveis, blocos_particoes
+from ..tratamento import LABELS_IDADE
+
+# Gráficos que dependem da passada pelo ENEM
+GRAFICOS_ENEM = [nome for nome in GRAFICOS_ANALISES if nome not in ('distribuicao_infraestrutura', 'idh_vs_media')]
+
+# Colunas do resumo por município usadas pela relação entre IDH e média
+COLUNAS_IDH_VS_MEDIA = ['IDH', 'MEDIA_NOTAS', 'N_MEDIA_NOTAS']
+
+
+@cache
+def _importar_pyplot():
+    usar_backend_agg()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Configurações de visualização
+    plt.style.use('seaborn-v0_8-whitegrid')
+    sns.set(font_scale=1.2)
+    return plt, sns
+
+
+def _salvar_figura(plt, caminho):
+    with etapa('savefig'):
+        plt.savefig(caminho)
+
+
+def _armazem_notas():
+    # Só é usado se tiver as mesmas linhas de enem_tratado (gravados na mesma etapa do tratamento)
+    if not armazem_disponivel():
+        return None
+    armazem = ArmazemNotas()
+    return armazem if armazem.linhas == linhas_tratado('enem_tratado') else None
+
+
+def _blocos_enem(enem_df, colunas):
+    if enem_df is None:
+        armazem = _armazem_notas()
+        if armazem is None:
+            yield from carregar_tratado_em_blocos('enem_tratado', colunas, TAMANHO_BLOCO_ANALISES)
+            return
+        # Notas como visões do arquivo mapeado, alinhadas pela posição às demais colunas lidas do Parquet
+        outras = [col for col in colunas if col not in armazem.colunas]
+        inicio = 0
+        for bloco in carregar_tratado_em_blocos('enem_tratado', outras, TAMANHO_BLOCO_ANALISES):
+            notas = armazem.dataframe(colunas, inicio, inicio + len(bloco))
+            yield pd.concat([notas, bloco.set_axis(notas.index)], axis=1)
+            inicio += len(bloco)
+        return
+    enem_df = enem_df[[col for col in colunas if col in enem_df.columns]]
+    for inicio in range(0, len(enem_df), TAMANHO_BLOCO_ANALISES):
+        yield enem_df.iloc[inicio:inicio + TAMANHO_BLOCO_ANALISES]
+
+
+def calcular_estatisticas(enem_df=None, anos=None, ufs=None):
+    """Uma passada pelo ENEM tratado acumulando as estatísticas dos gráficos.
+
+    Com ``anos`` ou ``ufs``, lê só as partições correspondentes, no lugar de ``enem_df``.
+    """
+    colunas = NOTAS_COLS + ['MEDIA_NOTAS', 'QTD_AREAS', 'TP_SEXO', 'FAIXA_ETARIA']
+    if anos is None and ufs is None:
+        blocos = _blocos_enem(enem_df, colunas)
+    else:
+        blocos = blocos_particoes('enem_tratado', anos, ufs, colunas)
+    exploratorias = EstatisticasExploratorias()
+    with etapa('estatisticas') as medicao:
+        for bloco in blocos:
+            exploratorias.atualizar(bloco)
+        medicao.linhas_entrada = exploratorias.linhas
+    return exploratorias
+
+
+# Análise 1: Distribuição das notas
+def distribuicao_notas(exploratorias, tabelas):
+    print("\n===== Análise 1: Distribuição das notas do ENEM =====")
+    paineis = []
+    titulos = [(col, f'Distribuição de {col}', 'Nota') for col in NOTAS_COLS]
+    titulos.append(('MEDIA_NOTAS', 'Distribuição da Média das Notas', 'Média'))
+    for posicao, (col, titulo, rotulo_x) in enumerate(titulos, 1):
+        histograma = exploratorias.histogramas[col]
+        if histograma.n:
+            bordas, contagens = histograma.reagrupado(FATOR_EXIBICAO)
+            paineis.append({'posicao': posicao, 'titulo': titulo, 'rotulo_x': rotulo_x, 'bordas': bordas,
+                            'contagens': contagens, 'centros': histograma.centros,
+                            'densidade': histograma.densidade_suavizada() * FATOR_EXIBICAO})
+    return Figura('distribuicao_notas', desenhar_distribuicao_notas, {'paineis': paineis},
+                  'analises/distribuicao_notas.png')
+
+
+def desenhar_distribuicao_notas(dados, caminho):
+    plt, sns = _importar_pyplot()
+    plt.figure(figsize=(15, 10))
+
+    for painel in dados['paineis']:
+        plt.subplot(2, 3, painel['posicao'])
+        plt.hist(painel['bordas'][:-1], bins=painel['bordas'], weights=painel['contagens'], alpha=0.6)
+        plt.plot(painel['centros'], painel['densidade'])
+        plt.title(painel['titulo'])
+        plt.xlabel(painel['rotulo_x'])
+        plt.ylabel('Frequência')
+
+    plt.tight_layout()
+    _salvar_figura(plt, caminho)
+
+
+# Análise 2: Comparação de médias por gênero
+def notas_por_genero(exploratorias, tabelas):
+    print("\n===== Análise 2: Comparação de notas por gênero =====")
+    if exploratorias.media_por_sexo.grupos:
+        caixas = [histograma.estatisticas_boxplot(sexo)
+                  for sexo, histograma in sorted(exploratorias.media_por_sexo.grupos.items())]
+        return Figura('notas_por_genero', desenhar_notas_por_genero, {'caixas': caixas},
+                      'analises/notas_por_genero.png')
+
+
+def desenhar_notas_por_genero(dados, caminho):
+    plt, sns = _importar_pyplot()
+    plt.figure(figsize=(10, 6))
+    plt.gca().bxp(dados['caixas'], showfliers=False)
+    plt.title('Distribuição da Média das Notas por Gênero')
+    plt.xlabel('Gênero')
+    plt.ylabel('Média das Notas')
+    _salvar_figura(plt, caminho)
+
+
+# Análise 3: Correlação entre as notas
+def correlacao_notas(exploratorias, tabelas):
+    print("\n===== Análise 3: Correlação entre as notas =====")
+    if exploratorias.possui(*NOTAS_COLS):
+        correlation_matrix = pd.DataFrame(exploratorias.correlacao.correlacao(), index=NOTAS_COLS, columns=NOTAS_COLS)
+        return Figura('correlacao_notas', desenhar_correlacao_notas, {'correlacao': correlation_matrix},
+                      'analises/correlacao_notas.png')
+
+
+def desenhar_correlacao_notas(dados, caminho):
+    plt, sns = _importar_pyplot()
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(dados['correlacao'], annot=True, cmap='coolwarm', linewidths=0.5)
+    plt.title('Matriz de Correlação das Notas')
+    plt.tight_layout()
+    _salvar_figura(plt, caminho)
+
+
+# Análise 4: Média por faixa etária
+def media_por_faixa_etaria(exploratorias, tabelas):
+    print("\n===== Análise 4: Média por faixa etária =====")
+    # Intervalo de confiança de 95% pela aproximação normal, como as barras de erro do sns.barplot
+    faixas = [faixa for faixa in LABELS_IDADE if faixa in exploratorias.media_por_faixa_etaria.grupos]
+    if faixas:
+        momentos_faixas = [exploratorias.media_por_faixa_etaria.grupos[faixa] for faixa in faixas]
+        dados = {
+            'faixas': faixas,
+            'medias': [momentos.media[0] for momentos in momentos_faixas],
+            'erros': [np.nan_to_num(1.96 * momentos.desvio_padrao[0] / np.sqrt(momentos.n[0]))
+                      for momentos in momentos_faixas],
+        }
+        return Figura('media_por_faixa_etaria', desenhar_media_por_faixa_etaria, dados,
+                      'analises/media_por_faixa_etaria.png')
+
+
+def desenhar_media_por_faixa_etaria(dados, caminho):
+    plt, sns = _importar_pyplot()
+    plt.figure(figsize=(12, 6))
+    plt.bar(dados['faixas'], dados['medias'], yerr=dados['erros'],
+            color=sns.color_palette(n_colors=len(dados['faixas'])), capsize=5)
+    plt.title('Média das Notas por Faixa Etária')
+    plt.xlabel('Faixa Etária')
+    plt.ylabel('Média das Notas')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    _salvar_figura(plt, caminho)
+
+
+# Análise 5: Distribuição das escolas por nível de infraestrutura
+def distribuicao_infraestrutura(exploratorias, tabelas):
+    print("\n===== Análise 5: Distribuição das escolas por nível de infraestrutura =====")
+    censo_escolar_df = tabelas['censo_escolar_tratado']
+    if 'CATEGORIA_INFRAESTRUTURA' in censo_escolar_df.columns:
+        # Só as contagens por categoria vão para o desenho, não uma linha por escola
+        contagens = censo_escolar_df['CATEGORIA_INFRAESTRUTURA'].value_counts(sort=False)
+        return Figura('distribuicao_infraestrutura', desenhar_distribuicao_infraestrutura, {'contagens': contagens},
+                      'analises/distribuicao_infraestrutura.png')
+
+
+def desenhar_distribuicao_infraestrutura(dados, caminho):
+    plt, sns = _importar_pyplot()
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x=dados['contagens'].index, y=dados['contagens'].to_numpy())
+    plt.title('Distribuição das Escolas por Nível de Infraestrutura')
+    plt.xlabel('Nível de Infraestrutura')
+    plt.ylabel('Quantidade de Escolas')
+    plt.tight_layout()
+    _salvar_figura(plt, caminho)
+
+
+# Análise 6: Relação entre IDH do município e média das notas
+def idh_vs_media(exploratorias, tabelas):
+    print("\n===== Análise 6: Relação entre IDH e média das notas =====")
+    # Um ponto por município (a média dos seus candidatos) no lugar de um ponto por candidato
+    resumo = tabelas['resumo_municipios'].dropna(subset=['IDH', 'MEDIA_NOTAS'])
+    if len(resumo):
+        dados = {
+            'idh': resumo['IDH'].to_numpy(dtype='float64'),
+            'media': resumo['MEDIA_NOTAS'].to_numpy(dtype='float64'),
+            'candidatos': resumo['N_MEDIA_NOTAS'].to_numpy(dtype='int64'),
+        }
+        return Figura('idh_vs_media', desenhar_idh_vs_media, dados, 'analises/idh_vs_media.png')
+
+
+def desenhar_idh_vs_media(dados, caminho):
+    plt, sns = _importar_pyplot()
+    idh, media, candidatos = dados['idh'], dados['media'], dados['candidatos']
+    plt.figure(figsize=(10, 6))
+    # Área de cada ponto proporcional aos candidatos do município
+    plt.scatter(idh, media, s=np.maximum(300 * candidatos / candidatos.max(), 2), alpha=0.4, label='Municípios')
+    if np.ptp(idh) > 0:
+        # Reta ponderada pelos candidatos: a mesma tendência de um ajuste sobre cada candidato
+        coeficientes = np.polyfit(idh, media, 1, w=np.sqrt(candidatos))
+        extremos = np.array([idh.min(), idh.max()])
+        plt.plot(extremos, np.polyval(coeficientes, extremos), color='C3', label='Tendência (ponderada)')
+        plt.legend()
+    plt.title('Relação entre IDH Municipal e Média das Notas')
+    plt.xlabel('IDH')
+    plt.ylabel('Média das Notas do Município')
+    plt.tight_layout()
+    _salvar_figura(plt, caminho)
+
+
+GRAFICOS = {
+    'distribuicao_notas': distribuicao_notas,
+    'notas_por_genero': notas_por_genero,
+    'correlacao_notas': correlacao_notas,
+    'media_por_faixa_etaria': media_por_faixa_etaria,
+    'distribuicao_infraestrutura': distribuicao_infraestrutura,
+    'idh_vs_media': idh_vs_media,
+}
+
+
+def executar(args, enem_df=None, censo_escolar_df=None):
+    """Gera os gráficos de ``args.apenas`` (todos, por padrão).
+
+    As bases já tratadas em memória podem ser passadas para evitar a releitura.
+    """
+    selecionados = args.apenas or GRAFICOS_ANALISES
+
+    anos = None
+    if args.ano is not None or args.uf:
+        disponiveis = anos_disponiveis('enem_tratado')
+        ano = args.ano if args.ano is not None else (disponiveis[-1] if disponiveis else None)
+        if ano not in disponiveis:
+            print(f"Edição {ano} não encontrada em dados_tratados/particoes "
+                  f"(disponíveis: {', '.join(map(str, disponiveis)) or 'nenhuma'}; use tratar --ano).")
+            return
+        anos = [ano]
+        print(f"Edição {ano}" + (f", UFs {', '.join(args.uf)}" if args.uf else ''))
+
+    exploratorias = None
+    if any(nome in GRAFICOS_ENEM for nome in selecionados):
+        print("\n===== Calculando as estatísticas das análises =====")
+        exploratorias = calcular_estatisticas(enem_df, anos, args.uf)
+        if args.explorar:
+            print(f"\nEstatísticas descritivas das notas ({exploratorias.linhas} candidatos, quartis aproximados):")
+            print(exploratorias.descricao())
+            if exploratorias.possui('QTD_AREAS'):
+                print("\nCandidatos por quantidade de áreas objetivas feitas (0 = ausente nos dois dias):")
+                print(pd.Series(exploratorias.areas_feitas, name='candidatos').rename_axis('areas').to_string())
+
+    # Tabelas pequenas usadas pelos demais gráficos, lidas só se algum deles for pedido
+    tabelas = {}
+    if 'distribuicao_infraestrutura' in selecionados:
+        tabelas['censo_escolar_tratado'] = (
+            censo_escolar_df if censo_escolar_df is not None
+            else carregar_tratado('censo_escolar_tratado', colunas=['CATEGORIA_INFRAESTRUTURA'])
+        )
+    if 'idh_vs_media' in selecionados:
+        tabelas['resumo_municipios'] = carregar_tratado('resumo_municipios', colunas=COLUNAS_IDH_VS_MEDIA)
+
+    figuras = []
+    for nome, grafico in GRAFICOS.items():
+        if nome in selecionados:
+            with etapa(nome):
+                figura = grafico(exploratorias, tabelas)
+            if figura is not None:
+                figuras.append(figura)
+    renderizar(figuras, args.processos_graficos, cache=not args.sem_cache_graficos)
+
+    print("\nTodas as análises foram concluídas e salvas!")
@@ -0,0 +1,469 @@
+"""Subcomando ``tratar``: carrega, trata e mescla as bases e grava dados_tratados/.
+
+Etapas 1 a 7 do antigo analises/analise-dados-enem.py. As etapas cuja chave
+não mudou são reaproveitadas (ver pipeline_enem.cache_etapas). Antes da
+mesclagem, o ENEM é validado (ver pipeline_enem.validacao): as linhas que
+violam as regras de ``--quarentena`` vão para dados_tratados/quarentena_enem e
+as demais seguem para as saídas.
+"""
+import pandas as pd
+
+from ..armazenamento import (
+    GravadorTratado, caminho_tratado, carregar_tratado, carregar_tratado_em_blocos, normalizar_formatos,
+    parquet_disponivel, salvar_tratado
+)
+from ..cache_etapas import CacheEtapas, impressao_codigo
+from ..cubo import combinar_cubos, construir_cubo
+from ..dimensoes import Dimensao, dimensao_escolas, dimensao_municipios, enriquecer, enriquecer_em_blocos
+from ..instrumentacao import etapa, medir_blocos
+from ..leitura import FUNCOES_LEITURA, VERSAO_TIPOS, ler_bruto
+from ..notas import GravadorNotas, caminho_metadados, salvar_notas
+from ..paralelo import tamanho_particao_por_memoria, tratar_em_paralelo
+from ..particoes import PARTICOES, GravadorParticoes, anos_disponiveis, caminho_estatisticas
+from ..pontuacao import (
+    categorizar, codigos_faixas, contar_itens, faixas, mascara_itens, mascara_presenca, media_presentes
+)
+from ..resumos import (
+    ARQUIVO_LOTES, COLUNAS_ENEM_RESUMOS, RESUMOS, TAMANHO_BLOCO_RESUMOS, acrescentar_lote, carregar_lotes,
+    combinar_somas, construir_resumos, gravar_lotes, ler_lote, montar_resumo, reaplicar_lotes, somar
+)
+from ..streaming import blocos_enem_tratados, colunas_leitura, estimar_tamanho_bloco
+from ..tratamento import possui_colunas_enem, tratar_censo, tratar_enem, tratar_municipios
+from ..validacao import (
+    ARQUIVO_VALIDACAO, NOME_QUARENTENA, REGRAS_QUARENTENA, ValidadorEnem, remover_saidas, sem_anotacao
+)
+
+
+def _ler_csv(caminho, fonte, args):
+    # Só as colunas usadas, com tipos declarados; enquanto o arquivo não muda, vem do cache de leitura
+    with etapa(f'read_csv:{fonte}') as medicao:
+        df = ler_bruto(caminho, fonte, motor=args.motor_leitura, cache=not args.sem_cache_leitura)
+        medicao.linhas_saida = len(df)
+    return df
+
+
+def _tratar(funcao, df):
+    with etapa(funcao.__name__, linhas_entrada=len(df)) as medicao:
+        df = funcao(df)
+        medicao.linhas_saida = len(df)
+    return df
+
+
+def _concluir_validacao(validador):
+    print("\n===== Validação dos dados do ENEM =====")
+    validador.relatorio()
+    validador.gravar_relatorio()
+    if validador.linhas_quarentena:
+        print(f"Linhas em quarentena gravadas em dados_tratados/{NOME_QUARENTENA}")
+    print(f"Relatório da validação: {ARQUIVO_VALIDACAO}")
+
+
+def executar(args):
+    """Executa o tratamento e retorna as bases em memória (``enem_df`` é None no modo streaming)."""
+    if args.workers > 1 and not args.streaming:
+        print("--workers só se aplica ao modo streaming; o ENEM será tratado em um único processo.")
+    if args.workers > 1 and not parquet_disponivel():
+        print("O modo paralelo grava as partições em Parquet e requer o pyarrow; usando um único processo.")
+        args.workers = 1
+
+    pd.set_option('display.max_columns', None)
+
+    # 1. Carregamento dos dados
+    print("Carregando dados...")
+
+    # NOTA: Os caminhos dos arquivos devem ser ajustados conforme sua estrutura de diretórios
+    # Devido ao tamanho dos arquivos, vamos trabalhar com amostras para demonstração.
+    # Os arquivos do ENEM e do Censo Escolar são, por padrão, os da edição de --ano
+    args.arquivo_enem = args.arquivo_enem or f'dados/enem_{args.ano}_amostra.csv'
+    arquivo_censo = args.arquivo_censo or f'dados/censo_escolar_{args.ano}_amostra.csv'
+    arquivo_municipios = args.arquivo_municipios
+    print(f"Edição do ENEM: {args.ano} ({args.arquivo_enem})")
+
+    # Cada etapa tem uma chave formada pela impressão digital das entradas, pelo código
+    # da etapa e pelas chaves das etapas anteriores. Etapas cuja chave não mudou desde a
+    # última execução são lidas de dados_tratados/ em vez de refeitas.
+    cache = CacheEtapas(ativo=not args.sem_cache)
+    formatos = normalizar_formatos(args.formato)
+    # Regras que colocam as linhas do ENEM em quarentena (None: sem validação)
+    if args.sem_validacao:
+        regras_quarentena = None
+    else:
+        regras_quarentena = sorted(REGRAS_QUARENTENA if args.quarentena is None else args.quarentena)
+
+    # A leitura (tipos declarados, motor e conversão dos valores) faz parte das chaves das
+    # etapas que partem dos arquivos brutos
+    leitura = [args.motor_leitura, VERSAO_TIPOS, impressao_codigo(*FUNCOES_LEITURA)]
+    chaves = {}
+    chaves['censo'] = cache.chave('censo', cache.impressao_arquivo(arquivo_censo), leitura,
+                                  impressao_codigo(tratar_censo, mascara_itens, contar_itens, categorizar))
+    chaves['municipios'] = cache.chave('municipios', cache.impressao_arquivo(arquivo_municipios), leitura,
+                                       impressao_codigo(tratar_municipios, faixas, codigos_faixas))
+    # A validação do ENEM consulta os municípios e as escolas tratados
+    impressao_enem = cache.impressao_arquivo(args.arquivo_enem)
+    chaves['enem'] = cache.chave('enem', impressao_enem, leitura, regras_quarentena,
+                                 None if regras_quarentena is None else [chaves['censo'], chaves['municipios']],
+                                 impressao_codigo(tratar_enem, mascara_presenca, contar_itens, media_presentes,
+                                                  faixas, codigos_faixas, ValidadorEnem.violacoes,
+                                                  ValidadorEnem.separar))
+    # O cubo (etapa mesclagem_municipios) também usa a categoria de infraestrutura das escolas
+    chaves['mesclagem_municipios'] = cache.chave(
+        'mesclagem_municipios', chaves['enem'], chaves['municipios'], chaves['censo'],
+        impressao_codigo(dimensao_municipios, dimensao_escolas, Dimensao.buscar, enriquecer, construir_cubo)
+    )
+    chaves['mesclagem_censo'] = cache.chave('mesclagem_censo', chaves['mesclagem_municipios'], chaves['censo'],
+                                            impressao_codigo(dimensao_municipios, dimensao_escolas, Dimensao.buscar,
+                                                             enriquecer, enriquecer_em_blocos))
+    # Resumos por escola e por município, montados a partir do ENEM tratado e dos lotes
+    # acrescentados depois com python -m pipeline_enem.resumos (reaplicados a cada refação)
+    registro_lotes = carregar_lotes(impressao_enem)
+    chaves['resumos'] = cache.chave('resumos', chaves['enem'], chaves['censo'], chaves['municipios'],
+                                    [lote['impressao'] for lote in registro_lotes['lotes']],
+                                    impressao_codigo(somar, combinar_somas, montar_resumo, construir_resumos,
+                                                     acrescentar_lote, ler_lote, reaplicar_lotes,
+                                                     dimensao_municipios, dimensao_escolas, Dimensao.buscar))
+
+    # Partições por ano e UF do ENEM tratado e do cubo (ver pipeline_enem.particoes)
+    chaves['particoes'] = cache.chave('particoes', args.ano, chaves['enem'], chaves['mesclagem_municipios'],
+                                      impressao_codigo(GravadorParticoes.gravar, GravadorParticoes.fechar))
+
+    # Conjuntos tratados gravados por cada etapa
+    saidas_etapas = {
+        'enem': ['enem_tratado'],
+        'censo': ['censo_escolar_tratado'],
+        'municipios': ['municipios_tratado'],
+        'mesclagem_municipios': ['cubo_enem'],
+        'mesclagem_censo': ['dados_completos'],
+        'resumos': list(RESUMOS),
+    }
+    caminhos_saida = {
+        etapa: [caminho_tratado(nome, formato) for nome in saidas for formato in formatos]
+        for etapa, saidas in saidas_etapas.items()
+    }
+    # O ENEM também grava o armazém das notas mapeado em memória (ver pipeline_enem.notas)
+    caminhos_saida['enem'].append(caminho_metadados())
+    if regras_quarentena is not None:
+        caminhos_saida['enem'].append(ARQUIVO_VALIDACAO)
+    caminhos_saida['resumos'].append(ARQUIVO_LOTES)
+    caminhos_saida['particoes'] = [caminho_estatisticas(nome, args.ano) for nome in PARTICOES]
+    reaproveitar = {etapa: cache.reaproveitavel(etapa, chaves[etapa], caminhos_saida[etapa]) for etapa in chaves}
+
+    # No modo streaming o ENEM e as duas mesclagens são feitos na mesma passada pelos blocos
+    etapas_enem = ['enem', 'mesclagem_municipios', 'mesclagem_censo']
+    refazer_passada_enem = args.streaming and not all(reaproveitar[etapa] for etapa in etapas_enem)
+
+    # Amostra dos dados do ENEM 2022 (substituir pelo caminho real)
+    # No modo streaming o ENEM é lido em blocos na etapa de mesclagem
+    enem_df = None
+    cubo_df = None
+    if not args.streaming and not reaproveitar['enem']:
+        enem_df = _ler_csv(args.arquivo_enem, 'enem', args)
+
+    # Amostra do Censo Escolar 2022 (substituir pelo caminho real)
+    if not reaproveitar['censo']:
+        censo_escolar_df = _ler_csv(arquivo_censo, 'censo', args)
+
+    # Indicadores Socioeconômicos por Município (substituir pelo caminho real)
+    if not reaproveitar['municipios']:
+        municipios_df = _ler_csv(arquivo_municipios, 'municipios', args)
+
+    # 2. Exploração inicial dos dados (apenas dos arquivos brutos lidos nesta execução, com --explorar)
+    if args.explorar and enem_df is not None:
+        print("\n===== Informações sobre o DataFrame do ENEM =====")
+        print(f"Número de linhas: {enem_df.shape[0]}")
+        print(f"Número de colunas: {enem_df.shape[1]}")
+        print("\nPrimeiras linhas:")
+        print(enem_df.head())
+        print("\nInformações das colunas:")
+        print(enem_df.info())
+        print("\nEstatísticas descritivas:")
+        print(enem_df.describe())
+
+    if args.explorar and not reaproveitar['censo']:
+        print("\n\n===== Informações sobre o DataFrame do Censo Escolar =====")
+        print(f"Número de linhas: {censo_escolar_df.shape[0]}")
+        print(f"Número de colunas: {censo_escolar_df.shape[1]}")
+        print("\nPrimeiras linhas:")
+        print(censo_escolar_df.head())
+        print("\nInformações das colunas:")
+        print(censo_escolar_df.info())
+
+    if args.explorar and not reaproveitar['municipios']:
+        print("\n\n===== Informações sobre o DataFrame de Indicadores Municipais =====")
+        print(f"Número de linhas: {municipios_df.shape[0]}")
+        print(f"Número de colunas: {municipios_df.shape[1]}")
+        print("\nPrimeiras linhas:")
+        print(municipios_df.head())
+        print("\nInformações das colunas:")
+        print(municipios_df.info())
+
+    # 3. Tratamento e preparação dos dados do ENEM
+    print("\n===== Tratamento dos dados do ENEM =====")
+
+    # Vamos focar nas colunas mais importantes para a análise (COLS_ENEM).
+    # O tratamento (projeção de colunas, notas nulas, MEDIA_NOTAS e FAIXA_ETARIA)
+    # fica em pipeline_enem.tratamento para ser reaproveitado no modo streaming.
+
+    if args.streaming:
+        if refazer_passada_enem:
+            # Só o cabeçalho é lido aqui; os blocos são tratados na etapa de mesclagem
+            if colunas_leitura(args.arquivo_enem) is None:
+                print("Algumas colunas não foram encontradas. Usando as colunas disponíveis.")
+            if args.workers > 1:
+                # Cada processo trata uma partição inteira por vez: sem --tamanho-particao-mb, o teto
+                # de memória é dividido entre os processos
+                if args.tamanho_particao_mb:
+                    tamanho_particao_mb = args.tamanho_particao_mb
+                    origem = '--tamanho-particao-mb'
+                else:
+                    tamanho_particao_mb = tamanho_particao_por_memoria(args.arquivo_enem, args.limite_memoria_mb,
+                                                                       args.workers)
+                    origem = f'teto de {args.limite_memoria_mb} MB dividido entre os processos'
+                print(f"\nModo streaming em {args.workers} processos: partições de {tamanho_particao_mb} MB "
+                      f"do arquivo bruto ({origem})")
+            else:
+                tamanho_bloco = estimar_tamanho_bloco(args.arquivo_enem, args.limite_memoria_mb)
+                print(f"\nModo streaming: blocos de {tamanho_bloco} linhas (teto de {args.limite_memoria_mb} MB)")
+    elif reaproveitar['enem']:
+        print("\nENEM inalterado: usando dados_tratados/enem_tratado")
+        enem_df = carregar_tratado('enem_tratado')
+    else:
+        # Verificar valores nulos
+        if args.explorar:
+            print("\nValores nulos por coluna no ENEM:")
+            print(enem_df.isnull().sum())
+
+        if not possui_colunas_enem(enem_df.columns):
+            print("Algumas colunas não foram encontradas. Usando as colunas disponíveis.")
+
+        enem_df = _tratar(tratar_enem, enem_df)
+
+    # 4. Tratamento e preparação dos dados do Censo Escolar
+    print("\n===== Tratamento dos dados do Censo Escolar =====")
+
+    if reaproveitar['censo']:
+        print("\nCenso Escolar inalterado: usando dados_tratados/censo_escolar_tratado")
+        censo_escolar_df = carregar_tratado('censo_escolar_tratado')
+    else:
+        # Verificar valores nulos
+        if args.explorar:
+            print("\nValores nulos por coluna no Censo Escolar:")
+            print(censo_escolar_df.isnull().sum())
+
+        # Filtra as escolas de Ensino Médio e cria NIVEL_INFRAESTRUTURA e
+        # CATEGORIA_INFRAESTRUTURA (terceira coluna derivada)
+        censo_escolar_df = _tratar(tratar_censo, censo_escolar_df)
+
+    # 5. Tratamento e preparação dos dados de Indicadores Municipais
+    print("\n===== Tratamento dos dados de Indicadores Municipais =====")
+
+    if reaproveitar['municipios']:
+        print("\nIndicadores Municipais inalterados: usando dados_tratados/municipios_tratado")
+        municipios_df = carregar_tratado('municipios_tratado')
+    else:
+        # Verificar valores nulos
+        if args.explorar:
+            print("\nValores nulos por coluna nos Indicadores Municipais:")
+            print(municipios_df.isnull().sum())
+
+        # Vamos criar uma coluna de categorização do IDH (quarta coluna derivada)
+        municipios_df = _tratar(tratar_municipios, municipios_df)
+
+    # Validação do ENEM (ver pipeline_enem.validacao), com os municípios e as escolas como
+    # referência: em memória, aqui; no modo streaming, bloco a bloco na passada pelo ENEM
+    refazer_enem = refazer_passada_enem if args.streaming else not reaproveitar['enem']
+    validador = None
+    if refazer_enem:
+        remover_saidas()
+        if regras_quarentena is not None:
+            validador = ValidadorEnem(municipios_df, censo_escolar_df, regras_quarentena)
+    if validador is not None and not args.streaming:
+        with etapa('validar', linhas_entrada=len(enem_df)) as medicao:
+            enem_df, quarentena_df = validador.separar(enem_df)
+            medicao.linhas_saida = len(enem_df)
+        if len(quarentena_df):
+            salvar_tratado(quarentena_df, NOME_QUARENTENA, formatos)
+        _concluir_validacao(validador)
+    elif enem_df is not None:
+        # Sem validação, os valores que não converteram na leitura seguem nulos
+        enem_df = sem_anotacao(enem_df)
+
+    # 6. Mesclando os DataFrames para análises
+    print("\n===== Mesclando os DataFrames =====")
+
+    # Em vez de pd.merge, o ENEM é enriquecido por consultas às tabelas de municípios e
+    # de escolas, indexadas uma única vez pela chave (ver pipeline_enem.dimensoes).
+    # Só as colunas necessárias são anexadas, e dados_completos é montado em blocos.
+    with etapa('indexar_dimensoes'):
+        dim_municipios = dimensao_municipios(municipios_df)
+        dim_escolas = dimensao_escolas(censo_escolar_df)
+
+    if args.streaming:
+        if refazer_passada_enem:
+            # Cada bloco do ENEM é tratado, enriquecido e gravado antes da leitura do próximo,
+            # de modo que nem o ENEM nem a base completa ficam inteiros em memória
+            with etapa('passada_enem') as medicao, \
+                    GravadorTratado('enem_tratado', formatos) as gravador_enem, \
+                    GravadorTratado('dados_completos', formatos) as gravador_completos, \
+                    GravadorTratado(NOME_QUARENTENA, formatos) as gravador_quarentena, \
+                    GravadorNotas() as gravador_notas:
+                if args.workers > 1:
+                    # As partições são tratadas em paralelo e anexadas na ordem do arquivo,
+                    # com resultado idêntico ao de um único processo
+                    print(f"\nTratando e mesclando o ENEM em {args.workers} processos...")
+                    cubo_df, total_blocos = tratar_em_paralelo(
+                        args.arquivo_enem, municipios_df, censo_escolar_df, gravador_enem, gravador_completos,
+                        [dim_municipios, dim_escolas], args.workers, tamanho_particao_mb,
+                        gravador_notas=gravador_notas, validador=validador, gravador_quarentena=gravador_quarentena
+                    )
+                else:
+                    print("\nTratando e mesclando o ENEM em blocos...")
+                    total_blocos = 0
+                    cubo_df = None
+                    for enem_bloco in medir_blocos('ler_tratar_bloco',
+                                                   blocos_enem_tratados(args.arquivo_enem, tamanho_bloco)):
+                        if validador is not None:
+                            with etapa('validar', linhas_entrada=len(enem_bloco)):
+                                enem_bloco, quarentena_bloco = validador.separar(enem_bloco)
+                            if len(quarentena_bloco):
+                                gravador_quarentena.gravar(quarentena_bloco)
+                        else:
+                            enem_bloco = sem_anotacao(enem_bloco)
+                        gravador_enem.gravar(enem_bloco)
+                        gravador_notas.gravar(enem_bloco)
+                        with etapa('enriquecer', linhas_entrada=len(enem_bloco)):
+                            completos_bloco = enriquecer(enem_bloco, [dim_municipios, dim_escolas])
+                        gravador_completos.gravar(completos_bloco)
+                        with etapa('construir_cubo', linhas_entrada=len(completos_bloco)):
+                            cubo_df = combinar_cubos([cubo_df, construir_cubo(completos_bloco)])
+                        total_blocos += 1
+                medicao.linhas_saida = gravador_enem.linhas
+            print(f"{gravador_enem.linhas} linhas tratadas e mescladas em {total_blocos} blocos")
+            print(f"\nCubo de agregados com {cubo_df.shape[0]} linhas")
+            if validador is not None:
+                _concluir_validacao(validador)
+        else:
+            print("\nENEM e mesclagens inalterados: usando os arquivos de dados_tratados/")
+    elif reaproveitar['mesclagem_municipios'] and reaproveitar['mesclagem_censo']:
+        print("\nMesclagens inalteradas: usando dados_tratados/dados_completos e dados_tratados/cubo_enem")
+    else:
+        # Preparar para a mesclagem - garantir que as colunas de chave existam
+        if dim_municipios.chave_fato not in enem_df.columns:
+            print("Não foi possível mesclar ENEM com Indicadores Municipais devido à ausência de colunas de chave.")
+        if dim_escolas.chave_fato not in enem_df.columns:
+            print("Não foi possível mesclar com o Censo Escolar devido à ausência de colunas de chave.")
+
+        # Cubo de agregados (UF x tipo de escola x faixa etária x sexo x categoria de IDH x
+        # categoria de infraestrutura) usado pelos gráficos e pelo servidor de consultas no
+        # lugar de novos agrupamentos por candidato. Cada chave do ENEM é consultada uma única
+        # vez: com dados_completos refeito, o cubo é somado a partir dos seus blocos, como no
+        # modo streaming; sozinho, só precisa das categorias das dimensões.
+        refazer_cubo = not reaproveitar['mesclagem_municipios']
+        if refazer_cubo and reaproveitar['mesclagem_censo']:
+            print("\nConsultando as categorias de IDH dos municípios e de infraestrutura das escolas...")
+            with etapa('construir_cubo', linhas_entrada=len(enem_df)) as medicao:
+                cubo_df = construir_cubo(enriquecer(enem_df, [dim_municipios, dim_escolas],
+                                                    colunas=['CATEGORIA_IDH', 'CATEGORIA_INFRAESTRUTURA']))
+                medicao.linhas_saida = len(cubo_df)
+            print(f"Cubo de agregados com {cubo_df.shape[0]} linhas")
+
+        if not reaproveitar['mesclagem_censo']:
+            print("\nMesclando ENEM com Indicadores Municipais e Censo Escolar em blocos...")
+            with etapa('enriquecer', linhas_entrada=len(enem_df)) as medicao, \
+                    GravadorTratado('dados_completos', formatos) as gravador_completos:
+                for completos_bloco in enriquecer_em_blocos(enem_df, [dim_municipios, dim_escolas]):
+                    gravador_completos.gravar(completos_bloco)
+                    if refazer_cubo:
+                        with etapa('construir_cubo', linhas_entrada=len(completos_bloco)):
+                            cubo_df = combinar_cubos([cubo_df, construir_cubo(completos_bloco)])
+                medicao.linhas_saida = gravador_completos.linhas
+            print(f"DataFrame final tem {gravador_completos.linhas} linhas e {len(gravador_completos.colunas)} colunas")
+            if refazer_cubo:
+                print(f"Cubo de agregados com {cubo_df.shape[0]} linhas")
+
+    # Chaves do ENEM sem correspondência nas tabelas de municípios e de escolas
+    if dim_municipios.consultadas:
+        print("\nConsultas às dimensões:")
+        dim_municipios.relatorio()
+        dim_escolas.relatorio()
+
+    # Resumos por escola e por município (ver pipeline_enem.resumos): as análises de
+    # infraestrutura e de IDH usam estas tabelas em vez de percorrer dados_completos
+    if reaproveitar['resumos']:
+        print("\nResumos por escola e por município inalterados: usando dados_tratados/")
+    else:
+        print("\nResumindo o ENEM por escola e por município...")
+        if enem_df is not None:
+            blocos = (enem_df.iloc[inicio:inicio + TAMANHO_BLOCO_RESUMOS]
+                      for inicio in range(0, len(enem_df), TAMANHO_BLOCO_RESUMOS))
+        else:
+            blocos = carregar_tratado_em_blocos('enem_tratado', COLUNAS_ENEM_RESUMOS, TAMANHO_BLOCO_RESUMOS)
+        with etapa('resumos') as medicao:
+            resumos = construir_resumos(medir_blocos('ler_enem_tratado', blocos), censo_escolar_df, municipios_df)
+            if registro_lotes['lotes']:
+                resumos, registro_lotes['lotes'] = reaplicar_lotes(resumos, registro_lotes['lotes'], censo_escolar_df,
+                                                                   municipios_df, cache.impressao_arquivo)
+            medicao.linhas_saida = sum(len(resumo) for resumo in resumos.values())
+        for nome, resumo in resumos.items():
+            print(f"{nome}: {len(resumo)} linhas")
+
+    # Partições do ano: o ENEM tratado por UF e o cubo, ao lado das partições de outras edições
+    if not parquet_disponivel():
+        print("\nAs partições por ano e UF são gravadas em Parquet e requerem o pyarrow; etapa ignorada.")
+    elif reaproveitar['particoes']:
+        print(f"\nPartições de {args.ano} inalteradas: usando dados_tratados/particoes/")
+    else:
+        print(f"\nGravando as partições de {args.ano} por UF...")
+        if enem_df is not None:
+            blocos = (enem_df.iloc[inicio:inicio + TAMANHO_BLOCO_RESUMOS]
+                      for inicio in range(0, len(enem_df), TAMANHO_BLOCO_RESUMOS))
+        else:
+            blocos = carregar_tratado_em_blocos('enem_tratado', tamanho_bloco=TAMANHO_BLOCO_RESUMOS)
+        with etapa('particoes') as medicao, GravadorParticoes('enem_tratado', args.ano) as gravador_particoes:
+            for bloco in medir_blocos('ler_enem_tratado', blocos):
+                gravador_particoes.gravar(bloco)
+            medicao.linhas_saida = gravador_particoes.linhas
+        with GravadorParticoes('cubo_enem', args.ano, por_uf=False) as gravador_cubo:
+            gravador_cubo.gravar(cubo_df if cubo_df is not None else carregar_tratado('cubo_enem'))
+        print(f"{gravador_particoes.linhas} linhas em {len(gravador_particoes.particoes)} partições; "
+              f"edições disponíveis: {', '.join(map(str, anos_disponiveis('enem_tratado')))}")
+
+    # 7. Salvando os DataFrames tratados
+    print("\n===== Salvando os DataFrames tratados =====")
+
+    # Apenas as etapas refeitas são gravadas; dados_completos (e, no modo streaming,
+    # também enem_tratado) já foi gravado bloco a bloco
+    if args.streaming:
+        if refazer_passada_enem:
+            salvar_tratado(cubo_df, 'cubo_enem', formatos)
+            for nome_etapa in etapas_enem:
+                cache.registrar(nome_etapa, chaves[nome_etapa], caminhos_saida[nome_etapa])
+    else:
+        if not reaproveitar['enem']:
+            salvar_tratado(enem_df, 'enem_tratado', formatos)
+            salvar_notas(enem_df)
+            cache.registrar('enem', chaves['enem'], caminhos_saida['enem'])
+        if not reaproveitar['mesclagem_municipios']:
+            salvar_tratado(cubo_df, 'cubo_enem', formatos)
+            cache.registrar('mesclagem_municipios', chaves['mesclagem_municipios'],
+                            caminhos_saida['mesclagem_municipios'])
+        if not reaproveitar['mesclagem_censo']:
+            cache.registrar('mesclagem_censo', chaves['mesclagem_censo'], caminhos_saida['mesclagem_censo'])
+    if not reaproveitar['censo']:
+        salvar_tratado(censo_escolar_df, 'censo_escolar_tratado', formatos)
+        cache.registrar('censo', chaves['censo'], caminhos_saida['censo'])
+    if not reaproveitar['municipios']:
+        salvar_tratado(municipios_df, 'municipios_tratado', formatos)
+        cache.registrar('municipios', chaves['municipios'], caminhos_saida['municipios'])
+    if not reaproveitar['resumos']:
+        for nome, resumo in resumos.items():
+            salvar_tratado(resumo, nome, formatos)
+        gravar_lotes(registro_lotes)
+        cache.registrar('resumos', chaves['resumos'], caminhos_saida['resumos'])
+    if parquet_disponivel() and not reaproveitar['particoes']:
+        cache.registrar('particoes', chaves['particoes'], caminhos_saida['particoes'])
+
+    cache.relatorio()
+
+    print("\nProcesso de tratamento de dados concluído!")
+
+    return enem_df, censo_escolar_df, municipios_df
@@ -0,0 +1,564 @@
+"""Subcomando ``visualizar``: gráficos interativos (HTML em visualizacoes/) e arquivos do dashboard.
+
+Conteúdo do antigo visualizacoes/visualizacoes-avancadas.py. Cada conjunto
+tratado só é lido quando algum dos gráficos pedidos precisa dele (o
+``dados_completos``, por candidato, só no arquivo detalhado), e o plotly só é
+importado dentro de cada gráfico.
+
+O gráfico de dispersão usa o resumo por escola gravado pelo tratamento (ver
+pipeline_enem.resumos): cada ponto é uma escola, com a média dos seus
+candidatos. Vão para o HTML cerca de ``--pontos-dispersao`` escolas, amostradas
+em cada categoria de infraestrutura com a de menor e a de maior média de cada
+uma (ver ``AmostraEstratificada`` em pipeline_enem.estatisticas), em traços
+WebGL; as médias por nível e as estatísticas por categoria exibidas combinam
+as somas das escolas e são as exatas, de todos os candidatos.
+
+Como em ``analisar``, cada gráfico monta os seus dados agregados e o desenho
+fica com pipeline_enem.graficos, que pula os gráficos inalterados e desenha os
+demais em paralelo. Os arquivos do dashboard são gravados diretamente.
+
+Com ``--ano``, os gráficos calculados do cubo usam a edição pedida, lida das
+partições por ano (ver pipeline_enem.particoes); sem ele, a tratada por último.
+O gráfico de variação anual compara as duas edições mais recentes das
+partições, por UF, tipo de escola e faixa etária, e o dashboard recebe a
+variação de todas as edições em dados_para_dashboard/variacao_anual.csv.
+"""
+from functools import cached_property
+
+import pandas as pd
+
+from . import GRAFICOS_VISUALIZACOES
+from ..armazenamento import carregar_tratado
+from ..cubo import DIMENSOES_CUBO, agregar_cubo, variacao_anual
+from ..estatisticas import AmostraEstratificada
+from ..graficos import Figura, renderizar
+from ..instrumentacao import etapa
+from ..particoes import anos_disponiveis, ler_particoes
+from ..tratamento import TIPOS_ESCOLA
+
+# Colunas de dados_completos usadas no arquivo do dashboard
+COLUNAS_DASHBOARD = [
+    # Dados do estudante
+    'NU_INSCRICAO', 'TP_SEXO', 'NU_IDADE', 'FAIXA_ETARIA',
+    # Localização
+    'SG_UF_RESIDENCIA', 'NO_MUNICIPIO_RESIDENCIA',
+    # Escola
+    'TP_ESCOLA', 'TIPO_ESCOLA', 'CO_ESCOLA',
+    # Notas
+    'NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO', 'MEDIA_NOTAS',
+    # Infraestrutura
+    'NIVEL_INFRAESTRUTURA', 'CATEGORIA_INFRAESTRUTURA',
+    # Dados do município
+    'IDH', 'CATEGORIA_IDH', 'PIB_PER_CAPITA'
+]
+# Colunas do resumo por escola usadas no gráfico de dispersão: as exibidas em cada ponto
+# e as somas de MEDIA_NOTAS, de que saem as estatísticas por categoria e por nível
+COLUNAS_PONTOS_DISPERSAO = [
+    'NIVEL_INFRAESTRUTURA', 'MEDIA_NOTAS', 'CATEGORIA_INFRAESTRUTURA', 'NU_MATRICULAS', 'NO_ENTIDADE', 'N_MEDIA_NOTAS'
+]
+COLUNAS_DISPERSAO = COLUNAS_PONTOS_DISPERSAO + ['SOMA_MEDIA_NOTAS', 'SOMA2_MEDIA_NOTAS', 'MIN_MEDIA_NOTAS',
+                                                'MAX_MEDIA_NOTAS']
+# Dimensões da variação anual e o seu nome nos gráficos
+VISOES_VARIACAO_ANUAL = {
+    'SG_UF_RESIDENCIA': 'UF',
+    'TIPO_ESCOLA': 'Tipo de Escola',
+    'FAIXA_ETARIA': 'Faixa Etária',
+}
+
+
+def _nomear_tipos_escola(cubo_enem):
+    # Mapear códigos para nomes de escolas (TIPOS_ESCOLA, em pipeline_enem.tratamento)
+    if 'TP_ESCOLA' in cubo_enem.columns:
+        if pd.api.types.is_integer_dtype(cubo_enem['TP_ESCOLA']):
+            cubo_enem['TIPO_ESCOLA'] = cubo_enem['TP_ESCOLA'].map(TIPOS_ESCOLA)
+        else:
+            cubo_enem['TIPO_ESCOLA'] = cubo_enem['TP_ESCOLA']
+    return cubo_enem
+
+
+class DadosVisualizacoes:
+    """Conjuntos tratados usados pelos gráficos, lidos (apenas as colunas necessárias) no primeiro uso.
+
+    Com ``ano``, o cubo é o da edição pedida, lido das partições por ano.
+    """
+
+    def __init__(self, ano=None):
+        self.ano = ano
+
+    @cached_property
+    def cubo_enem(self):
+        # Os gráficos por UF, tipo de escola e faixa etária usam o cubo de agregados
+        # gerado no tratamento, em vez de reagrupar os dados por candidato
+        if self.ano is None:
+            return _nomear_tipos_escola(carregar_tratado('cubo_enem'))
+        return _nomear_tipos_escola(ler_particoes('cubo_enem', anos=[self.ano]))
+
+    @cached_property
+    def cubo_anos(self):
+        return _nomear_tipos_escola(ler_particoes('cubo_enem'))
+
+    @cached_property
+    def variacao_anual(self):
+        # {dimensão: médias por edição e a variação para a anterior}; vazio com menos de duas edições
+        if 'NU_ANO' not in self.cubo_anos.columns or self.cubo_anos['NU_ANO'].nunique() < 2:
+            return {}
+        return {dimensao: variacao_anual(self.cubo_anos, dimensao) for dimensao in VISOES_VARIACAO_ANUAL
+                if dimensao in self.cubo_anos.columns}
+
+    @cached_property
+    def dados_completos(self):
+        return carregar_tratado('dados_completos', colunas=COLUNAS_DASHBOARD)
+
+    @cached_property
+    def resumo_escolas(self):
+        return carregar_tratado('resumo_escolas', colunas=COLUNAS_DISPERSAO)
+
+    @cached_property
+    def censo_escolar_tratado(self):
+        return carregar_tratado('censo_escolar_tratado', colunas=['CATEGORIA_INFRAESTRUTURA'])
+
+
+def _gravar_html(fig, caminho):
+    with etapa('write_html'):
+        fig.write_html(caminho)
+
+
+def _gravar_csv(df, caminho):
+    with etapa('to_csv', linhas_entrada=len(df)):
+        df.to_csv(caminho, index=False)
+
+
+# 1. Visualização: Mapa de calor da média das notas por UF
+def mapa_notas_por_uf(dados, args):
+    print("\nCriando mapa de calor das notas por UF...")
+    cubo_enem = dados.cubo_enem
+
+    # Agrupar dados por UF
+    if 'SG_UF_RESIDENCIA' in cubo_enem.columns and 'SOMA_MEDIA_NOTAS' in cubo_enem.columns:
+        media_por_uf = agregar_cubo(cubo_enem, 'SG_UF_RESIDENCIA', ['MEDIA_NOTAS'])
+        return Figura('mapa_notas_por_uf', desenhar_mapa_notas_por_uf, {'media_por_uf': media_por_uf},
+                      'visualizacoes/mapa_notas_por_uf.html')
+    print("Colunas necessárias não encontradas para criar o mapa de calor por UF.")
+
+
+def desenhar_mapa_notas_por_uf(dados, caminho):
+    import plotly.express as px
+
+    # Criar mapa
+    fig = px.choropleth(
+        dados['media_por_uf'],
+        locations='SG_UF_RESIDENCIA',
+        color='MEDIA_NOTAS',
+        scope="south america",
+        locationmode='ISO-3',
+        color_continuous_scale=px.colors.sequential.Plasma,
+        labels={'MEDIA_NOTAS': 'Média das Notas', 'SG_UF_RESIDENCIA': 'UF'},
+        title='Média das Notas do ENEM por Unidade Federativa'
+    )
+
+    fig.update_geos(
+        fitbounds="locations",
+        visible=False
+    )
+
+    _gravar_html(fig, caminho)
+    print("Mapa de calor por UF criado com sucesso!")
+
+
+# 2. Visualização: Gráfico de barras de desempenho por tipo de escola
+def media_por_tipo_escola(dados, args):
+    print("\nCriando gráfico de desempenho por tipo de escola...")
+    cubo_enem = dados.cubo_enem
+
+    if all(col in cubo_enem.columns for col in ['TIPO_ESCOLA', 'SOMA_MEDIA_NOTAS']):
+        # Agrupar por tipo de escola
+        media_por_escola = agregar_cubo(cubo_enem, 'TIPO_ESCOLA', ['MEDIA_NOTAS'])
+        return Figura('media_por_tipo_escola', desenhar_media_por_tipo_escola, {'media_por_escola': media_por_escola},
+                      'visualizacoes/media_por_tipo_escola.html')
+    print("Colunas necessárias não encontradas para criar o gráfico por tipo de escola.")
+
+
+def desenhar_media_por_tipo_escola(dados, caminho):
+    import plotly.express as px
+
+    # Criar gráfico de barras
+    fig = px.bar(
+        dados['media_por_escola'],
+        x='TIPO_ESCOLA',
+        y='MEDIA_NOTAS',
+        color='TIPO_ESCOLA',
+        labels={'MEDIA_NOTAS': 'Média das Notas', 'TIPO_ESCOLA': 'Tipo de Escola'},
+        title='Média das Notas por Tipo de Escola',
+        template='plotly_white'
+    )
+
+    fig.update_layout(xaxis={'categoryorder': 'total descending'})
+    _gravar_html(fig, caminho)
+    print("Gráfico de desempenho por tipo de escola criado com sucesso!")
+
+
+# 3. Visualização: Gráfico de dispersão relacionando infraestrutura e desempenho
+def resumir_dispersao(resumo_escolas, orcamento, semente=0):
+    """Amostra das escolas estratificada por CATEGORIA_INFRAESTRUTURA e estatísticas exatas de MEDIA_NOTAS.
+
+    As estatísticas por categoria e as médias por nível combinam as somas de
+    cada escola, e são as mesmas de um agrupamento por candidato; a amostra tem
+    cerca de ``orcamento`` escolas, mais a de menor e a de maior média de cada
+    categoria. Retorna (amostra, estatísticas, médias por nível, total de escolas).
+    """
+    escolas = resumo_escolas.dropna(subset=['NIVEL_INFRAESTRUTURA', 'MEDIA_NOTAS', 'CATEGORIA_INFRAESTRUTURA'])
+    amostra = AmostraEstratificada(orcamento, 'MEDIA_NOTAS', semente)
+    amostra.atualizar(escolas, escolas['CATEGORIA_INFRAESTRUTURA'])
+
+    por_categoria = agregar_cubo(escolas, 'CATEGORIA_INFRAESTRUTURA', ['MEDIA_NOTAS'], desvio_padrao=True)
+    extremos = escolas.groupby('CATEGORIA_INFRAESTRUTURA', observed=True).agg(
+        MINIMO=('MIN_MEDIA_NOTAS', 'min'), MAXIMO=('MAX_MEDIA_NOTAS', 'max'))
+    estatisticas = pd.DataFrame({
+        'CATEGORIA_INFRAESTRUTURA': por_categoria['CATEGORIA_INFRAESTRUTURA'],
+        'CANDIDATOS': por_categoria['N_MEDIA_NOTAS'],
+        'MEDIA': por_categoria['MEDIA_NOTAS'],
+        'DESVIO_PADRAO': por_categoria['DP_MEDIA_NOTAS'],
+    }).join(extremos, on='CATEGORIA_INFRAESTRUTURA')
+    medias_por_nivel = agregar_cubo(escolas, 'NIVEL_INFRAESTRUTURA', ['MEDIA_NOTAS'])
+    return (amostra.amostra().reindex(columns=COLUNAS_PONTOS_DISPERSAO), estatisticas,
+            medias_por_nivel[['NIVEL_INFRAESTRUTURA', 'MEDIA_NOTAS']], len(escolas))
+
+
+def infraestrutura_vs_desempenho(dados, args):
+    print("\nCriando gráfico de dispersão de infraestrutura vs desempenho...")
+
+    # Para esse gráfico, precisamos dos dados do censo escolar com o desempenho dos candidatos
+    # de cada escola: o resumo por escola tem os dois, uma linha por escola
+    resumo_escolas = dados.resumo_escolas
+    if all(col in resumo_escolas.columns for col in COLUNAS_DISPERSAO):
+        orcamento = args.pontos_dispersao if args.pontos_dispersao > 0 else len(resumo_escolas)
+        with etapa('amostra', linhas_entrada=len(resumo_escolas)) as medicao:
+            pontos, estatisticas, medias_por_nivel, total = resumir_dispersao(resumo_escolas, orcamento)
+            medicao.linhas_saida = len(pontos)
+        print(f"{len(pontos)} de {total} escolas no gráfico; MEDIA_NOTAS por categoria (todos os candidatos):")
+        print(estatisticas.to_string(index=False, float_format='{:.1f}'.format))
+        return Figura('infraestrutura_vs_desempenho', desenhar_infraestrutura_vs_desempenho,
+                      {'pontos': pontos, 'estatisticas': estatisticas, 'medias_por_nivel': medias_por_nivel,
+                       'total': total},
+                      'visualizacoes/infraestrutura_vs_desempenho.html')
+    print("Colunas necessárias não encontradas para criar o gráfico de dispersão.")
+
+
+def desenhar_infraestrutura_vs_desempenho(dados, caminho):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    pontos, estatisticas = dados['pontos'], dados['estatisticas']
+    titulo = 'Relação entre Infraestrutura Escolar e Desempenho no ENEM'
+    if len(pontos) < dados['total']:
+        titulo += (f"<br><sup>Amostra de {len(pontos)} das {dados['total']} escolas, estratificada por "
+                   "categoria; médias e estatísticas com todos os candidatos</sup>")
+    else:
+        titulo += "<br><sup>Cada ponto é uma escola, com a média dos seus candidatos</sup>"
+    # Traços WebGL (Scattergl): o navegador desenha os pontos na GPU
+    fig = px.scatter(
+        pontos,
+        x='NIVEL_INFRAESTRUTURA',
+        y='MEDIA_NOTAS',
+        color='CATEGORIA_INFRAESTRUTURA',
+        size='NU_MATRICULAS',
+        hover_name='NO_ENTIDADE',
+        hover_data=['N_MEDIA_NOTAS'],
+        labels={
+            'NIVEL_INFRAESTRUTURA': 'Nível de Infraestrutura',
+            'MEDIA_NOTAS': 'Média das Notas da Escola',
+            'CATEGORIA_INFRAESTRUTURA': 'Categoria de Infraestrutura',
+            'N_MEDIA_NOTAS': 'Candidatos'
+        },
+        title=titulo,
+        template='plotly_white',
+        render_mode='webgl'
+    )
+
+    # Médias exatas por nível e estatísticas por categoria, calculadas com todos os candidatos
+    medias_por_nivel = dados['medias_por_nivel']
+    fig.add_trace(go.Scattergl(
+        x=medias_por_nivel['NIVEL_INFRAESTRUTURA'],
+        y=medias_por_nivel['MEDIA_NOTAS'],
+        mode='markers',
+        marker=dict(symbol='diamond', size=12, color='black'),
+        name='Média do nível'
+    ))
+    linhas = [f"{linha.CATEGORIA_INFRAESTRUTURA}: {linha.CANDIDATOS} candidatos, média {linha.MEDIA:.1f} "
+              f"(desvio {linha.DESVIO_PADRAO:.1f}, de {linha.MINIMO:.1f} a {linha.MAXIMO:.1f})"
+              for linha in estatisticas.itertuples()]
+    fig.add_annotation(text='<br>'.join(linhas), xref='paper', yref='paper', x=0, y=-0.15, xanchor='left',
+                       yanchor='top', align='left', showarrow=False)
+    fig.update_layout(margin=dict(b=80 + 20 * len(linhas)))
+
+    _gravar_html(fig, caminho)
+    print("Gráfico de dispersão criado com sucesso!")
+
+
+# 4. Visualização: Gráfico de linha da evolução de notas por faixa etária e área
+def notas_por_area_e_idade(dados, args):
+    print("\nCriando gráfico de linha da evolução de notas por área de conhecimento e faixa etária...")
+    cubo_enem = dados.cubo_enem
+
+    if 'FAIXA_ETARIA' in cubo_enem.columns:
+        # Preparar dados
+        areas = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT']
+        areas_presentes = [area for area in areas if 'SOMA_' + area in cubo_enem.columns]
+
+        if areas_presentes:
+            # Criar um DataFrame melhor para visualização
+            notas_por_faixa = agregar_cubo(cubo_enem, 'FAIXA_ETARIA', areas_presentes)
+            return Figura('notas_por_area_e_idade', desenhar_notas_por_area_e_idade,
+                          {'notas_por_faixa': notas_por_faixa, 'areas': areas_presentes},
+                          'visualizacoes/notas_por_area_e_idade.html')
+        print("Colunas de notas por área não encontradas.")
+    else:
+        print("Coluna 'FAIXA_ETARIA' não encontrada.")
+
+
+def desenhar_notas_por_area_e_idade(dados, caminho):
+    import plotly.graph_objects as go
+
+    notas_por_faixa = dados['notas_por_faixa']
+
+    # Criar gráfico
+    fig = go.Figure()
+
+    for area in dados['areas']:
+        nome_area = {
+            'NU_NOTA_CN': 'Ciências da Natureza',
+            'NU_NOTA_CH': 'Ciências Humanas',
+            'NU_NOTA_LC': 'Linguagens e Códigos',
+            'NU_NOTA_MT': 'Matemática'
+        }.get(area, area)
+
+        fig.add_trace(go.Scatter(
+            x=notas_por_faixa['FAIXA_ETARIA'],
+            y=notas_por_faixa[area],
+            mode='lines+markers',
+            name=nome_area
+        ))
+
+    fig.update_layout(
+        title='Média das Notas por Área de Conhecimento e Faixa Etária',
+        xaxis_title='Faixa Etária',
+        yaxis_title='Média das Notas',
+        template='plotly_white',
+        legend_title='Área de Conhecimento'
+    )
+
+    _gravar_html(fig, caminho)
+    print("Gráfico de linha criado com sucesso!")
+
+
+# 5. Visualização: Gráfico de pizza da distribuição de escolas por infraestrutura
+def distribuicao_infraestrutura_pizza(dados, args):
+    print("\nCriando gráfico de pizza da distribuição de escolas por infraestrutura...")
+    censo_escolar_tratado = dados.censo_escolar_tratado
+
+    if 'CATEGORIA_INFRAESTRUTURA' in censo_escolar_tratado.columns:
+        # Contagem de escolas por categoria
+        contagem_infra = censo_escolar_tratado['CATEGORIA_INFRAESTRUTURA'].value_counts().reset_index()
+        contagem_infra.columns = ['Categoria', 'Quantidade']
+        return Figura('distribuicao_infraestrutura_pizza', desenhar_distribuicao_infraestrutura_pizza,
+                      {'contagem_infra': contagem_infra}, 'visualizacoes/distribuicao_infraestrutura_pizza.html')
+    print("Coluna 'CATEGORIA_INFRAESTRUTURA' não encontrada.")
+
+
+def desenhar_distribuicao_infraestrutura_pizza(dados, caminho):
+    import plotly.express as px
+
+    # Criar gráfico de pizza
+    fig = px.pie(
+        dados['contagem_infra'],
+        values='Quantidade',
+        names='Categoria',
+        title='Distribuição das Escolas por Nível de Infraestrutura',
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    _gravar_html(fig, caminho)
+    print("Gráfico de pizza criado com sucesso!")
+
+
+# 6. Visualização: Gráfico de radar comparando desempenho por área de conhecimento e tipo de escola
+def radar_notas_tipo_escola(dados, args):
+    print("\nCriando gráfico de radar comparando desempenho por área e tipo de escola...")
+    cubo_enem = dados.cubo_enem
+
+    if all(col in cubo_enem.columns for col in ['TIPO_ESCOLA']):
+        # Verificar quais colunas de notas estão disponíveis
+        notas_cols = [col for col in ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
+                      if 'SOMA_' + col in cubo_enem.columns]
+
+        if notas_cols:
+            # Calcular médias por tipo de escola
+            radar_data = agregar_cubo(cubo_enem, 'TIPO_ESCOLA', notas_cols)
+            return Figura('radar_notas_tipo_escola', desenhar_radar_notas_tipo_escola,
+                          {'radar_data': radar_data, 'notas_cols': notas_cols},
+                          'visualizacoes/radar_notas_tipo_escola.html')
+        print("Colunas de notas não encontradas.")
+    else:
+        print("Coluna 'TIPO_ESCOLA' não encontrada.")
+
+
+def desenhar_radar_notas_tipo_escola(dados, caminho):
+    import plotly.graph_objects as go
+
+    radar_data, notas_cols = dados['radar_data'], dados['notas_cols']
+
+    # Criar figura
+    fig = go.Figure()
+
+    for i, row in radar_data.iterrows():
+        tipo_escola = row['TIPO_ESCOLA']
+        valores = row[notas_cols].tolist()
+        rotulos = [
+            'Ciências da Natureza',
+            'Ciências Humanas',
+            'Linguagens e Códigos',
+            'Matemática',
+            'Redação'
+        ][:len(notas_cols)]  # Ajustar para o número de colunas presentes
+
+        fig.add_trace(go.Scatterpolar(
+            r=valores,
+            theta=rotulos,
+            fill='toself',
+            name=tipo_escola
+        ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1000]  # Ajustar conforme a escala das notas
+            )
+        ),
+        title='Comparação de Desempenho por Área de Conhecimento e Tipo de Escola',
+        template='plotly_white'
+    )
+
+    _gravar_html(fig, caminho)
+    print("Gráfico de radar criado com sucesso!")
+
+
+# 7. Visualização: Variação anual da média das notas por UF, tipo de escola e faixa etária
+def variacao_anual_notas(dados, args):
+    print("\nCriando gráfico da variação anual da média das notas...")
+    if not dados.variacao_anual:
+        print("São necessárias ao menos duas edições tratadas (tratar --ano); "
+              f"disponíveis: {', '.join(map(str, anos_disponiveis('cubo_enem'))) or 'nenhuma'}.")
+        return None
+
+    anos = sorted(dados.cubo_anos['NU_ANO'].unique())
+    colunas = ['NU_ANO_ANTERIOR', 'MEDIA_NOTAS', 'DELTA_MEDIA_NOTAS']
+    visoes = {dimensao: variacao[variacao['NU_ANO'] == anos[-1]][[dimensao] + colunas]
+              for dimensao, variacao in dados.variacao_anual.items()}
+    return Figura('variacao_anual', desenhar_variacao_anual,
+                  {'visoes': visoes, 'ano': int(anos[-1]), 'anterior': int(anos[-2])},
+                  'visualizacoes/variacao_anual.html')
+
+
+def desenhar_variacao_anual(dados, caminho):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    visoes = dados['visoes']
+    fig = make_subplots(rows=len(visoes), cols=1, vertical_spacing=0.12,
+                        subplot_titles=[VISOES_VARIACAO_ANUAL[dimensao] for dimensao in visoes])
+    for linha, (dimensao, variacao) in enumerate(visoes.items(), start=1):
+        variacao = variacao.dropna(subset=['DELTA_MEDIA_NOTAS'])
+        fig.add_trace(go.Bar(
+            x=variacao[dimensao].astype(str),
+            y=variacao['DELTA_MEDIA_NOTAS'],
+            marker_color=['#2ca02c' if delta >= 0 else '#d62728' for delta in variacao['DELTA_MEDIA_NOTAS']],
+            customdata=variacao[['MEDIA_NOTAS', 'NU_ANO_ANTERIOR']].astype('float64').to_numpy(),
+            hovertemplate='%{x}<br>Média: %{customdata[0]:.1f}<br>'
+                          'Variação desde %{customdata[1]:.0f}: %{y:+.1f}<extra></extra>',
+            showlegend=False
+        ), row=linha, col=1)
+        fig.update_yaxes(title_text='Variação da Média', row=linha, col=1)
+
+    fig.update_layout(
+        title=f"Variação da Média das Notas de {dados['anterior']} para {dados['ano']}",
+        height=350 * len(visoes),
+        template='plotly_white'
+    )
+
+    _gravar_html(fig, caminho)
+    print("Gráfico de variação anual criado com sucesso!")
+
+
+# 8. Preparar dados para o Looker Studio
+def dashboard(dados, args):
+    print("\nPreparando dados para o Looker Studio...")
+
+    # O arquivo consolidado, com uma linha por candidato, fica grande demais com os
+    # microdados completos; o dashboard consulta o servidor local (pipeline_enem.servidor)
+    # ou o arquivo agregado, e o detalhado só é gerado com --csv-detalhado
+    if args.csv_detalhado:
+        # Filtrar apenas colunas que existem (COLUNAS_DASHBOARD)
+        dados_completos = dados.dados_completos
+        colunas_existentes = [col for col in COLUNAS_DASHBOARD if col in dados_completos.columns]
+
+        # Salvar para o Looker Studio
+        _gravar_csv(dados_completos[colunas_existentes], 'dados_para_dashboard/dados_dashboard.csv')
+        print("Dados para dashboard preparados com sucesso!")
+    else:
+        print("Arquivo detalhado não gerado (use --csv-detalhado); para consultas por dimensão, "
+              "use o servidor: python -m pipeline_enem.servidor")
+
+    # Versão agregada para o dashboard: médias e contagens por combinação de dimensões,
+    # calculadas a partir do cubo (poucas linhas mesmo com os microdados completos)
+    cubo_enem = dados.cubo_enem
+    dimensoes_dashboard = [col for col in DIMENSOES_CUBO + ['TIPO_ESCOLA'] if col in cubo_enem.columns]
+    dashboard_agregado_df = agregar_cubo(cubo_enem, dimensoes_dashboard, desvio_padrao=True, dropna=False)
+    _gravar_csv(dashboard_agregado_df, 'dados_para_dashboard/dados_dashboard_agregado.csv')
+    print("Dados agregados para dashboard preparados com sucesso!")
+
+    # Variação anual: uma linha por edição e grupo de cada dimensão, com a diferença para a edição anterior
+    if dados.variacao_anual:
+        variacao_df = pd.concat([
+            variacao.rename(columns={dimensao: 'GRUPO'}).assign(DIMENSAO=dimensao)
+            for dimensao, variacao in dados.variacao_anual.items()
+        ], ignore_index=True)
+        variacao_df['GRUPO'] = variacao_df['GRUPO'].astype(str)
+        _gravar_csv(variacao_df[['DIMENSAO', 'GRUPO'] + [col for col in variacao_df.columns
+                                                          if col not in ('DIMENSAO', 'GRUPO')]],
+                    'dados_para_dashboard/variacao_anual.csv')
+        print("Variação anual para dashboard preparada com sucesso!")
+
+
+GRAFICOS = {
+    'mapa_notas_por_uf': mapa_notas_por_uf,
+    'media_por_tipo_escola': media_por_tipo_escola,
+    'infraestrutura_vs_desempenho': infraestrutura_vs_desempenho,
+    'notas_por_area_e_idade': notas_por_area_e_idade,
+    'distribuicao_infraestrutura_pizza': distribuicao_infraestrutura_pizza,
+    'radar_notas_tipo_escola': radar_notas_tipo_escola,
+    'variacao_anual': variacao_anual_notas,
+    'dashboard': dashboard,
+}
+
+
+def executar(args):
+    """Gera os gráficos de ``args.apenas`` (todos, por padrão)."""
+    selecionados = args.apenas or GRAFICOS_VISUALIZACOES
+    if args.ano is not None and args.ano not in anos_disponiveis('cubo_enem'):
+        print(f"Edição {args.ano} não encontrada em dados_tratados/particoes (trate-a com tratar --ano {args.ano}).")
+        return
+    print("Carregando dados tratados...")
+    dados = DadosVisualizacoes(args.ano)
+    figuras = []
+    for nome, grafico in GRAFICOS.items():
+        if nome in selecionados:
+            with etapa(nome):
+                figura = grafico(dados, args)
+            if figura is not None:
+                figuras.append(figura)
+    renderizar(figuras, args.processos_graficos, cache=not args.sem_cache_graficos)
+
+    print("\nTodas as visualizações foram criadas com sucesso!")
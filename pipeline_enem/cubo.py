@@ -0,0 +1,116 @@
+"""Cubo de agregados do ENEM.
+
+Guarda, para cada combinação de UF, tipo de escola, faixa etária, sexo,
+categoria de IDH, categoria de infraestrutura da escola e situação nas
+provas, a contagem, a soma e a soma dos quadrados de cada nota. A partir
+dele qualquer média (ou desvio padrão) por um subconjunto dessas dimensões
+é obtida sem voltar aos dados por candidato. As notas ausentes
+ficam fora das contagens e das somas; a situação nas provas permite filtrar,
+por exemplo, só os candidatos que fizeram todas as provas.
+"""
+import numpy as np
+import pandas as pd
+
+from .pontuacao import categorizar
+from .tratamento import CODIGOS_PRESENCA, LABELS_PRESENCA
+
+DIMENSOES_CUBO = [
+    'SG_UF_RESIDENCIA', 'TP_ESCOLA', 'FAIXA_ETARIA', 'TP_SEXO', 'CATEGORIA_IDH', 'CATEGORIA_INFRAESTRUTURA',
+    'PRESENCA_PROVAS'
+]
+MEDIDAS_CUBO = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO', 'MEDIA_NOTAS']
+
+
+def _dimensoes(df):
+    return [col for col in df.columns if col in DIMENSOES_CUBO]
+
+
+def _medidas(df):
+    return [col for col in MEDIDAS_CUBO if 'SOMA_' + col in df.columns]
+
+
+def construir_cubo(df):
+    """Agrega ``df`` (ENEM tratado mesclado aos municípios e às escolas) no cubo.
+
+    Linhas com dimensão nula (por exemplo, município sem IDH) são mantidas
+    em um grupo próprio para que os totais continuem completos.
+    """
+    valores = {col: df[col] for col in DIMENSOES_CUBO if col in df.columns}
+    if 'PRESENCA' in df.columns:
+        # A situação nas provas vem da máscara de presença, sem ser guardada por candidato
+        valores['PRESENCA_PROVAS'] = pd.Series(
+            categorizar(CODIGOS_PRESENCA[df['PRESENCA'].to_numpy()], LABELS_PRESENCA), index=df.index)
+    dimensoes = list(valores)
+    medidas = [col for col in MEDIDAS_CUBO if col in df.columns]
+
+    for col in medidas:
+        nota = df[col].astype('float64')
+        valores['N_' + col] = nota.notna().astype('int64')
+        valores['SOMA_' + col] = nota
+        valores['SOMA2_' + col] = nota * nota
+
+    return (
+        pd.DataFrame(valores)
+        .groupby(dimensoes, observed=True, dropna=False)
+        .sum()
+        .reset_index()
+    )
+
+
+def combinar_cubos(cubos):
+    """Soma cubos parciais (por exemplo, um por bloco do modo streaming)."""
+    cubos = [cubo for cubo in cubos if cubo is not None]
+    if len(cubos) == 1:
+        return cubos[0]
+    cubo = pd.concat(cubos, ignore_index=True)
+    return cubo.groupby(_dimensoes(cubo), observed=True, dropna=False).sum().reset_index()
+
+
+def agregar_cubo(cubo, dimensoes, medidas=None, desvio_padrao=False, dropna=True):
+    """Calcula a média de ``medidas`` agrupando o cubo por ``dimensoes``.
+
+    O resultado equivale a ``df.groupby(dimensoes)[medidas].mean()`` sobre os
+    dados por candidato: grupos com chave nula são descartados (a menos que
+    ``dropna=False``) e cada média considera apenas as notas não nulas. Com
+    ``desvio_padrao=True`` inclui as colunas ``DP_<medida>`` (desvio padrão
+    amostral). Sem ``dimensoes``, retorna uma única linha com o total.
+    """
+    if isinstance(dimensoes, str):
+        dimensoes = [dimensoes]
+    if medidas is None:
+        medidas = _medidas(cubo)
+
+    colunas = [prefixo + col for col in medidas for prefixo in ('N_', 'SOMA_', 'SOMA2_')]
+    if dimensoes:
+        somas = cubo.groupby(dimensoes, observed=True, dropna=dropna)[colunas].sum()
+    else:
+        somas = cubo[colunas].sum().to_frame().T.astype(cubo[colunas].dtypes.to_dict())
+
+    resultado = pd.DataFrame(index=somas.index)
+    for col in medidas:
+        n = somas['N_' + col]
+        resultado[col] = somas['SOMA_' + col] / n.where(n > 0)
+        if desvio_padrao:
+            variancia = (somas['SOMA2_' + col] - n * resultado[col] ** 2) / (n - 1).where(n > 1)
+            resultado['DP_' + col] = np.sqrt(variancia.clip(lower=0))
+        resultado['N_' + col] = n
+    return resultado.reset_index(drop=not dimensoes)
+
+
+def variacao_anual(cubo_anos, dimensoes, medidas=None):
+    """Média de ``medidas`` por ``dimensoes`` em cada edição e a variação em relação à edição anterior.
+
+    ``cubo_anos`` reúne os cubos de várias edições, identificadas pela coluna
+    NU_ANO (como os lidos das partições de pipeline_enem.particoes). Para cada
+    grupo, ``DELTA_<medida>`` é a diferença para a edição anterior em que o
+    grupo aparece (``NU_ANO_ANTERIOR``); na primeira edição do grupo, é nula.
+    """
+    if isinstance(dimensoes, str):
+        dimensoes = [dimensoes]
+    medias = agregar_cubo(cubo_anos, dimensoes + ['NU_ANO'], medidas)
+    medias = medias.sort_values(dimensoes + ['NU_ANO'], ignore_index=True)
+    grupos = medias.groupby(dimensoes, observed=True, sort=False)
+    medias['NU_ANO_ANTERIOR'] = grupos['NU_ANO'].shift().astype('Int16')
+    for col in medidas or _medidas(cubo_anos):
+        medias['DELTA_' + col] = grupos[col].diff()
+    return medias
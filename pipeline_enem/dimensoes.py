@@ -0,0 +1,153 @@
+"""Enriquecimento do ENEM com as tabelas de municípios e de escolas.
+
+Substitui os ``pd.merge`` por consultas posicionais: cada tabela de dimensão é
+indexada uma vez pela sua chave, as chaves do ENEM são convertidas em posições
+(``get_indexer``) e apenas as colunas pedidas são trazidas com ``take``. Assim
+não se cria a cópia larga da tabela do ENEM que cada merge produzia, e as
+colunas repetidas (nome do município, UF, códigos) deixam de ser duplicadas.
+"""
+import pandas as pd
+from pandas.api.extensions import take
+
+# Colunas de cada dimensão anexadas por padrão ao ENEM (sem as que repetem
+# informação já presente nele, como nome do município, UF e as próprias chaves)
+COLUNAS_MUNICIPIOS = [
+    'IDH', 'PIB_PER_CAPITA', 'POPULACAO', 'TAXA_ANALFABETISMO', 'TAXA_ESCOLARIZACAO', 'CATEGORIA_IDH'
+]
+COLUNAS_ESCOLAS = [
+    'NO_ENTIDADE', 'TP_DEPENDENCIA', 'IN_BIBLIOTECA', 'IN_LABORATORIO_INFORMATICA',
+    'IN_LABORATORIO_CIENCIAS', 'IN_QUADRA_ESPORTES', 'IN_SALA_ATENDIMENTO_ESPECIAL', 'IN_INTERNET',
+    'NU_MATRICULAS', 'NIVEL_INFRAESTRUTURA', 'CATEGORIA_INFRAESTRUTURA'
+]
+
+TAMANHO_BLOCO_ENRIQUECIMENTO = 500_000
+
+# Quantas chaves sem correspondência são guardadas como exemplo no relatório
+EXEMPLOS_NAO_ENCONTRADOS = 10
+
+
+class Dimensao:
+    """Tabela de dimensão indexada pela chave, para consultas posicionais."""
+
+    def __init__(self, df, chave, colunas, nome=None, chave_fato=None):
+        self.nome = nome or chave
+        self.chave = chave
+        self.chave_fato = chave_fato
+        self.colunas = [col for col in colunas if col in df.columns]
+
+        self.duplicadas = int(df[chave].duplicated().sum())
+        if self.duplicadas:
+            # Como no merge, uma chave deve identificar uma única linha; mantém-se a primeira
+            df = df.drop_duplicates(chave, keep='first')
+
+        self.indice = pd.Index(df[chave])
+        # Colunas de tipo numpy ficam como ndarray (take converte para float ao preencher nulos);
+        # categóricas e textos mantêm o seu tipo
+        self.valores = {
+            col: df[col].array if isinstance(df[col].dtype, pd.api.extensions.ExtensionDtype) else df[col].to_numpy()
+            for col in self.colunas
+        }
+
+        self.zerar_estatisticas()
+
+    def posicoes(self, chaves):
+        """Posição de cada chave na dimensão (-1 quando não há correspondência)."""
+        if isinstance(chaves.dtype, pd.CategoricalDtype):
+            # Resolve só as categorias distintas e propaga pelos códigos
+            por_categoria = self.indice.get_indexer(chaves.cat.categories)
+            codigos = chaves.cat.codes.to_numpy()
+            posicoes = por_categoria.take(codigos)
+            posicoes[codigos == -1] = -1
+        else:
+            posicoes = self.indice.get_indexer(chaves)
+
+        nulas = chaves.isna().to_numpy()
+        faltantes = (posicoes == -1) & ~nulas
+        self.consultadas += len(chaves)
+        self.nulas += int(nulas.sum())
+        self.nao_encontradas += int(faltantes.sum())
+        if faltantes.any() and len(self.exemplos_nao_encontrados) < EXEMPLOS_NAO_ENCONTRADOS:
+            exemplos = pd.unique(chaves[faltantes])[:EXEMPLOS_NAO_ENCONTRADOS]
+            self.exemplos_nao_encontrados.update(exemplos.tolist())
+        return posicoes
+
+    def buscar(self, chaves, colunas=None):
+        """Retorna as ``colunas`` da dimensão alinhadas às ``chaves`` (nulos quando não encontradas)."""
+        colunas = self.colunas if colunas is None else colunas
+        posicoes = self.posicoes(chaves)
+        return pd.DataFrame(
+            {col: take(self.valores[col], posicoes, allow_fill=True) for col in colunas},
+            index=chaves.index
+        )
+
+    def estatisticas(self):
+        """Contadores das consultas, para somar os de processos diferentes com ``acumular``."""
+        return {
+            'consultadas': self.consultadas,
+            'nulas': self.nulas,
+            'nao_encontradas': self.nao_encontradas,
+            'exemplos_nao_encontrados': set(self.exemplos_nao_encontrados),
+        }
+
+    def zerar_estatisticas(self):
+        self.consultadas = 0
+        self.nulas = 0
+        self.nao_encontradas = 0
+        self.exemplos_nao_encontrados = set()
+
+    def acumular(self, estatisticas):
+        self.consultadas += estatisticas['consultadas']
+        self.nulas += estatisticas['nulas']
+        self.nao_encontradas += estatisticas['nao_encontradas']
+        faltam = EXEMPLOS_NAO_ENCONTRADOS - len(self.exemplos_nao_encontrados)
+        self.exemplos_nao_encontrados.update(sorted(estatisticas['exemplos_nao_encontrados'], key=str)[:max(faltam, 0)])
+
+    def relatorio(self):
+        print(f"{self.nome}: {self.consultadas} consultas, {self.nao_encontradas} chaves sem correspondência, "
+              f"{self.nulas} chaves nulas")
+        if self.duplicadas:
+            print(f"  {self.duplicadas} chaves duplicadas na dimensão (mantida a primeira ocorrência)")
+        if self.exemplos_nao_encontrados:
+            exemplos = sorted(map(str, self.exemplos_nao_encontrados))[:EXEMPLOS_NAO_ENCONTRADOS]
+            print(f"  Exemplos sem correspondência: {', '.join(exemplos)}")
+
+
+def dimensao_municipios(municipios_df, colunas=None):
+    """Indicadores municipais indexados pelo código IBGE (por padrão, ``COLUNAS_MUNICIPIOS``)."""
+    return Dimensao(municipios_df, 'CODIGO_IBGE', colunas or COLUNAS_MUNICIPIOS,
+                    nome='Municípios', chave_fato='CO_MUNICIPIO_RESIDENCIA')
+
+
+def dimensao_escolas(censo_escolar_df, colunas=None):
+    """Escolas do Censo Escolar indexadas pelo código da entidade (por padrão, ``COLUNAS_ESCOLAS``)."""
+    return Dimensao(censo_escolar_df, 'CO_ENTIDADE', colunas or COLUNAS_ESCOLAS,
+                    nome='Escolas', chave_fato='CO_ESCOLA')
+
+
+def enriquecer(fato_df, dimensoes, colunas=None):
+    """Anexa a ``fato_df`` as colunas de cada dimensão (equivalente a um left join).
+
+    ``colunas`` restringe as colunas anexadas; por padrão todas as de cada dimensão.
+    Dimensões cuja chave não existe em ``fato_df`` são ignoradas.
+    """
+    anexos = {}
+    for dimensao in dimensoes:
+        if dimensao.chave_fato not in fato_df.columns:
+            continue
+        pedidas = [col for col in dimensao.colunas if colunas is None or col in colunas]
+        if not pedidas:
+            continue
+        repetidas = [col for col in pedidas if col in fato_df.columns or col in anexos]
+        if repetidas:
+            raise ValueError(f"Colunas já existentes no ENEM: {', '.join(repetidas)}")
+        anexos.update(dimensao.buscar(fato_df[dimensao.chave_fato], pedidas).items())
+    return fato_df.assign(**anexos)
+
+
+def enriquecer_em_blocos(fato_df, dimensoes, colunas=None, tamanho_bloco=TAMANHO_BLOCO_ENRIQUECIMENTO):
+    """Gera ``fato_df`` enriquecido em blocos de linhas, sem montar a tabela larga inteira.
+
+    Sem linhas, gera um único bloco vazio, com as colunas da tabela larga.
+    """
+    for inicio in range(0, max(len(fato_df), 1), tamanho_bloco):
+        yield enriquecer(fato_df.iloc[inicio:inicio + tamanho_bloco], dimensoes, colunas)
@@ -0,0 +1,128 @@
+"""Esquemas (tipos de coluna) dos conjuntos de dados tratados.
+
+Os tipos compactos (categóricos, inteiros pequenos e notas em float32) reduzem
+o uso de memória e são preservados no armazenamento em Parquet.
+"""
+import pandas as pd
+
+from pipeline_enem.tratamento import LABELS_IDADE, LABELS_IDH, LABELS_INFRAESTRUTURA, LABELS_PRESENCA
+
+UFS = [
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO'
+]
+
+TIPO_UF = pd.CategoricalDtype(UFS)
+TIPO_FAIXA_ETARIA = pd.CategoricalDtype(LABELS_IDADE, ordered=True)
+TIPO_CATEGORIA_IDH = pd.CategoricalDtype(LABELS_IDH, ordered=True)
+TIPO_CATEGORIA_INFRAESTRUTURA = pd.CategoricalDtype(LABELS_INFRAESTRUTURA, ordered=True)
+TIPO_PRESENCA_PROVAS = pd.CategoricalDtype(LABELS_PRESENCA)
+
+ESQUEMA_ENEM = {
+    'NU_INSCRICAO': 'int64',
+    # Ano da edição, só nas partições por ano (ver pipeline_enem.particoes)
+    'NU_ANO': 'int16',
+    'TP_SEXO': 'category',
+    'NU_IDADE': 'int8',
+    'CO_MUNICIPIO_RESIDENCIA': 'int32',
+    'NO_MUNICIPIO_RESIDENCIA': 'category',
+    'SG_UF_RESIDENCIA': TIPO_UF,
+    'TP_ESCOLA': 'int8',
+    'TP_ENSINO': 'int8',
+    'IN_TREINEIRO': 'int8',
+    'CO_ESCOLA': 'category',
+    'NU_NOTA_CN': 'float32',
+    'NU_NOTA_CH': 'float32',
+    'NU_NOTA_LC': 'float32',
+    'NU_NOTA_MT': 'float32',
+    'NU_NOTA_REDACAO': 'float32',
+    'PRESENCA': 'uint8',
+    'QTD_AREAS': 'int8',
+    'MEDIA_NOTAS': 'float32',
+    'FAIXA_ETARIA': TIPO_FAIXA_ETARIA,
+}
+
+ESQUEMA_CENSO = {
+    'CO_ENTIDADE': 'category',
+    'NO_ENTIDADE': 'string',
+    'CO_MUNICIPIO': 'int32',
+    'NO_MUNICIPIO': 'category',
+    'SG_UF': TIPO_UF,
+    'TP_DEPENDENCIA': 'int8',
+    'IN_ENSINO_MEDIO': 'int8',
+    'IN_BIBLIOTECA': 'int8',
+    'IN_LABORATORIO_INFORMATICA': 'int8',
+    'IN_LABORATORIO_CIENCIAS': 'int8',
+    'IN_QUADRA_ESPORTES': 'int8',
+    'IN_SALA_ATENDIMENTO_ESPECIAL': 'int8',
+    'IN_INTERNET': 'int8',
+    'NU_MATRICULAS': 'int32',
+    'NIVEL_INFRAESTRUTURA': 'int8',
+    'CATEGORIA_INFRAESTRUTURA': TIPO_CATEGORIA_INFRAESTRUTURA,
+}
+
+ESQUEMA_MUNICIPIOS = {
+    'CODIGO_IBGE': 'int32',
+    'NOME_MUNICIPIO': 'string',
+    'UF': TIPO_UF,
+    'IDH': 'float32',
+    'PIB_PER_CAPITA': 'float32',
+    'POPULACAO': 'int32',
+    'TAXA_ANALFABETISMO': 'float32',
+    'TAXA_ESCOLARIZACAO': 'float32',
+    'CATEGORIA_IDH': TIPO_CATEGORIA_IDH,
+}
+
+# Dimensões do cubo de agregados; as contagens e somas ficam em int64/float64
+ESQUEMA_CUBO = {
+    'NU_ANO': 'int16',
+    'SG_UF_RESIDENCIA': TIPO_UF,
+    'TP_ESCOLA': 'int8',
+    'FAIXA_ETARIA': TIPO_FAIXA_ETARIA,
+    'TP_SEXO': 'category',
+    'CATEGORIA_IDH': TIPO_CATEGORIA_IDH,
+    'CATEGORIA_INFRAESTRUTURA': TIPO_CATEGORIA_INFRAESTRUTURA,
+    'PRESENCA_PROVAS': TIPO_PRESENCA_PROVAS,
+}
+
+ESQUEMAS = {
+    'enem_tratado': ESQUEMA_ENEM,
+    'censo_escolar_tratado': ESQUEMA_CENSO,
+    'municipios_tratado': ESQUEMA_MUNICIPIOS,
+    'dados_completos': {**ESQUEMA_ENEM, **ESQUEMA_MUNICIPIOS, **ESQUEMA_CENSO},
+    'cubo_enem': ESQUEMA_CUBO,
+    # Resumos por escola e por município (ver pipeline_enem.resumos); as somas ficam em int64/float64
+    'resumo_escolas': {'CO_ESCOLA': 'category', **ESQUEMA_CENSO},
+    'resumo_municipios': {'CO_MUNICIPIO_RESIDENCIA': 'int32', **ESQUEMA_MUNICIPIOS},
+    # Linhas do ENEM retiradas pela validação (ver pipeline_enem.validacao), com chaves
+    # que podem faltar e idades fora dos limites que não cabem em int8
+    'quarentena_enem': {**ESQUEMA_ENEM, 'NU_INSCRICAO': 'Int64', 'CO_MUNICIPIO_RESIDENCIA': 'Int32',
+                        'NU_IDADE': 'float32', 'VIOLACOES': 'category', 'COLUNAS_INVALIDAS': 'string'},
+}
+
+# Versões que aceitam nulos dos inteiros, usadas quando a coluna tem valores ausentes
+# (por exemplo, as colunas do Censo depois do left join com o ENEM)
+_INTEIROS_NULAVEIS = {'int8': 'Int8', 'int32': 'Int32', 'int64': 'Int64'}
+
+
+def _converter(coluna, tipo):
+    if isinstance(tipo, pd.CategoricalDtype) and tipo.categories is not None:
+        # Valores fora das categorias previstas são mantidos em vez de virarem nulos
+        desconhecidos = pd.Index(coluna.dropna().unique()).difference(tipo.categories)
+        if len(desconhecidos):
+            tipo = pd.CategoricalDtype(list(tipo.categories) + list(desconhecidos), ordered=tipo.ordered)
+    elif tipo in _INTEIROS_NULAVEIS and coluna.isna().any():
+        tipo = _INTEIROS_NULAVEIS[tipo]
+    return coluna.astype(tipo)
+
+
+def aplicar_esquema(df, nome):
+    """Converte as colunas de ``df`` para os tipos do esquema ``nome``.
+
+    Colunas fora do esquema são mantidas como estão.
+    """
+    esquema = ESQUEMAS[nome]
+    for col in df.columns:
+        if col in esquema and df[col].dtype != esquema[col]:
+            df[col] = _converter(df[col], esquema[col])
+    return df
@@ -0,0 +1,269 @@
+"""Acumuladores de estatísticas alimentados bloco a bloco.
+
+Cada acumulador guarda apenas um resumo de tamanho fixo (momentos, contagens
+por faixa, uma amostra limitada), pode receber os dados em blocos de qualquer
+tamanho e pode ser combinado com outro acumulador do mesmo tipo (por exemplo,
+vindo de outro processo). O uso de memória depende do número de faixas (ou do
+tamanho da amostra), não do número de linhas. Valores nulos são ignorados.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _como_matriz(valores):
+    matriz = np.asarray(valores, dtype='float64')
+    return matriz[:, None] if matriz.ndim == 1 else matriz
+
+
+class Momentos:
+    """Contagem, média, variância, mínimo e máximo de ``k`` colunas (Welford/Chan)."""
+
+    def __init__(self, k=1):
+        self.n = np.zeros(k)
+        self.media = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.minimo = np.full(k, np.inf)
+        self.maximo = np.full(k, -np.inf)
+
+    def atualizar(self, valores):
+        x = _como_matriz(valores)
+        presentes = ~np.isnan(x)
+        n = presentes.sum(axis=0).astype('float64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.where(n > 0, np.nansum(x, axis=0) / n, 0.0)
+            m2 = np.nansum((x - media) ** 2, axis=0)
+        minimo = np.min(np.where(presentes, x, np.inf), axis=0, initial=np.inf)
+        maximo = np.max(np.where(presentes, x, -np.inf), axis=0, initial=-np.inf)
+        self._combinar(n, media, m2, minimo, maximo)
+
+    def combinar(self, outro):
+        self._combinar(outro.n, outro.media, outro.m2, outro.minimo, outro.maximo)
+
+    def _combinar(self, n, media, m2, minimo, maximo):
+        total = self.n + n
+        delta = media - self.media
+        with np.errstate(invalid='ignore', divide='ignore'):
+            peso = np.where(total > 0, n / total, 0.0)
+            self.m2 = self.m2 + m2 + np.where(total > 0, delta ** 2 * self.n * n / total, 0.0)
+        self.media = self.media + delta * peso
+        self.n = total
+        self.minimo = np.minimum(self.minimo, minimo)
+        self.maximo = np.maximum(self.maximo, maximo)
+
+    @property
+    def variancia(self):
+        """Variância amostral (ddof=1), nula onde há menos de dois valores."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+    @property
+    def desvio_padrao(self):
+        return np.sqrt(self.variancia)
+
+
+class CoMomentos:
+    """Matriz de correlação de Pearson de ``k`` colunas, com observações completas por par.
+
+    Guarda somas por par de colunas (considerando só as linhas em que as duas
+    estão presentes, como ``DataFrame.corr``). ``deslocamento`` é subtraído
+    dos valores antes das somas para reduzir o erro de cancelamento; deve ser
+    próximo da média dos dados e igual nos acumuladores que serão combinados.
+    """
+
+    def __init__(self, k, deslocamento=0.0):
+        self.deslocamento = deslocamento
+        self.n = np.zeros((k, k))
+        self.soma = np.zeros((k, k))
+        self.soma_quadrados = np.zeros((k, k))
+        self.soma_produtos = np.zeros((k, k))
+
+    def atualizar(self, valores):
+        x = _como_matriz(valores) - self.deslocamento
+        presentes = (~np.isnan(x)).astype('float64')
+        x = np.nan_to_num(x)
+        self.n += presentes.T @ presentes
+        # soma[i, j]: soma da coluna i nas linhas em que a coluna j também está presente
+        self.soma += x.T @ presentes
+        self.soma_quadrados += (x ** 2).T @ presentes
+        self.soma_produtos += x.T @ x
+
+    def combinar(self, outro):
+        if outro.deslocamento != self.deslocamento:
+            raise ValueError("Só é possível combinar co-momentos com o mesmo deslocamento")
+        self.n += outro.n
+        self.soma += outro.soma
+        self.soma_quadrados += outro.soma_quadrados
+        self.soma_produtos += outro.soma_produtos
+
+    def correlacao(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariancia = self.n * self.soma_produtos - self.soma * self.soma.T
+            variancia = self.n * self.soma_quadrados - self.soma ** 2
+            return covariancia / np.sqrt(variancia * variancia.T)
+
+
+class Histograma:
+    """Contagens em faixas fixas, com quantis aproximados.
+
+    Os quantis são interpolados dentro da faixa, então o erro é no máximo a
+    largura de uma faixa. Valores fora de ``bordas`` são contados à parte.
+    """
+
+    def __init__(self, bordas):
+        self.bordas = np.asarray(bordas, dtype='float64')
+        self.contagens = np.zeros(len(self.bordas) - 1, dtype='int64')
+        self.abaixo = 0
+        self.acima = 0
+        self.momentos = Momentos()
+
+    def atualizar(self, valores):
+        x = np.asarray(valores, dtype='float64')
+        x = x[~np.isnan(x)]
+        self.contagens += np.histogram(x, self.bordas)[0]
+        self.abaixo += int((x < self.bordas[0]).sum())
+        self.acima += int((x > self.bordas[-1]).sum())
+        self.momentos.atualizar(x)
+
+    def combinar(self, outro):
+        self.contagens += outro.contagens
+        self.abaixo += outro.abaixo
+        self.acima += outro.acima
+        self.momentos.combinar(outro.momentos)
+
+    @property
+    def n(self):
+        return int(self.momentos.n[0])
+
+    @property
+    def centros(self):
+        return (self.bordas[:-1] + self.bordas[1:]) / 2
+
+    def quantil(self, q):
+        """Quantil ``q`` (0 a 1) aproximado pelas contagens."""
+        acumulado = np.concatenate([[self.abaixo], self.abaixo + np.cumsum(self.contagens)])
+        alvo = q * self.n
+        return float(np.interp(alvo, acumulado, self.bordas))
+
+    def reagrupado(self, fator):
+        """Bordas e contagens com cada ``fator`` faixas consecutivas somadas (para exibição)."""
+        n_faixas = len(self.contagens) // fator * fator
+        contagens = self.contagens[:n_faixas].reshape(-1, fator).sum(axis=1)
+        contagens[-1] += self.contagens[n_faixas:].sum()
+        bordas = np.append(self.bordas[:n_faixas:fator], self.bordas[-1])
+        return bordas, contagens
+
+    def densidade_suavizada(self):
+        """Curva de densidade (em contagens por faixa) por suavização gaussiana das contagens.
+
+        Aproxima a KDE do seaborn com a largura de banda de Scott (em uma dimensão,
+        desvio padrão amostral x n^(-1/5), como no scipy), sem revisitar os dados.
+        """
+        if self.n < 2:
+            return np.zeros_like(self.contagens, dtype='float64')
+        largura_faixa = self.bordas[1] - self.bordas[0]
+        banda = self.momentos.desvio_padrao[0] * self.n ** (-1 / 5)
+        sigma = max(banda / largura_faixa, 1e-6)
+        raio = int(np.ceil(4 * sigma))
+        nucleo = np.exp(-0.5 * (np.arange(-raio, raio + 1) / sigma) ** 2)
+        nucleo /= nucleo.sum()
+        preenchido = np.pad(self.contagens.astype('float64'), raio)
+        return np.convolve(preenchido, nucleo, mode='same')[raio:-raio]
+
+    def estatisticas_boxplot(self, rotulo=None):
+        """Dicionário no formato de ``Axes.bxp`` (sem pontos discrepantes).
+
+        Os bigodes vão até o valor mais extremo dentro de 1,5 x IQR, aproximado
+        pela borda da última faixa ocupada nesse intervalo.
+        """
+        q1, mediana, q3 = (self.quantil(q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        ocupadas = self.contagens > 0
+        inferior = self.bordas[:-1][ocupadas & (self.bordas[:-1] >= q1 - 1.5 * iqr)]
+        superior = self.bordas[1:][ocupadas & (self.bordas[1:] <= q3 + 1.5 * iqr)]
+        return {
+            'label': rotulo,
+            'q1': q1,
+            'med': mediana,
+            'q3': q3,
+            'whislo': max(inferior.min() if len(inferior) else q1, self.momentos.minimo[0]),
+            'whishi': min(superior.max() if len(superior) else q3, self.momentos.maximo[0]),
+            'fliers': [],
+        }
+
+
+class PorGrupo:
+    """Um acumulador por valor de uma coluna de agrupamento."""
+
+    def __init__(self, fabrica):
+        self.fabrica = fabrica
+        self.grupos = {}
+
+    def atualizar(self, chaves, valores):
+        chaves = pd.Series(chaves).reset_index(drop=True)
+        valores = np.asarray(valores)
+        for grupo, posicoes in chaves.groupby(chaves, observed=True, sort=False).indices.items():
+            if grupo not in self.grupos:
+                self.grupos[grupo] = self.fabrica()
+            self.grupos[grupo].atualizar(valores[posicoes])
+
+    def combinar(self, outro):
+        for grupo, acumulador in outro.grupos.items():
+            if grupo in self.grupos:
+                self.grupos[grupo].combinar(acumulador)
+            else:
+                self.grupos[grupo] = acumulador
+
+
+class AmostraEstratificada:
+    """Amostra das linhas de cada grupo, uniforme dentro do grupo, que preserva os extremos de ``coluna``.
+
+    Cada linha recebe uma chave aleatória, e cada grupo guarda as ``orcamento``
+    linhas de menor chave (uma amostra uniforme do grupo, qualquer que seja a
+    divisão em blocos) e as linhas de menor e maior ``coluna``. ``amostra``
+    divide o orçamento entre os grupos em proporção ao tamanho de cada um, de
+    modo que a memória e o resultado dependem do orçamento, não do número de linhas.
+    """
+
+    def __init__(self, orcamento, coluna, semente=0):
+        self.orcamento = orcamento
+        self.coluna = coluna
+        self.rng = np.random.default_rng(semente)
+        self.n = {}
+        self.linhas = {}
+
+    def _guardar(self, grupo, n, linhas):
+        anteriores = self.linhas.get(grupo)
+        if anteriores is not None:
+            linhas = pd.concat([anteriores, linhas], ignore_index=True)
+        self.n[grupo] = self.n.get(grupo, 0) + n
+        self.linhas[grupo] = self._reduzir(linhas, self.orcamento)
+
+    def _reduzir(self, linhas, k):
+        valores = linhas[self.coluna]
+        partes = [linhas.nsmallest(k, '_CHAVE_AMOSTRA')]
+        if valores.notna().any():
+            partes.insert(0, linhas.loc[[valores.idxmin(), valores.idxmax()]])
+        return pd.concat(partes).drop_duplicates('_CHAVE_AMOSTRA').reset_index(drop=True)
+
+    def atualizar(self, bloco, chaves):
+        bloco = bloco.reset_index(drop=True).assign(_CHAVE_AMOSTRA=self.rng.random(len(bloco)))
+        chaves = pd.Series(chaves).reset_index(drop=True)
+        for grupo, posicoes in chaves.groupby(chaves, observed=True, sort=False).indices.items():
+            self._guardar(grupo, len(posicoes), bloco.take(posicoes))
+
+    def combinar(self, outro):
+        for grupo, linhas in outro.linhas.items():
+            self._guardar(grupo, outro.n[grupo], linhas)
+
+    @property
+    def total(self):
+        return sum(self.n.values())
+
+    def amostra(self):
+        """Cerca de ``orcamento`` linhas no total, mais os extremos de cada grupo, na ordem das chaves."""
+        if not self.linhas:
+            return pd.DataFrame()
+        partes = [self._reduzir(linhas, max(1, int(self.orcamento * self.n[grupo] / self.total)))
+                  for grupo, linhas in self.linhas.items()]
+        return (pd.concat(partes, ignore_index=True).sort_values('_CHAVE_AMOSTRA')
+                .drop(columns='_CHAVE_AMOSTRA').reset_index(drop=True))
@@ -0,0 +1,95 @@
+"""Estatísticas das análises exploratórias, acumuladas bloco a bloco.
+
+Reúne, em uma única passada pelo ENEM tratado, tudo o que os gráficos da
+seção 8 precisam dos candidatos: histogramas das notas, quantis por sexo,
+matriz de correlação e médias por faixa etária (a relação entre IDH e média
+usa o resumo por município, ver pipeline_enem.resumos). Nenhum bloco é
+guardado, então o ENEM não precisa caber em memória. As notas ausentes (de
+quem faltou à prova) ficam fora de todas as estatísticas; a quantidade de
+candidatos por número de áreas feitas é contada à parte.
+"""
+import numpy as np
+import pandas as pd
+
+from .estatisticas import CoMomentos, Histograma, Momentos, PorGrupo
+from .tratamento import AREAS_COLS, COLS_ENEM
+
+NOTAS_COLS = [col for col in COLS_ENEM if 'NOTA' in col]
+
+# Faixas de 2 pontos na escala de 0 a 1000 das notas: os quantis dos boxplots
+# têm erro de no máximo 2 pontos, e os histogramas são exibidos com faixas de 20
+BORDAS_NOTAS = np.arange(0, 1002, 2)
+FATOR_EXIBICAO = 10
+
+TAMANHO_BLOCO_ANALISES = 500_000
+
+# Próximo da média das notas; reduz o erro de cancelamento das somas de produtos
+DESLOCAMENTO_NOTAS = 500.0
+
+
+class EstatisticasExploratorias:
+    """Acumula as estatísticas dos gráficos exploratórios a partir de blocos do ENEM tratado."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.colunas = set()
+        self.histogramas = {col: Histograma(BORDAS_NOTAS) for col in NOTAS_COLS + ['MEDIA_NOTAS']}
+        self.correlacao = CoMomentos(len(NOTAS_COLS), DESLOCAMENTO_NOTAS)
+        self.media_por_sexo = PorGrupo(lambda: Histograma(BORDAS_NOTAS))
+        self.media_por_faixa_etaria = PorGrupo(Momentos)
+        self.areas_feitas = np.zeros(len(AREAS_COLS) + 1, dtype='int64')
+
+    def atualizar(self, bloco):
+        self.linhas += len(bloco)
+        self.colunas.update(bloco.columns)
+
+        for col, histograma in self.histogramas.items():
+            if col in bloco.columns:
+                histograma.atualizar(bloco[col])
+
+        if 'QTD_AREAS' in bloco.columns:
+            self.areas_feitas += np.bincount(bloco['QTD_AREAS'].to_numpy(dtype='int64'), minlength=len(AREAS_COLS) + 1)
+
+        if all(col in bloco.columns for col in NOTAS_COLS):
+            notas = bloco[NOTAS_COLS].to_numpy(dtype='float64', na_value=np.nan)
+            self.correlacao.atualizar(notas)
+
+        if 'MEDIA_NOTAS' not in bloco.columns:
+            return
+        media = bloco['MEDIA_NOTAS'].to_numpy(dtype='float64', na_value=np.nan)
+        if 'TP_SEXO' in bloco.columns:
+            self.media_por_sexo.atualizar(bloco['TP_SEXO'], media)
+        if 'FAIXA_ETARIA' in bloco.columns:
+            self.media_por_faixa_etaria.atualizar(bloco['FAIXA_ETARIA'], media)
+
+    def combinar(self, outro):
+        self.linhas += outro.linhas
+        self.colunas.update(outro.colunas)
+        for col, histograma in self.histogramas.items():
+            histograma.combinar(outro.histogramas[col])
+        self.correlacao.combinar(outro.correlacao)
+        self.media_por_sexo.combinar(outro.media_por_sexo)
+        self.media_por_faixa_etaria.combinar(outro.media_por_faixa_etaria)
+        self.areas_feitas += outro.areas_feitas
+
+    def possui(self, *colunas):
+        return all(col in self.colunas for col in colunas)
+
+    def descricao(self):
+        """Tabela no formato de ``describe()`` para as notas, com quartis aproximados."""
+        linhas = {}
+        for col, histograma in self.histogramas.items():
+            if histograma.n == 0:
+                continue
+            momentos = histograma.momentos
+            linhas[col] = {
+                'count': histograma.n,
+                'mean': momentos.media[0],
+                'std': momentos.desvio_padrao[0],
+                'min': momentos.minimo[0],
+                '25%': histograma.quantil(0.25),
+                '50%': histograma.quantil(0.5),
+                '75%': histograma.quantil(0.75),
+                'max': momentos.maximo[0],
+            }
+        return pd.DataFrame(linhas)
@@ -0,0 +1,110 @@
+"""Renderização dos gráficos em lote: cache de figuras e processos paralelos.
+
+Cada gráfico é descrito por uma ``Figura``: a função que o desenha, os dados já
+agregados de que ela precisa (histogramas, médias, contagens) e o arquivo de
+saída. A chave da figura combina o hash desses dados, o do código da função de
+desenho e o caminho; se for a mesma da última execução e o arquivo ainda
+existir, o gráfico não é desenhado de novo (o registro das chaves é o de
+pipeline_enem.cache_etapas, em ``ARQUIVO_CACHE_GRAFICOS``).
+
+As figuras restantes são desenhadas em um pool de processos, cada um com o
+backend Agg do matplotlib (sem janela), ou no próprio processo quando há um
+único processador ou uma única figura. Depois de cada gráfico, as figuras
+abertas pelo pyplot são fechadas, mesmo que o desenho falhe, então a memória
+não cresce de um gráfico para o outro. As medições de cada processo voltam
+para o relatório de pipeline_enem.instrumentacao.
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_enem.cache_etapas import CacheEtapas, impressao_codigo, impressao_dados
+from pipeline_enem.instrumentacao import etapa, incorporar, medicoes, reiniciar
+
+ARQUIVO_CACHE_GRAFICOS = os.path.join('dados_tratados', '.cache_graficos.json')
+
+
+class Figura:
+    """Gráfico a desenhar: ``desenhar(dados, caminho)`` grava em ``caminho`` a figura feita com ``dados``.
+
+    ``desenhar`` precisa ser uma função de módulo e ``dados`` serializável,
+    para que a figura possa ser desenhada em outro processo.
+    """
+
+    def __init__(self, nome, desenhar, dados, caminho):
+        self.nome = nome
+        self.desenhar = desenhar
+        self.dados = dados
+        self.caminho = caminho
+
+    def chave(self):
+        return CacheEtapas.chave(self.nome, impressao_codigo(self.desenhar), impressao_dados(self.dados),
+                                 self.caminho)
+
+
+def usar_backend_agg():
+    """Seleciona o backend Agg, sem janela, antes de o pyplot ser importado."""
+    import matplotlib
+
+    matplotlib.use('Agg')
+
+
+def _fechar_figuras():
+    # Só fecha se o pyplot já foi importado (os gráficos do plotly não o usam)
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    if pyplot is not None:
+        pyplot.close('all')
+
+
+def _desenhar(figura):
+    """Desenha ``figura`` e retorna as medições feitas (para vir de outro processo)."""
+    anteriores = len(medicoes())
+    with etapa(figura.nome):
+        try:
+            figura.desenhar(figura.dados, figura.caminho)
+        finally:
+            _fechar_figuras()
+    return [medicao.como_dict() for medicao in medicoes()[anteriores:]]
+
+
+def _inicializar():
+    # As etapas abertas no processo principal não valem nos processos do pool
+    reiniciar()
+    usar_backend_agg()
+
+
+def processos_padrao(figuras):
+    return max(1, min(os.cpu_count() or 1, len(figuras)))
+
+
+def renderizar(figuras, processos=None, cache=True, arquivo_cache=ARQUIVO_CACHE_GRAFICOS):
+    """Desenha as ``figuras`` que mudaram desde a última execução, com até ``processos`` processos.
+
+    Com ``cache=False`` todas são desenhadas. Retorna os nomes das figuras
+    desenhadas e das reaproveitadas.
+    """
+    registro = CacheEtapas(arquivo_cache, ativo=cache)
+    pendentes = []
+    with etapa('chaves_graficos'):
+        for figura in figuras:
+            chave = figura.chave()
+            if not registro.reaproveitavel(figura.nome, chave, [figura.caminho]):
+                pendentes.append((figura, chave))
+    if registro.reaproveitadas:
+        print(f"\nGráficos inalterados (não redesenhados): {', '.join(registro.reaproveitadas)}")
+
+    processos = processos_padrao(pendentes) if processos is None else max(1, min(processos, len(pendentes)))
+    with etapa('renderizar', linhas_entrada=len(pendentes)):
+        if processos == 1:
+            if pendentes:
+                usar_backend_agg()
+            resultados = map(_desenhar, [figura for figura, _ in pendentes])
+            for (figura, chave), _ in zip(pendentes, resultados):
+                registro.registrar(figura.nome, chave, [figura.caminho])
+        else:
+            with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar) as pool:
+                resultados = pool.map(_desenhar, [figura for figura, _ in pendentes])
+                for (figura, chave), medicoes_processo in zip(pendentes, resultados):
+                    incorporar(medicoes_processo)
+                    registro.registrar(figura.nome, chave, [figura.caminho])
+    return registro.executadas, registro.reaproveitadas
@@ -0,0 +1,184 @@
+"""Instrumentação das etapas do pipeline: tempo, CPU, memória e linhas.
+
+Cada trecho medido é envolvido em ``with etapa('nome', linhas_entrada=n) as medicao:``
+e pode informar ``medicao.linhas_saida``. As etapas podem ser aninhadas; o nome
+registrado inclui o das etapas externas (``tratar/enem/read_csv``). As medições
+ficam em memória até ``gravar_relatorio``, que as anexa a um arquivo JSON lines
+(uma linha por etapa, com o identificador da execução), permitindo comparar
+execuções; ``incorporar`` acrescenta as medições feitas em outros processos.
+``resumo`` monta a tabela por etapa. O pandas só é importado para
+montar a tabela, de modo que a medição não pesa no início da linha de comando.
+
+O pico de memória vem de ``resource.getrusage`` (indisponível no Windows, onde
+fica nulo): ``pico_delta_mb`` é quanto o pico do processo subiu durante a etapa,
+e ``rss_delta_mb`` a variação da memória residente entre o início e o fim.
+"""
+import itertools
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ARQUIVO_RELATORIO = os.path.join('dados_tratados', 'perfil_execucoes.jsonl')
+
+_medicoes = []
+_pilha = []
+_contador = itertools.count()
+
+
+def _rss_atual_mb():
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _pico_mb():
+    if resource is None:
+        return None
+    # ru_maxrss é informado em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _cpu_s():
+    # Inclui os processos filhos já encerrados (por exemplo, os do modo paralelo)
+    tempos = os.times()
+    return tempos.user + tempos.system + tempos.children_user + tempos.children_system
+
+
+def _diferenca(fim, inicio):
+    return None if fim is None or inicio is None else round(fim - inicio, 3)
+
+
+class Medicao:
+    """Resultado de uma etapa; ``linhas_saida`` pode ser preenchido dentro do bloco ``with``."""
+
+    def __init__(self, nome, linhas_entrada=None):
+        self.nome = nome
+        self.ordem = next(_contador)
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.parede_s = None
+        self.cpu_s = None
+        self.pico_delta_mb = None
+        self.rss_delta_mb = None
+
+    def como_dict(self):
+        return {
+            'etapa': self.nome,
+            'ordem': self.ordem,
+            'parede_s': self.parede_s,
+            'cpu_s': self.cpu_s,
+            'pico_delta_mb': self.pico_delta_mb,
+            'rss_delta_mb': self.rss_delta_mb,
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+        }
+
+
+@contextmanager
+def etapa(nome, linhas_entrada=None):
+    """Mede o bloco ``with`` como a etapa ``nome`` (aninhada nas etapas abertas)."""
+    medicao = Medicao('/'.join(_pilha + [nome]), linhas_entrada)
+    _pilha.append(nome)
+    pico, rss, cpu = _pico_mb(), _rss_atual_mb(), _cpu_s()
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    finally:
+        medicao.parede_s = round(time.perf_counter() - inicio, 4)
+        medicao.cpu_s = round(_cpu_s() - cpu, 4)
+        medicao.pico_delta_mb = _diferenca(_pico_mb(), pico)
+        medicao.rss_delta_mb = _diferenca(_rss_atual_mb(), rss)
+        _pilha.pop()
+        _medicoes.append(medicao)
+
+
+def medir_blocos(nome, blocos):
+    """Repassa os blocos de ``blocos``, medindo a produção de cada um como a etapa ``nome``.
+
+    Útil para geradores que leem e tratam um bloco a cada iteração: só o trabalho
+    do gerador é medido, não o que é feito com o bloco entre uma iteração e outra.
+    """
+    iterador = iter(blocos)
+    while True:
+        with etapa(nome) as medicao:
+            bloco = next(iterador, None)
+            if bloco is not None:
+                medicao.linhas_saida = len(bloco)
+        if bloco is None:
+            return
+        yield bloco
+
+
+def incorporar(registros):
+    """Registra medições feitas em outro processo (``Medicao.como_dict()``), aninhadas nas etapas abertas."""
+    for registro in registros:
+        medicao = Medicao('/'.join(_pilha + [registro['etapa']]), registro['linhas_entrada'])
+        for campo in ('linhas_saida', 'parede_s', 'cpu_s', 'pico_delta_mb', 'rss_delta_mb'):
+            setattr(medicao, campo, registro[campo])
+        _medicoes.append(medicao)
+
+
+def reiniciar():
+    """Descarta as medições e as etapas abertas, como as herdadas por um processo criado com fork."""
+    _medicoes.clear()
+    _pilha.clear()
+
+
+def medicoes():
+    """Medições registradas nesta execução, na ordem em que as etapas terminaram (internas primeiro)."""
+    return list(_medicoes)
+
+
+def resumo():
+    """Tabela com uma linha por etapa; etapas repetidas (como os blocos) são somadas."""
+    import pandas as pd
+
+    if not _medicoes:
+        return pd.DataFrame()
+    # Na ordem de início, para que cada etapa apareça antes das que contém
+    df = pd.DataFrame([medicao.como_dict() for medicao in _medicoes]).sort_values('ordem')
+    df[['linhas_entrada', 'linhas_saida']] = df[['linhas_entrada', 'linhas_saida']].astype('Int64')
+    return df.groupby('etapa', sort=False).agg(
+        vezes=('etapa', 'size'),
+        parede_s=('parede_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        pico_delta_mb=('pico_delta_mb', 'sum'),
+        linhas_entrada=('linhas_entrada', lambda valores: valores.sum(min_count=1)),
+        linhas_saida=('linhas_saida', lambda valores: valores.sum(min_count=1)),
+    )
+
+
+def imprimir_resumo():
+    import pandas as pd
+
+    print("\n===== Perfil da execução =====")
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.max_colwidth', None,
+                           'display.width', None, 'display.float_format', '{:.3f}'.format):
+        print(resumo())
+
+
+def gravar_relatorio(caminho=ARQUIVO_RELATORIO, comando=None):
+    """Anexa as medições desta execução a ``caminho`` (JSON lines) e limpa o registro."""
+    execucao = {
+        'execucao': uuid.uuid4().hex[:12],
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'comando': comando,
+    }
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        for medicao in _medicoes:
+            arquivo.write(json.dumps({**execucao, **medicao.como_dict()}, ensure_ascii=False) + '\n')
+    print(f"\nPerfil com {len(_medicoes)} etapas anexado a {caminho}")
+    _medicoes.clear()
@@ -0,0 +1,294 @@
+"""Leitura dos arquivos brutos com tipos declarados, só das colunas usadas e com cache.
+
+Cada fonte (ENEM, Censo Escolar e indicadores municipais) tem os tipos das
+colunas que o pipeline usa declarados em ``TIPOS_LEITURA``: só essas colunas são
+lidas (``usecols``) e o leitor não precisa inferir tipos. Códigos e nomes com
+poucos valores distintos já chegam como categóricos; códigos inteiros que podem
+faltar nos microdados (idade, tipo de ensino, indicadores do Censo) são lidos
+como float e convertidos pelos esquemas ao gravar; as notas e os indicadores
+municipais ficam em float64, como antes, para não mudar médias e faixas.
+
+Um valor do ENEM que não converte para o tipo declarado (texto numa coluna
+numérica, por exemplo) não interrompe a leitura: o arquivo, ou o bloco, é lido
+de novo com as colunas numéricas como texto e ``converter_tolerante`` deixa
+esses valores nulos e anota as colunas em COLUNAS_INVALIDAS, para que a
+validação ponha as linhas em quarentena.
+
+Há dois motores: o leitor C do pandas e o do pyarrow (``pyarrow.csv``), que
+decodifica o latin1 uma única vez, enquanto lê, e divide o arquivo entre várias
+threads. Os dois entregam os mesmos tipos (inteiros com nulos nas versões que
+aceitam nulos). O resultado da leitura é guardado em ``dados_tratados/.cache_leitura``
+(Arrow IPC, ou pickle sem o pyarrow), com uma chave formada pelo caminho, pelo
+tamanho e pela data de modificação do arquivo, pelas colunas lidas e pelo motor;
+enquanto o arquivo não mudar, as execuções seguintes leem o cache em vez de
+interpretar o texto.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline_enem.armazenamento import PASTA_TRATADOS, parquet_disponivel
+from pipeline_enem.instrumentacao import etapa
+from pipeline_enem.tratamento import COLUNA_VALORES_INVALIDOS
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+MOTORES = ['pandas', 'pyarrow']
+PASTA_CACHE_LEITURA = os.path.join(PASTA_TRATADOS, '.cache_leitura')
+
+# Muda quando os tipos declarados mudam, invalidando os caches de leitura
+VERSAO_TIPOS = 2
+
+TIPOS_ENEM = {
+    'NU_INSCRICAO': 'int64',
+    'TP_SEXO': 'category',
+    'NU_IDADE': 'float32',
+    'CO_MUNICIPIO_RESIDENCIA': 'int32',
+    'NO_MUNICIPIO_RESIDENCIA': 'category',
+    'SG_UF_RESIDENCIA': 'category',
+    'TP_ESCOLA': 'int8',
+    'TP_ENSINO': 'float32',
+    'IN_TREINEIRO': 'int8',
+    'CO_ESCOLA': 'category',
+    'NU_NOTA_CN': 'float64',
+    'NU_NOTA_CH': 'float64',
+    'NU_NOTA_LC': 'float64',
+    'NU_NOTA_MT': 'float64',
+    'NU_NOTA_REDACAO': 'float64',
+}
+
+TIPOS_CENSO = {
+    'CO_ENTIDADE': 'str',
+    'NO_ENTIDADE': 'str',
+    'CO_MUNICIPIO': 'int32',
+    'NO_MUNICIPIO': 'category',
+    'SG_UF': 'category',
+    'TP_DEPENDENCIA': 'int8',
+    'IN_ENSINO_MEDIO': 'float32',
+    'IN_BIBLIOTECA': 'float32',
+    'IN_LABORATORIO_INFORMATICA': 'float32',
+    'IN_LABORATORIO_CIENCIAS': 'float32',
+    'IN_QUADRA_ESPORTES': 'float32',
+    'IN_SALA_ATENDIMENTO_ESPECIAL': 'float32',
+    'IN_INTERNET': 'float32',
+    'NU_MATRICULAS': 'float32',
+}
+
+TIPOS_MUNICIPIOS = {
+    'CODIGO_IBGE': 'int32',
+    'NOME_MUNICIPIO': 'str',
+    'UF': 'category',
+    'IDH': 'float64',
+    'PIB_PER_CAPITA': 'float64',
+    'POPULACAO': 'int32',
+    'TAXA_ANALFABETISMO': 'float64',
+    'TAXA_ESCOLARIZACAO': 'float64',
+}
+
+TIPOS_LEITURA = {
+    'enem': TIPOS_ENEM,
+    'censo': TIPOS_CENSO,
+    'municipios': TIPOS_MUNICIPIOS,
+}
+
+# Inteiros que aceitam nulos, para quando uma coluna declarada inteira tem valores ausentes
+_INTEIROS_NULAVEIS = {'int8': 'Int8', 'int32': 'Int32', 'int64': 'Int64'}
+
+
+def pyarrow_disponivel():
+    return pa_csv is not None
+
+
+def colunas_arquivo(caminho, sep=';', encoding='latin1'):
+    """Colunas do cabeçalho de ``caminho``."""
+    return list(pd.read_csv(caminho, sep=sep, encoding=encoding, nrows=0).columns)
+
+
+def tipos_presentes(caminho, fonte, sep=';', encoding='latin1'):
+    """Tipos declarados de ``fonte`` restritos às colunas que existem no arquivo."""
+    cabecalho = colunas_arquivo(caminho, sep, encoding)
+    return {col: tipo for col, tipo in TIPOS_LEITURA[fonte].items() if col in cabecalho}
+
+
+def tipos_nulaveis(tipos):
+    """``tipos`` com os inteiros trocados pelas versões que aceitam nulos."""
+    return {col: _INTEIROS_NULAVEIS.get(tipo, tipo) for col, tipo in tipos.items()}
+
+
+def _numerico(tipo):
+    return tipo not in ('category', 'str')
+
+
+def opcoes_tolerantes(opcoes):
+    """``opcoes`` de ``pd.read_csv`` com as colunas numéricas lidas como texto, para ``converter_tolerante``."""
+    return {**opcoes, 'dtype': {col: 'str' if _numerico(tipo) else tipo for col, tipo in opcoes['dtype'].items()}}
+
+
+def converter_tolerante(df, tipos):
+    """Converte as colunas numéricas de ``df``, lidas como texto, para ``tipos`` sem interromper a leitura.
+
+    Valores que não convertem (texto, decimais em colunas inteiras, inteiros fora
+    do tipo) ficam nulos, e as colunas em que isso aconteceu são anotadas, linha a
+    linha, em COLUNAS_INVALIDAS. Inteiros com nulos ficam nas versões que aceitam nulos.
+    """
+    invalidas = []
+    for col, tipo in tipos.items():
+        if col not in df.columns or not _numerico(tipo):
+            continue
+        texto = df[col]
+        valores = pd.to_numeric(texto, errors='coerce')
+        invalida = valores.isna().to_numpy() & texto.notna().to_numpy()
+        if tipo in _INTEIROS_NULAVEIS:
+            limites = np.iinfo(tipo)
+            fora = valores.notna() & ((valores % 1 != 0) | (valores < limites.min) | (valores > limites.max))
+            invalida |= fora.to_numpy()
+            valores = valores.mask(fora)
+            if valores.isna().any():
+                tipo = _INTEIROS_NULAVEIS[tipo]
+        df[col] = valores.astype(tipo)
+        if invalida.any():
+            invalidas.append((col, invalida))
+
+    if invalidas:
+        anotacao = np.full(len(df), None, dtype=object)
+        for col, invalida in invalidas:
+            linhas = np.flatnonzero(invalida)
+            anotacao[linhas] = [col if anterior is None else f'{anterior},{col}' for anterior in anotacao[linhas]]
+        df[COLUNA_VALORES_INVALIDOS] = pd.array(anotacao, dtype='string')
+    return df
+
+
+def opcoes_pandas(caminho, fonte, sep=';', encoding='latin1'):
+    """Argumentos de ``pd.read_csv`` para ``fonte``: colunas usadas e seus tipos."""
+    tipos = tipos_presentes(caminho, fonte, sep, encoding)
+    return {'sep': sep, 'encoding': encoding, 'usecols': list(tipos), 'dtype': tipos}
+
+
+def _tipo_arrow(tipo):
+    if tipo == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    if tipo == 'str':
+        return pa.string()
+    return pa.from_numpy_dtype(tipo)
+
+
+def _ler_pandas(caminho, opcoes):
+    try:
+        return pd.read_csv(caminho, **opcoes)
+    except ValueError:
+        # Inteiro com valores ausentes: lê de novo com as versões que aceitam nulos
+        return pd.read_csv(caminho, **{**opcoes, 'dtype': tipos_nulaveis(opcoes['dtype'])})
+
+
+def _ler_pyarrow(caminho, opcoes):
+    tabela = pa_csv.read_csv(
+        caminho,
+        read_options=pa_csv.ReadOptions(encoding=opcoes['encoding'], use_threads=True),
+        parse_options=pa_csv.ParseOptions(delimiter=opcoes['sep']),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=opcoes['usecols'],
+            column_types={col: _tipo_arrow(tipo) for col, tipo in opcoes['dtype'].items()},
+            strings_can_be_null=True,
+        ),
+    )
+    df = tabela.to_pandas()
+    # Inteiros com nulos chegam como float64; ficam nas versões que aceitam nulos, como no leitor do pandas
+    for col, tipo in opcoes['dtype'].items():
+        if tipo in _INTEIROS_NULAVEIS and pd.api.types.is_float_dtype(df[col].dtype):
+            df[col] = df[col].astype(_INTEIROS_NULAVEIS[tipo])
+    return df
+
+
+def resolver_motor(motor):
+    """Confere ``motor`` e troca o pyarrow pelo pandas quando o pacote não está instalado."""
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de leitura desconhecido: {motor} (opções: {', '.join(MOTORES)})")
+    if motor == 'pyarrow' and not pyarrow_disponivel():
+        print("O motor pyarrow requer o pacote pyarrow; usando o leitor do pandas.")
+        return 'pandas'
+    return motor
+
+
+def ler_csv(caminho, fonte, motor='pandas', sep=';', encoding='latin1'):
+    """Lê o arquivo bruto de ``fonte`` (``'enem'``, ``'censo'`` ou ``'municipios'``) sem usar o cache."""
+    motor = resolver_motor(motor)
+
+    opcoes = opcoes_pandas(caminho, fonte, sep, encoding)
+    if fonte == 'enem':
+        try:
+            return _ler_pyarrow(caminho, opcoes) if motor == 'pyarrow' else pd.read_csv(caminho, **opcoes)
+        except ValueError:
+            # Valor que não converte para o tipo declarado (ou inteiro com nulos, no pandas)
+            return converter_tolerante(pd.read_csv(caminho, **opcoes_tolerantes(opcoes)), opcoes['dtype'])
+    if motor == 'pyarrow':
+        return _ler_pyarrow(caminho, opcoes)
+    return _ler_pandas(caminho, opcoes)
+
+
+def caminho_cache_leitura(caminho, fonte, pasta=PASTA_CACHE_LEITURA, sep=';', encoding='latin1', motor='pandas'):
+    """Arquivo do cache de leitura de ``caminho``, cuja chave muda quando o arquivo muda.
+
+    O nome começa pela fonte e por um hash do caminho, o prefixo comum às versões do mesmo arquivo.
+    """
+    estado = os.stat(caminho)
+    chave = json.dumps([os.path.abspath(caminho), estado.st_size, estado.st_mtime_ns, fonte, sep, encoding,
+                        TIPOS_LEITURA[fonte], VERSAO_TIPOS, motor])
+    extensao = '.arrow' if parquet_disponivel() else '.pkl'
+    arquivo = hashlib.sha256(os.path.abspath(caminho).encode()).hexdigest()[:8]
+    return os.path.join(pasta, f'{fonte}-{arquivo}-{hashlib.sha256(chave.encode()).hexdigest()[:16]}{extensao}')
+
+
+def _gravar_cache(df, destino):
+    pasta = os.path.dirname(destino)
+    os.makedirs(pasta, exist_ok=True)
+    # Remove os caches anteriores do mesmo arquivo, de versões já alteradas; os de outros
+    # arquivos da mesma fonte (por exemplo, o ENEM de outra edição) são mantidos
+    prefixo = os.path.basename(destino).rsplit('-', 1)[0] + '-'
+    for nome in os.listdir(pasta):
+        if nome.startswith(prefixo):
+            os.remove(os.path.join(pasta, nome))
+    temporario = destino + '.tmp'
+    if destino.endswith('.arrow'):
+        df.to_feather(temporario)
+    else:
+        df.to_pickle(temporario)
+    os.replace(temporario, destino)
+
+
+def ler_bruto(caminho, fonte, motor='pandas', cache=True, pasta_cache=PASTA_CACHE_LEITURA, sep=';',
+              encoding='latin1'):
+    """Como ``ler_csv``, mas reaproveita a leitura anterior enquanto o arquivo não mudar.
+
+    Com ``cache=False`` o arquivo é sempre interpretado e o cache não é gravado.
+    """
+    if not cache:
+        return ler_csv(caminho, fonte, motor, sep, encoding)
+
+    motor = resolver_motor(motor)
+    destino = caminho_cache_leitura(caminho, fonte, pasta_cache, sep, encoding, motor)
+    if os.path.exists(destino):
+        with etapa('cache_leitura'):
+            if destino.endswith('.arrow'):
+                return pd.read_feather(destino)
+            return pd.read_pickle(destino)
+
+    df = ler_csv(caminho, fonte, motor, sep, encoding)
+    with etapa('gravar_cache_leitura'):
+        _gravar_cache(df, destino)
+    return df
+
+
+# Funções que determinam o resultado da leitura, incluídas nas chaves das etapas do tratar
+# (ver pipeline_enem.cache_etapas): uma mudança nelas refaz as etapas que leem os arquivos brutos
+FUNCOES_LEITURA = (
+    tipos_presentes, tipos_nulaveis, opcoes_pandas, opcoes_tolerantes, converter_tolerante, _ler_pandas,
+    _ler_pyarrow, ler_csv,
+)
@@ -0,0 +1,242 @@
+"""Armazém das notas do ENEM em arrays float32 mapeados em memória.
+
+As cinco notas e ``MEDIA_NOTAS`` são as colunas lidas por todas as análises e
+gráficos. O tratamento as grava uma única vez em ``dados_tratados/notas_enem/``,
+como arrays float32 contíguos (uma coluna depois da outra) em um único arquivo,
+na ordem das linhas de ``enem_tratado``. Ao lado ficam as inscrições
+(``NU_INSCRICAO``) em ordem crescente e um índice int32 com a linha de cada uma.
+
+``ArmazemNotas`` abre os arquivos com ``np.memmap`` em modo somente leitura:
+cada coluna é uma visão do arquivo, sem cópia, e o sistema operacional lê só as
+páginas usadas e as compartilha entre os processos que abrem o mesmo armazém
+(enviado a outro processo, o armazém é reaberto lá em vez de copiado).
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from pipeline_enem.armazenamento import PASTA_TRATADOS
+from pipeline_enem.estatisticas import CoMomentos, Histograma
+from pipeline_enem.exploratorias import DESLOCAMENTO_NOTAS, NOTAS_COLS
+from pipeline_enem.instrumentacao import etapa
+
+PASTA_NOTAS = os.path.join(PASTA_TRATADOS, 'notas_enem')
+COLUNAS_NOTAS = NOTAS_COLS + ['MEDIA_NOTAS']
+
+# Tipos com a ordem de bytes explícita, para que o armazém possa ser lido em outra máquina
+TIPO_NOTA = '<f4'
+TIPO_INSCRICAO = '<i8'
+TIPO_INDICE = '<i4'
+
+ARQUIVO_METADADOS = 'metadados.json'
+ARQUIVO_NOTAS = 'notas.f32'
+ARQUIVO_INSCRICOES = 'inscricoes.i64'
+ARQUIVO_INDICE = 'indice.i32'
+VERSAO_ARMAZEM = 1
+
+TAMANHO_BLOCO_NOTAS = 1_000_000
+# Nos cálculos, blocos menores mantêm as cópias temporárias em float64 no cache do processador
+TAMANHO_BLOCO_CALCULO = 100_000
+TAMANHO_COPIA = 16 * 1024 ** 2
+
+
+def caminho_metadados(pasta=PASTA_NOTAS):
+    return os.path.join(pasta, ARQUIVO_METADADOS)
+
+
+def armazem_disponivel(pasta=PASTA_NOTAS):
+    return os.path.exists(caminho_metadados(pasta))
+
+
+class GravadorNotas:
+    """Grava o armazém bloco a bloco, na ordem das linhas do ENEM tratado.
+
+    Cada coluna vai para um arquivo temporário; em ``fechar``, quando o número
+    de linhas é conhecido, elas são reunidas no arquivo das notas, o índice é
+    montado e só então os metadados são gravados, de modo que um armazém
+    incompleto nunca é aberto.
+    """
+
+    def __init__(self, pasta=PASTA_NOTAS):
+        self.pasta = pasta
+        self.linhas = 0
+        self.colunas = None
+        self._partes = {}
+
+    def _parte(self, nome):
+        return os.path.join(self.pasta, f'.{nome}.parte')
+
+    def _iniciar(self, colunas):
+        os.makedirs(self.pasta, exist_ok=True)
+        if armazem_disponivel(self.pasta):
+            os.remove(caminho_metadados(self.pasta))
+        self.colunas = colunas
+        self._partes = {nome: open(self._parte(nome), 'wb') for nome in colunas + ['NU_INSCRICAO']}
+
+    def gravar(self, df):
+        with etapa('gravar:notas_enem', linhas_entrada=len(df)):
+            if self.colunas is None:
+                self._iniciar([col for col in COLUNAS_NOTAS if col in df.columns])
+            for col in self.colunas:
+                df[col].to_numpy(dtype=TIPO_NOTA, na_value=np.nan).tofile(self._partes[col])
+            if 'NU_INSCRICAO' in df.columns:
+                inscricoes = df['NU_INSCRICAO'].to_numpy(dtype=TIPO_INSCRICAO, na_value=-1)
+            else:
+                inscricoes = np.full(len(df), -1, dtype=TIPO_INSCRICAO)
+            inscricoes.tofile(self._partes['NU_INSCRICAO'])
+            self.linhas += len(df)
+
+    def fechar(self):
+        if self.colunas is None:
+            # Nenhum bloco gravado: armazém vazio, com as colunas previstas
+            self._iniciar(list(COLUNAS_NOTAS))
+        if not self._partes:
+            return
+        for arquivo in self._partes.values():
+            arquivo.close()
+
+        with etapa('fechar:notas_enem', linhas_entrada=self.linhas):
+            temporario = os.path.join(self.pasta, ARQUIVO_NOTAS + '.tmp')
+            with open(temporario, 'wb') as destino:
+                for col in self.colunas:
+                    with open(self._parte(col), 'rb') as origem:
+                        shutil.copyfileobj(origem, destino, TAMANHO_COPIA)
+                    os.remove(self._parte(col))
+            os.replace(temporario, os.path.join(self.pasta, ARQUIVO_NOTAS))
+
+            # Índice: as inscrições em ordem crescente e a linha (int32) de cada uma
+            inscricoes = np.fromfile(self._parte('NU_INSCRICAO'), dtype=TIPO_INSCRICAO)
+            indice = np.argsort(inscricoes, kind='stable').astype(TIPO_INDICE)
+            inscricoes.take(indice).tofile(os.path.join(self.pasta, ARQUIVO_INSCRICOES))
+            indice.tofile(os.path.join(self.pasta, ARQUIVO_INDICE))
+            os.remove(self._parte('NU_INSCRICAO'))
+            del inscricoes, indice
+
+            metadados = {'versao': VERSAO_ARMAZEM, 'linhas': self.linhas, 'colunas': self.colunas}
+            with open(caminho_metadados(self.pasta), 'w', encoding='utf-8') as arquivo:
+                json.dump(metadados, arquivo)
+        self._partes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def salvar_notas(df, pasta=PASTA_NOTAS):
+    """Grava o armazém a partir do ENEM tratado inteiro em memória."""
+    with GravadorNotas(pasta) as gravador:
+        gravador.gravar(df)
+
+
+class ArmazemNotas:
+    """Notas do ENEM tratado mapeadas em memória, somente para leitura."""
+
+    def __init__(self, pasta=PASTA_NOTAS):
+        self.pasta = pasta
+        with open(caminho_metadados(pasta), encoding='utf-8') as arquivo:
+            metadados = json.load(arquivo)
+        if metadados['versao'] != VERSAO_ARMAZEM:
+            raise ValueError(f"Armazém de notas em {pasta} tem versão {metadados['versao']}; refaça o tratamento")
+        self.linhas = metadados['linhas']
+        self.colunas = metadados['colunas']
+        self._notas = self._mapear(ARQUIVO_NOTAS, TIPO_NOTA, (len(self.colunas), self.linhas))
+        self._inscricoes = self._mapear(ARQUIVO_INSCRICOES, TIPO_INSCRICAO, (self.linhas,))
+        self._indice = self._mapear(ARQUIVO_INDICE, TIPO_INDICE, (self.linhas,))
+
+    def _mapear(self, nome, tipo, forma):
+        # np.memmap não aceita arquivos vazios
+        if 0 in forma:
+            return np.zeros(forma, dtype=tipo)
+        return np.memmap(os.path.join(self.pasta, nome), dtype=tipo, mode='r', shape=forma)
+
+    def __reduce__(self):
+        # Em outro processo, o armazém é reaberto a partir da pasta, sem copiar as notas
+        return ArmazemNotas, (self.pasta,)
+
+    def __len__(self):
+        return self.linhas
+
+    def coluna(self, nome, inicio=0, fim=None):
+        """Visão, sem cópia, da coluna ``nome`` nas linhas ``inicio:fim``."""
+        return self._notas[self.colunas.index(nome), inicio:fim]
+
+    def dataframe(self, colunas=None, inicio=0, fim=None):
+        """DataFrame das linhas ``inicio:fim`` cujas colunas são visões do arquivo mapeado.
+
+        Nada é copiado nem lido do disco antes do uso; colunas pedidas que não
+        estão no armazém são ignoradas.
+        """
+        colunas = self.colunas if colunas is None else [col for col in colunas if col in self.colunas]
+        fim = self.linhas if fim is None else min(fim, self.linhas)
+        return pd.DataFrame({col: self.coluna(col, inicio, fim) for col in colunas},
+                            index=pd.RangeIndex(inicio, fim), copy=False)
+
+    def blocos(self, colunas=None, tamanho_bloco=TAMANHO_BLOCO_NOTAS):
+        """Gera ``dataframe`` em blocos consecutivos de até ``tamanho_bloco`` linhas."""
+        for inicio in range(0, self.linhas, tamanho_bloco):
+            yield self.dataframe(colunas, inicio, inicio + tamanho_bloco)
+
+    def posicoes(self, inscricoes):
+        """Linha de cada ``NU_INSCRICAO`` no armazém (-1 quando a inscrição não está nele)."""
+        alvo = np.asarray(inscricoes, dtype=TIPO_INSCRICAO)
+        if self.linhas == 0:
+            return np.full(alvo.shape, -1, dtype=TIPO_INDICE)
+        ordem = np.minimum(np.searchsorted(self._inscricoes, alvo), self.linhas - 1)
+        encontrada = self._inscricoes[ordem] == alvo
+        return np.where(encontrada, self._indice[ordem], -1).astype(TIPO_INDICE)
+
+    def notas_de(self, inscricoes, colunas=None):
+        """Notas das ``inscricoes`` pedidas, na mesma ordem (nulas para as que não estão no armazém)."""
+        posicoes = self.posicoes(inscricoes)
+        colunas = self.colunas if colunas is None else colunas
+        return pd.DataFrame({
+            col: np.where(posicoes >= 0, self.coluna(col).take(np.maximum(posicoes, 0)), np.nan).astype(TIPO_NOTA)
+            for col in colunas
+        })
+
+    def medias_por_grupo(self, codigos, n_grupos, colunas=None, tamanho_bloco=TAMANHO_BLOCO_CALCULO):
+        """Contagem de notas presentes e média de cada coluna por grupo.
+
+        ``codigos`` traz o grupo (0 a ``n_grupos - 1``, ou -1 para nenhum) de cada
+        linha, por exemplo os códigos de um categórico de ``enem_tratado``. As
+        somas são feitas em float64, bloco a bloco, sobre as visões do arquivo.
+        """
+        colunas = self.colunas if colunas is None else colunas
+        codigos = np.asarray(codigos)
+        # A posição 0 recebe as linhas sem grupo (código -1) e é descartada no fim
+        n = np.zeros((len(colunas), n_grupos + 1))
+        soma = np.zeros((len(colunas), n_grupos + 1))
+        for inicio in range(0, self.linhas, tamanho_bloco):
+            grupos = codigos[inicio:inicio + tamanho_bloco].astype('intp') + 1
+            for i, col in enumerate(colunas):
+                valores = self.coluna(col, inicio, inicio + tamanho_bloco)
+                presentes = ~np.isnan(valores)
+                n[i] += np.bincount(grupos, weights=presentes, minlength=n_grupos + 1)
+                soma[i] += np.bincount(grupos, weights=np.where(presentes, valores, 0), minlength=n_grupos + 1)
+        resultado = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for i, col in enumerate(colunas):
+                resultado[col] = np.where(n[i, 1:] > 0, soma[i, 1:] / n[i, 1:], np.nan)
+                resultado['N_' + col] = n[i, 1:].astype('int64')
+        return pd.DataFrame(resultado)
+
+    def correlacao(self, colunas=None, tamanho_bloco=TAMANHO_BLOCO_CALCULO):
+        """Matriz de correlação de Pearson das colunas, com observações completas por par."""
+        colunas = self.colunas if colunas is None else colunas
+        comomentos = CoMomentos(len(colunas), DESLOCAMENTO_NOTAS)
+        for inicio in range(0, self.linhas, tamanho_bloco):
+            comomentos.atualizar(np.column_stack([self.coluna(col, inicio, inicio + tamanho_bloco)
+                                                  for col in colunas]))
+        return pd.DataFrame(comomentos.correlacao(), index=colunas, columns=colunas)
+
+    def histograma(self, coluna, bordas, tamanho_bloco=TAMANHO_BLOCO_CALCULO):
+        """``Histograma`` (contagens e momentos) da coluna nas faixas ``bordas``."""
+        histograma = Histograma(bordas)
+        for inicio in range(0, self.linhas, tamanho_bloco):
+            histograma.atualizar(self.coluna(coluna, inicio, inicio + tamanho_bloco))
+        return histograma
@@ -0,0 +1,180 @@
+"""Tratamento do ENEM em paralelo, em vários processos.
+
+O arquivo bruto é dividido em partições por faixa de bytes (sempre terminando
+em fim de linha). Cada processo lê a sua faixa diretamente do arquivo, aplica
+o tratamento, a validação, o enriquecimento pelas dimensões e o cubo parcial,
+e grava as partições tratadas (e as linhas em quarentena) em Parquet numa pasta
+temporária. Ao processo principal voltam apenas o cubo parcial e contadores; as
+partições são anexadas às saídas na ordem do arquivo, então o resultado não
+depende do número de processos.
+"""
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from pipeline_enem.cubo import combinar_cubos, construir_cubo
+from pipeline_enem.dimensoes import dimensao_escolas, dimensao_municipios, enriquecer
+from pipeline_enem.esquemas import aplicar_esquema
+from pipeline_enem.leitura import TIPOS_ENEM, converter_tolerante, opcoes_tolerantes
+from pipeline_enem.streaming import estimar_tamanho_bloco
+from pipeline_enem.tratamento import tratar_enem
+from pipeline_enem.validacao import NOME_QUARENTENA, ValidadorEnem, sem_anotacao
+
+TAMANHO_PARTICAO_MB = 32
+
+# Estado de cada processo, preenchido uma única vez pelo inicializador do pool
+_estado = {}
+
+
+def particoes_por_bytes(caminho, tamanho_particao):
+    """Divide ``caminho`` em faixas de ~``tamanho_particao`` bytes alinhadas ao fim de linha.
+
+    Retorna a linha de cabeçalho e a lista de faixas ``(inicio, fim)``.
+    """
+    tamanho = os.path.getsize(caminho)
+    limites = []
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        inicio = arquivo.tell()
+        while inicio < tamanho:
+            arquivo.seek(min(inicio + tamanho_particao, tamanho))
+            arquivo.readline()
+            fim = min(arquivo.tell(), tamanho)
+            limites.append((inicio, fim))
+            inicio = fim
+    return cabecalho, limites
+
+
+def tamanho_particao_por_memoria(caminho, limite_memoria_mb, workers, sep=';', encoding='latin1',
+                                 bytes_amostra=1024 ** 2):
+    """Tamanho das partições (MB do arquivo bruto) para que os ``workers`` processos caibam no teto de memória.
+
+    Cada processo trata uma partição por vez, dimensionada como um bloco do modo
+    streaming com ``limite_memoria_mb / workers``; as linhas são convertidas em
+    bytes pelo tamanho médio das linhas do início do arquivo.
+    """
+    linhas = estimar_tamanho_bloco(caminho, limite_memoria_mb / workers, sep, encoding)
+    with open(caminho, 'rb') as arquivo:
+        arquivo.readline()
+        trecho = arquivo.read(bytes_amostra)
+    quebras = trecho.count(b'\n')
+    if not quebras:
+        return 1
+    bytes_por_linha = (trecho.rindex(b'\n') + 1) / quebras
+    return max(1, round(linhas * bytes_por_linha / 1024 ** 2))
+
+
+def _inicializar(municipios_df, censo_escolar_df, nomes, tipos, sep, encoding, pasta, quarentena):
+    _estado['dimensoes'] = [dimensao_municipios(municipios_df), dimensao_escolas(censo_escolar_df)]
+    _estado['validador'] = (None if quarentena is None
+                            else ValidadorEnem(municipios_df, censo_escolar_df, quarentena))
+    _estado['leitura'] = {'sep': sep, 'encoding': encoding, 'header': None, 'names': nomes,
+                          'usecols': list(tipos), 'dtype': tipos}
+    _estado['pasta'] = pasta
+
+
+def caminho_particao(pasta, nome, indice):
+    return os.path.join(pasta, f'{nome}-{indice:06d}.parquet')
+
+
+def _processar_particao(tarefa):
+    indice, caminho, inicio, fim = tarefa
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        dados = arquivo.read(fim - inicio)
+
+    leitura = _estado['leitura']
+    try:
+        enem_df = pd.read_csv(io.BytesIO(dados), **leitura)
+    except ValueError:
+        # Valor que não converte para o tipo declarado: lê de novo as colunas numéricas como texto
+        enem_df = converter_tolerante(pd.read_csv(io.BytesIO(dados), **opcoes_tolerantes(leitura)), leitura['dtype'])
+    del dados
+    enem_df = tratar_enem(enem_df)
+
+    pasta = _estado['pasta']
+    validador = _estado['validador']
+    validacao = None
+    if validador is not None:
+        validador.zerar_estatisticas()
+        enem_df, quarentena_df = validador.separar(enem_df)
+        if len(quarentena_df):
+            aplicar_esquema(quarentena_df.copy(deep=False), NOME_QUARENTENA).to_parquet(
+                caminho_particao(pasta, NOME_QUARENTENA, indice), index=False)
+        validacao = validador.estatisticas()
+    else:
+        enem_df = sem_anotacao(enem_df)
+
+    for dimensao in _estado['dimensoes']:
+        dimensao.zerar_estatisticas()
+    completos_df = enriquecer(enem_df, _estado['dimensoes'])
+
+    aplicar_esquema(enem_df.copy(deep=False), 'enem_tratado').to_parquet(
+        caminho_particao(pasta, 'enem_tratado', indice), index=False)
+    aplicar_esquema(completos_df.copy(deep=False), 'dados_completos').to_parquet(
+        caminho_particao(pasta, 'dados_completos', indice), index=False)
+
+    estatisticas = [dimensao.estatisticas() for dimensao in _estado['dimensoes']]
+    return indice, len(enem_df), construir_cubo(completos_df), estatisticas, validacao
+
+
+def tratar_em_paralelo(caminho, municipios_df, censo_escolar_df, gravador_enem, gravador_completos, dimensoes,
+                       workers, tamanho_particao_mb=TAMANHO_PARTICAO_MB, sep=';', encoding='latin1',
+                       gravador_notas=None, validador=None, gravador_quarentena=None):
+    """Trata, enriquece e grava o ENEM usando ``workers`` processos.
+
+    ``gravador_enem`` e ``gravador_completos`` (e ``gravador_notas``, quando
+    informado, com as partições do ENEM tratado) recebem as partições na ordem do
+    arquivo; os contadores de consultas de cada processo são somados em
+    ``dimensoes`` (municípios e escolas, nessa ordem). Com ``validador``, cada
+    processo valida a sua partição com as mesmas regras, as contagens são
+    somadas nele e as linhas em quarentena vão para ``gravador_quarentena``.
+    Retorna o cubo de agregados e o número de partições.
+    """
+    cabecalho, limites = particoes_por_bytes(caminho, tamanho_particao_mb * 1024 ** 2)
+    nomes = cabecalho.decode(encoding).rstrip('\r\n').split(sep)
+    # Só as colunas usadas, com os tipos declarados em pipeline_enem.leitura
+    tipos = {col: tipo for col, tipo in TIPOS_ENEM.items() if col in nomes}
+    tarefas = [(indice, caminho, inicio, fim) for indice, (inicio, fim) in enumerate(limites)]
+    if not tarefas:
+        # Arquivo só com o cabeçalho: as saídas são gravadas vazias, com os seus esquemas
+        enem_df = tratar_enem(pd.DataFrame({col: pd.Series(dtype=tipo) for col, tipo in tipos.items()}))
+        completos_df = enriquecer(enem_df, dimensoes)
+        for gravador, df in ((gravador_enem, enem_df), (gravador_notas, enem_df), (gravador_completos, completos_df)):
+            if gravador is not None:
+                gravador.gravar(df)
+        return construir_cubo(completos_df), 0
+
+    cubo_df = None
+    # As partições ficam ao lado das saídas, no mesmo disco
+    with tempfile.TemporaryDirectory(prefix='.particoes-', dir=gravador_enem.pasta) as pasta, \
+            ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_inicializar,
+                initargs=(municipios_df, censo_escolar_df, nomes, tipos, sep, encoding, pasta,
+                          None if validador is None else validador.quarentena)
+            ) as pool:
+        # map devolve os resultados na ordem das partições, o que garante a mesma saída
+        # para qualquer número de processos
+        for indice, _, cubo_parcial, estatisticas, validacao in pool.map(_processar_particao, tarefas):
+            quarentena = caminho_particao(pasta, NOME_QUARENTENA, indice)
+            if os.path.exists(quarentena):
+                gravador_quarentena.gravar(pd.read_parquet(quarentena))
+                os.remove(quarentena)
+            if validacao is not None:
+                validador.acumular(validacao)
+            for nome, gravador in (('enem_tratado', gravador_enem), ('dados_completos', gravador_completos)):
+                particao = caminho_particao(pasta, nome, indice)
+                particao_df = pd.read_parquet(particao)
+                gravador.gravar(particao_df)
+                if nome == 'enem_tratado' and gravador_notas is not None:
+                    gravador_notas.gravar(particao_df)
+                os.remove(particao)
+            cubo_df = combinar_cubos([cubo_df, cubo_parcial])
+            for dimensao, estatisticas_processo in zip(dimensoes, estatisticas):
+                dimensao.acumular(estatisticas_processo)
+
+    return cubo_df, len(tarefas)
@@ -0,0 +1,227 @@
+"""Conjuntos tratados particionados por ano (NU_ANO) e UF, com várias edições do ENEM lado a lado.
+
+Os arquivos de dados_tratados/ guardam a edição tratada por último; cada
+``tratar --ano`` também grava o ENEM tratado e o cubo daquele ano em
+partições nomeadas no estilo Hive, cada arquivo com a coluna NU_ANO::
+
+    dados_tratados/particoes/enem_tratado/NU_ANO=2022/SG_UF_RESIDENCIA=SP/enem_tratado.parquet
+    dados_tratados/particoes/cubo_enem/NU_ANO=2022/cubo_enem.parquet
+
+Cada ano tem um ``_estatisticas.json`` com as linhas e o mínimo e o máximo de
+cada coluna numérica de cada partição. ``ler_particoes`` escolhe as partições
+pelo ano, pela UF e por intervalos de valores (descartando as partições cujo
+mínimo e máximo não alcançam o intervalo) antes de abrir qualquer arquivo, então
+uma consulta de um ano ou de um estado lê só os arquivos daquele ano ou estado.
+Tratar uma edição de novo substitui apenas as partições do seu ano. As
+partições são gravadas em Parquet e requerem o pyarrow.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .armazenamento import PASTA_TRATADOS, GravadorTratado, caminho_tratado, pq
+from .esquemas import aplicar_esquema
+from .instrumentacao import etapa
+
+PASTA_PARTICOES = os.path.join(PASTA_TRATADOS, 'particoes')
+COLUNA_ANO = 'NU_ANO'
+COLUNA_UF = 'SG_UF_RESIDENCIA'
+ARQUIVO_ESTATISTICAS = '_estatisticas.json'
+# Conjuntos gravados em partições por ``tratar``
+PARTICOES = ['enem_tratado', 'cubo_enem']
+# Nome da partição das linhas sem UF, como no Hive
+UF_NULA = '__HIVE_DEFAULT_PARTITION__'
+
+
+def pasta_ano(nome, ano, pasta=PASTA_PARTICOES):
+    return os.path.join(pasta, nome, f'{COLUNA_ANO}={ano}')
+
+
+def caminho_estatisticas(nome, ano, pasta=PASTA_PARTICOES):
+    return os.path.join(pasta_ano(nome, ano, pasta), ARQUIVO_ESTATISTICAS)
+
+
+def _extremos(df):
+    minimos, maximos = {}, {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            valores = df[col].to_numpy(dtype='float64', na_value=np.nan)
+            validos = valores[~np.isnan(valores)]
+            minimos[col] = float(validos.min()) if len(validos) else None
+            maximos[col] = float(validos.max()) if len(validos) else None
+    return minimos, maximos
+
+
+def _combinar(funcao, *valores):
+    valores = [valor for valor in valores if valor is not None]
+    return funcao(valores) if valores else None
+
+
+class GravadorParticoes:
+    """Grava o conjunto ``nome`` do ano ``ano`` bloco a bloco, em uma partição por UF (ou uma só).
+
+    As partições são gravadas numa pasta temporária ao lado da do ano, que só
+    substitui a anterior ao fechar: se a gravação for interrompida, as partições
+    já gravadas daquele ano continuam valendo.
+    """
+
+    def __init__(self, nome, ano, por_uf=True, pasta=PASTA_PARTICOES):
+        self.nome = nome
+        self.ano = int(ano)
+        self.por_uf = por_uf
+        self.destino = pasta_ano(nome, ano, pasta)
+        # Começa com ponto para não ser confundida com um ano por estatisticas_particoes
+        self.pasta = os.path.join(os.path.dirname(self.destino), f'.{os.path.basename(self.destino)}.tmp')
+        self.linhas = 0
+        self._gravadores = {}
+        self.particoes = {}
+        # Restos de uma gravação interrompida
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def gravar(self, df):
+        df = df.assign(**{COLUNA_ANO: np.int16(self.ano)})
+        if not self.por_uf or COLUNA_UF not in df.columns:
+            self._gravar_particao('', df)
+        else:
+            for uf, parte in df.groupby(COLUNA_UF, observed=True, dropna=False, sort=False):
+                self._gravar_particao(UF_NULA if pd.isna(uf) else str(uf), parte)
+        self.linhas += len(df)
+
+    def _gravar_particao(self, uf, parte):
+        if uf not in self._gravadores:
+            pasta = os.path.join(self.pasta, f'{COLUNA_UF}={uf}') if uf else self.pasta
+            os.makedirs(pasta, exist_ok=True)
+            self._gravadores[uf] = GravadorTratado(self.nome, 'parquet', pasta)
+            self.particoes[uf] = {
+                'arquivo': os.path.relpath(caminho_tratado(self.nome, 'parquet', pasta), self.pasta),
+                'linhas': 0, 'minimos': {}, 'maximos': {},
+            }
+        self._gravadores[uf].gravar(parte)
+
+        particao = self.particoes[uf]
+        particao['linhas'] += len(parte)
+        minimos, maximos = _extremos(parte)
+        for col in minimos:
+            particao['minimos'][col] = _combinar(min, particao['minimos'].get(col), minimos[col])
+            particao['maximos'][col] = _combinar(max, particao['maximos'].get(col), maximos[col])
+
+    def fechar(self):
+        for gravador in self._gravadores.values():
+            gravador.fechar()
+        self._gravadores = {}
+        os.makedirs(self.pasta, exist_ok=True)
+        with open(os.path.join(self.pasta, ARQUIVO_ESTATISTICAS), 'w') as arquivo:
+            json.dump({'ano': self.ano, 'linhas': self.linhas, 'particoes': self.particoes}, arquivo, indent=1)
+        # Tratar a edição de novo substitui as suas partições: a pasta anterior é afastada e
+        # a nova toma o seu lugar com os.replace
+        antiga = os.path.join(os.path.dirname(self.destino), f'.{os.path.basename(self.destino)}.antiga')
+        shutil.rmtree(antiga, ignore_errors=True)
+        if os.path.exists(self.destino):
+            os.replace(self.destino, antiga)
+        os.replace(self.pasta, self.destino)
+        shutil.rmtree(antiga, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.fechar()
+        else:
+            for gravador in self._gravadores.values():
+                gravador.fechar()
+            self._gravadores = {}
+            shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+def estatisticas_particoes(nome, pasta=PASTA_PARTICOES):
+    """Estatísticas de cada ano gravado de ``nome``: ``{ano: conteúdo de _estatisticas.json}``."""
+    raiz = os.path.join(pasta, nome)
+    anos = {}
+    if not os.path.isdir(raiz):
+        return anos
+    for entrada in os.listdir(raiz):
+        caminho = os.path.join(raiz, entrada, ARQUIVO_ESTATISTICAS)
+        if entrada.startswith(f'{COLUNA_ANO}=') and os.path.exists(caminho):
+            with open(caminho) as arquivo:
+                estatisticas = json.load(arquivo)
+            anos[estatisticas['ano']] = estatisticas
+    return dict(sorted(anos.items()))
+
+
+def anos_disponiveis(nome, pasta=PASTA_PARTICOES):
+    return list(estatisticas_particoes(nome, pasta))
+
+
+def _alcanca(particao, intervalos):
+    for col, (minimo, maximo) in intervalos.items():
+        if col not in particao['minimos']:
+            continue  # coluna sem estatísticas (texto, categórica): não permite descartar
+        menor, maior = particao['minimos'][col], particao['maximos'][col]
+        if menor is None:
+            return False  # só nulos na partição
+        if (minimo is not None and maior < minimo) or (maximo is not None and menor > maximo):
+            return False
+    return True
+
+
+def selecionar_particoes(nome, anos=None, ufs=None, intervalos=None, pasta=PASTA_PARTICOES):
+    """Caminhos dos arquivos de ``nome`` que podem ter linhas dos ``anos``, ``ufs`` e ``intervalos`` pedidos.
+
+    ``intervalos`` é um dicionário ``{coluna: (mínimo, máximo)}`` (qualquer um
+    dos limites pode ser None). Retorna uma lista de dicionários com ``ano``,
+    ``uf``, ``caminho`` e ``linhas``.
+    """
+    selecionadas = []
+    for ano, estatisticas in estatisticas_particoes(nome, pasta).items():
+        if anos is not None and ano not in anos:
+            continue
+        for uf, particao in estatisticas['particoes'].items():
+            if ufs is not None and uf and uf not in ufs:
+                continue
+            if intervalos and not _alcanca(particao, intervalos):
+                continue
+            selecionadas.append({'ano': ano, 'uf': uf or None, 'linhas': particao['linhas'],
+                                 'caminho': os.path.join(pasta_ano(nome, ano, pasta), particao['arquivo'])})
+    return selecionadas
+
+
+def blocos_particoes(nome, anos=None, ufs=None, colunas=None, intervalos=None, pasta=PASTA_PARTICOES):
+    """Gera o conteúdo de cada partição selecionada, só com as linhas dentro dos ``intervalos``.
+
+    Sem partições por UF (como no cubo), ``ufs`` filtra as linhas pela coluna de UF.
+    """
+    intervalos = intervalos or {}
+    filtros = list(intervalos) + ([COLUNA_UF] if ufs is not None else [])
+    leitura = None if colunas is None else list(dict.fromkeys(list(colunas) + filtros))
+    for particao in selecionar_particoes(nome, anos, ufs, intervalos, pasta):
+        with etapa(f'ler_particao:{nome}') as medicao:
+            existentes = None if leitura is None else [
+                col for col in leitura if col in pq.read_schema(particao['caminho']).names]
+            df = pd.read_parquet(particao['caminho'], columns=existentes)
+            manter = pd.Series(True, index=df.index)
+            for col, (minimo, maximo) in intervalos.items():
+                if minimo is not None:
+                    manter &= df[col] >= minimo
+                if maximo is not None:
+                    manter &= df[col] <= maximo
+            if ufs is not None and particao['uf'] is None and COLUNA_UF in df.columns:
+                manter &= df[COLUNA_UF].isin(ufs)
+            if not manter.all():
+                df = df[manter]
+            if colunas is not None:
+                df = df[[col for col in colunas if col in df.columns]]
+            medicao.linhas_saida = len(df)
+        yield df
+
+
+def ler_particoes(nome, anos=None, ufs=None, colunas=None, intervalos=None, pasta=PASTA_PARTICOES):
+    """Como ``blocos_particoes``, mas em um único DataFrame (vazio quando nenhuma partição é selecionada)."""
+    partes = list(blocos_particoes(nome, anos, ufs, colunas, intervalos, pasta))
+    if not partes:
+        return pd.DataFrame(columns=colunas)
+    # Os categóricos de partições diferentes têm categorias diferentes; o esquema os reconstrói
+    return aplicar_esquema(pd.concat(partes, ignore_index=True), nome)
@@ -0,0 +1,72 @@
+"""Pontuação vetorizada: nível de infraestrutura, presença nas provas e códigos de faixas.
+
+Os itens de infraestrutura de cada escola são empacotados em uma máscara de
+bits (uint8) e o nível é obtido por uma tabela de contagem de bits; as provas
+feitas por cada candidato (notas não nulas) formam uma máscara do mesmo tipo,
+calculada junto com a média das notas presentes em uma passada pela matriz de
+notas. As faixas
+(idade, IDH, infraestrutura) são calculadas com ``searchsorted`` diretamente
+em códigos inteiros pequenos; os rótulos só são associados no fim, ao montar
+o categórico, sem passar por ``pd.cut``.
+"""
+import numpy as np
+import pandas as pd
+
+# Número de bits ligados de cada valor de 0 a 255
+CONTAGEM_BITS = np.array([bin(valor).count('1') for valor in range(256)], dtype='uint8')
+
+
+def mascara_itens(df, colunas):
+    """Empacota até 8 indicadores 0/1 em uma máscara uint8 (bit ``i`` = ``colunas[i]``).
+
+    Valores nulos contam como item ausente, como na soma por linha.
+    """
+    if len(colunas) > 8:
+        raise ValueError("A máscara uint8 comporta no máximo 8 itens")
+    mascara = np.zeros(len(df), dtype='uint8')
+    for bit, col in enumerate(colunas):
+        presente = df[col].to_numpy(dtype='float64', na_value=np.nan) == 1
+        mascara |= presente.astype('uint8') << np.uint8(bit)
+    return mascara
+
+
+def mascara_presenca(notas):
+    """Máscara uint8 das notas presentes (não nulas) de cada linha da matriz ``notas`` (bit ``i`` = coluna ``i``)."""
+    presentes = ~np.isnan(notas)
+    if presentes.shape[1] > 8:
+        raise ValueError("A máscara uint8 comporta no máximo 8 provas")
+    return np.packbits(presentes, axis=1, bitorder='little')[:, 0]
+
+
+def media_presentes(notas, quantidade):
+    """Média de cada linha de ``notas`` só sobre os valores presentes (``quantidade`` por linha); nula sem nenhum."""
+    soma = np.nansum(notas, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(quantidade > 0, soma / quantidade, np.nan)
+
+
+def contar_itens(mascara):
+    """Quantidade de itens presentes em cada máscara."""
+    return CONTAGEM_BITS[mascara]
+
+
+def codigos_faixas(valores, bins):
+    """Código (0, 1, ...) da faixa ``(bins[i], bins[i + 1]]`` de cada valor; -1 fora das faixas ou nulo.
+
+    Mesma convenção de intervalos de ``pd.cut`` com ``right=True``.
+    """
+    valores = np.asarray(valores, dtype='float64')
+    codigos = np.searchsorted(np.asarray(bins, dtype='float64'), valores, side='left') - 1
+    fora = (codigos < 0) | (codigos >= len(bins) - 1) | np.isnan(valores)
+    return np.where(fora, -1, codigos).astype('int8')
+
+
+def categorizar(codigos, rotulos):
+    """Associa os rótulos aos códigos, formando o categórico ordenado (-1 vira nulo)."""
+    return pd.Categorical.from_codes(codigos, categories=rotulos, ordered=True)
+
+
+def faixas(serie, bins, rotulos):
+    """Equivalente a ``pd.cut(serie, bins, labels=rotulos)``, via códigos inteiros."""
+    codigos = codigos_faixas(serie.to_numpy(dtype='float64', na_value=np.nan), bins)
+    return pd.Series(categorizar(codigos, rotulos), index=serie.index, name=serie.name)
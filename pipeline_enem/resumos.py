@@ -0,0 +1,239 @@
+"""Resumos por escola e por município: uma linha por CO_ESCOLA e por CO_MUNICIPIO_RESIDENCIA.
+
+Para cada chave, o resumo guarda o número de candidatos e, para cada nota, a
+contagem, a soma, a soma dos quadrados, o mínimo e o máximo (como o cubo de
+pipeline_enem.cubo), e a partir delas a média e o desvio padrão. Os atributos
+do Censo Escolar (``resumo_escolas``) e dos indicadores municipais
+(``resumo_municipios``) são anexados pela chave, então as análises de
+infraestrutura e de IDH percorrem dezenas de milhares de linhas em vez dos
+milhões de ``dados_completos``, que repete esses atributos em cada candidato.
+
+Somas, contagens, mínimos e máximos se combinam, então um novo lote de
+candidatos é acrescentado aos resumos gravados sem reprocessar os anteriores::
+
+    python -m pipeline_enem.resumos novos_candidatos.csv
+
+O lote passa pela validação do ``tratar`` com as regras padrão
+(pipeline_enem.validacao), e as linhas em quarentena ficam fora dos resumos.
+Todos os formatos dos resumos presentes em dados_tratados/ são regravados. Os
+lotes acrescentados ficam registrados, pela impressão digital do arquivo, em
+dados_tratados/lotes_resumos.json: um lote já acrescentado é recusado, e o
+próximo ``tratar`` do mesmo arquivo do ENEM reaplica os lotes registrados ao
+refazer os resumos (um ENEM diferente começa um registro novo).
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .armazenamento import EXTENSOES, PASTA_TRATADOS, caminho_tratado, carregar_tratado, salvar_tratado
+from .cubo import MEDIDAS_CUBO, agregar_cubo
+from .dimensoes import COLUNAS_ESCOLAS, COLUNAS_MUNICIPIOS, dimensao_escolas, dimensao_municipios
+from .esquemas import aplicar_esquema
+
+# Conjunto tratado de cada resumo e a sua chave no ENEM
+RESUMOS = {
+    'resumo_escolas': 'CO_ESCOLA',
+    'resumo_municipios': 'CO_MUNICIPIO_RESIDENCIA',
+}
+COLUNAS_RESUMO_ESCOLAS = ['NO_ENTIDADE', 'CO_MUNICIPIO', 'SG_UF'] + [col for col in COLUNAS_ESCOLAS
+                                                                    if col != 'NO_ENTIDADE']
+COLUNAS_RESUMO_MUNICIPIOS = ['NOME_MUNICIPIO', 'UF'] + COLUNAS_MUNICIPIOS
+
+# Colunas do ENEM tratado lidas para montar os resumos
+COLUNAS_ENEM_RESUMOS = list(RESUMOS.values()) + MEDIDAS_CUBO
+
+# Somas guardadas por nota e como cada uma é combinada
+AGREGACOES_SOMAS = {'N_': 'sum', 'SOMA_': 'sum', 'SOMA2_': 'sum', 'MIN_': 'min', 'MAX_': 'max'}
+
+TAMANHO_BLOCO_RESUMOS = 500_000
+
+# Registro dos lotes acrescentados aos resumos de um arquivo do ENEM
+ARQUIVO_LOTES = os.path.join(PASTA_TRATADOS, 'lotes_resumos.json')
+
+
+def _medidas(df):
+    return [col for col in MEDIDAS_CUBO if 'SOMA_' + col in df.columns or col in df.columns]
+
+
+def _agregacoes(medidas):
+    agregacoes = {'CANDIDATOS': 'sum'}
+    for col in medidas:
+        agregacoes.update({prefixo + col: funcao for prefixo, funcao in AGREGACOES_SOMAS.items()})
+    return agregacoes
+
+
+def somar(enem_df, chave):
+    """Somas de ``enem_df`` (ENEM tratado) por ``chave``, uma linha por valor da chave.
+
+    As notas são somadas com os tipos do ENEM tratado gravado (float32), para que
+    os resumos sejam os mesmos em memória, em streaming e com ``--workers``.
+    """
+    medidas = _medidas(enem_df)
+    enem_df = aplicar_esquema(enem_df[[chave] + medidas], 'enem_tratado')
+    valores = {chave: enem_df[chave], 'CANDIDATOS': np.ones(len(enem_df), dtype='int64')}
+    for col in medidas:
+        nota = enem_df[col].astype('float64')
+        valores['N_' + col] = nota.notna().astype('int64')
+        valores['SOMA_' + col] = nota
+        valores['SOMA2_' + col] = nota * nota
+        valores['MIN_' + col] = nota
+        valores['MAX_' + col] = nota
+    return pd.DataFrame(valores).groupby(chave, observed=True).agg(_agregacoes(medidas)).reset_index()
+
+
+def combinar_somas(partes, chave):
+    """Combina somas parciais da mesma ``chave`` (de blocos, lotes ou de um resumo já gravado)."""
+    partes = [parte for parte in partes if parte is not None]
+    if len(partes) == 1:
+        return partes[0]
+    somas = pd.concat(partes, ignore_index=True)
+    return somas.groupby(chave, observed=True).agg(_agregacoes(_medidas(somas))).reset_index()
+
+
+def _valores_chave(valores):
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        return valores.astype(valores.cat.categories.dtype)
+    return valores
+
+
+def montar_resumo(somas, chave, dimensao):
+    """Acrescenta às somas a média e o desvio padrão de cada nota e os atributos de ``dimensao``.
+
+    As linhas saem ordenadas pelo valor da chave (e não pela ordem das categorias,
+    que depende de como o ENEM foi lido).
+    """
+    medidas = _medidas(somas)
+    medias = agregar_cubo(somas, chave, medidas, desvio_padrao=True)
+    medias = medias.drop(columns=['N_' + col for col in medidas]).set_index(chave)
+    resumo = somas.set_index(chave)
+    atributos = dimensao.buscar(resumo.index.to_series())
+    resumo = pd.concat([atributos, resumo[['CANDIDATOS']], medias, resumo.drop(columns='CANDIDATOS')],
+                       axis=1).rename_axis(chave).reset_index()
+    return resumo.sort_values(chave, key=_valores_chave, ignore_index=True)
+
+
+def _dimensoes(censo_escolar_df, municipios_df):
+    return {
+        'resumo_escolas': dimensao_escolas(censo_escolar_df, COLUNAS_RESUMO_ESCOLAS),
+        'resumo_municipios': dimensao_municipios(municipios_df, COLUNAS_RESUMO_MUNICIPIOS),
+    }
+
+
+def construir_resumos(blocos_enem, censo_escolar_df, municipios_df):
+    """Resumos a partir dos blocos do ENEM tratado; retorna ``{nome: resumo}``.
+
+    Só as somas (uma linha por chave) ficam em memória entre os blocos. Sem
+    blocos (um ENEM só com o cabeçalho), os resumos saem vazios.
+    """
+    somas = dict.fromkeys(RESUMOS)
+    lidos = False
+    for bloco in blocos_enem:
+        lidos = True
+        for nome, chave in RESUMOS.items():
+            if chave in bloco.columns:
+                somas[nome] = combinar_somas([somas[nome], somar(bloco, chave)], chave)
+    if not lidos:
+        vazio = pd.DataFrame(columns=COLUNAS_ENEM_RESUMOS)
+        somas = {nome: somar(vazio, chave) for nome, chave in RESUMOS.items()}
+    dimensoes = _dimensoes(censo_escolar_df, municipios_df)
+    return {nome: montar_resumo(somas[nome], RESUMOS[nome], dimensoes[nome])
+            for nome in RESUMOS if somas[nome] is not None}
+
+
+def acrescentar_lote(lote_df, resumos, censo_escolar_df, municipios_df):
+    """Soma o lote ``lote_df`` (ENEM tratado) aos ``resumos`` já montados, sem os candidatos anteriores."""
+    dimensoes = _dimensoes(censo_escolar_df, municipios_df)
+    atualizados = {}
+    for nome, resumo in resumos.items():
+        chave = RESUMOS[nome]
+        colunas_somas = [chave] + list(_agregacoes(_medidas(resumo)))
+        somas = combinar_somas([resumo[colunas_somas], somar(lote_df, chave)], chave)
+        atualizados[nome] = montar_resumo(somas, chave, dimensoes[nome])
+    return atualizados
+
+
+def carregar_lotes(impressao_enem=None, caminho=ARQUIVO_LOTES):
+    """Registro dos lotes acrescentados: ``{'enem': impressão do ENEM dos resumos, 'lotes': [...]}``.
+
+    Com ``impressao_enem`` diferente da registrada, retorna um registro novo, sem lotes.
+    """
+    registro = {'enem': impressao_enem, 'lotes': []}
+    if os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as arquivo:
+            gravado = json.load(arquivo)
+        if impressao_enem is None or gravado['enem'] == impressao_enem:
+            registro = gravado
+    return registro
+
+
+def gravar_lotes(registro, caminho=ARQUIVO_LOTES):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(registro, arquivo, ensure_ascii=False, indent=1)
+
+
+def ler_lote(caminho, censo_escolar_df, municipios_df):
+    """ENEM tratado de um lote, sem as linhas que a validação põe em quarentena."""
+    from .leitura import ler_csv
+    from .tratamento import tratar_enem
+    from .validacao import ValidadorEnem
+
+    validador = ValidadorEnem(municipios_df, censo_escolar_df)
+    lote_df, _ = validador.separar(tratar_enem(ler_csv(caminho, 'enem')))
+    validador.relatorio()
+    return lote_df
+
+
+def reaplicar_lotes(resumos, lotes, censo_escolar_df, municipios_df, impressao_arquivo):
+    """Acrescenta de novo aos ``resumos`` os ``lotes`` registrados; retorna os resumos e os lotes reaplicados.
+
+    Lotes cujo arquivo não existe mais ou mudou desde o acréscimo são deixados de fora.
+    """
+    reaplicados = []
+    for lote in lotes:
+        if not os.path.exists(lote['arquivo']) or impressao_arquivo(lote['arquivo']) != lote['impressao']:
+            print(f"Lote {lote['arquivo']} ausente ou alterado: retirado dos resumos e do registro")
+            continue
+        print(f"Reaplicando o lote {lote['arquivo']}...")
+        resumos = acrescentar_lote(ler_lote(lote['arquivo'], censo_escolar_df, municipios_df), resumos,
+                                   censo_escolar_df, municipios_df)
+        reaplicados.append(lote)
+    return resumos, reaplicados
+
+
+def main(argv=None):
+    from .cache_etapas import CacheEtapas
+
+    parser = argparse.ArgumentParser(
+        prog='python -m pipeline_enem.resumos',
+        description='Acrescenta um lote de candidatos do ENEM aos resumos por escola e por município')
+    parser.add_argument('arquivo', help='CSV do ENEM com os novos candidatos (mesmo formato dos microdados)')
+    args = parser.parse_args(argv)
+
+    registro = carregar_lotes()
+    if registro['enem'] is None:
+        parser.error(f"{ARQUIVO_LOTES} não existe: execute o tratar antes de acrescentar lotes")
+    impressao = CacheEtapas().impressao_arquivo(args.arquivo)
+    if impressao == registro['enem'] or any(lote['impressao'] == impressao for lote in registro['lotes']):
+        parser.error(f"{args.arquivo} já está nos resumos")
+
+    censo_escolar_df = carregar_tratado('censo_escolar_tratado')
+    municipios_df = carregar_tratado('municipios_tratado')
+    lote_df = ler_lote(args.arquivo, censo_escolar_df, municipios_df)
+
+    resumos = {nome: carregar_tratado(nome) for nome in RESUMOS}
+    atualizados = acrescentar_lote(lote_df, resumos, censo_escolar_df, municipios_df)
+    for nome, resumo in atualizados.items():
+        formatos = [formato for formato in EXTENSOES if os.path.exists(caminho_tratado(nome, formato))]
+        salvar_tratado(resumo, nome, formatos)
+        print(f"{nome}: {len(resumos[nome])} -> {len(resumo)} linhas, "
+              f"{int(resumo['CANDIDATOS'].sum())} candidatos ({', '.join(formatos)})")
+    registro['lotes'].append({'arquivo': os.path.abspath(args.arquivo), 'impressao': impressao,
+                              'linhas': len(lote_df)})
+    gravar_lotes(registro)
+
+
+if __name__ == '__main__':
+    main()
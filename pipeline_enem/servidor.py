@@ -0,0 +1,240 @@
+"""Servidor local de consultas HTTP/JSON sobre o cubo de agregados.
+
+Substitui o arquivo detalhado do dashboard: o cubo é carregado uma única vez
+e cada consulta filtra, agrupa e calcula as médias pedidas a partir dele. As
+respostas ficam em um cache LRU, de modo que consultas repetidas (comuns nas
+atualizações do dashboard) não são recalculadas.
+
+Uso (a partir da raiz do projeto, depois de gerar dados_tratados/cubo_enem):
+    python -m pipeline_enem.servidor --porta 8050
+
+Rotas (apenas GET):
+    /dimensoes   dimensões disponíveis e seus valores
+    /consulta    ?agrupar=UF,TIPO_ESCOLA&medidas=MEDIA_NOTAS&UF=SP,RJ&desvio_padrao=1
+    /saude       linhas do cubo e estatísticas do cache
+"""
+import argparse
+import asyncio
+import json
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from .armazenamento import PASTA_TRATADOS, carregar_tratado
+from .cubo import MEDIDAS_CUBO, agregar_cubo
+from .tratamento import TIPOS_ESCOLA
+
+# Nome público de cada dimensão do dashboard -> coluna do cubo
+DIMENSOES_CONSULTA = {
+    'UF': 'SG_UF_RESIDENCIA',
+    'TIPO_ESCOLA': 'TP_ESCOLA',
+    'FAIXA_ETARIA': 'FAIXA_ETARIA',
+    'SEXO': 'TP_SEXO',
+    'CATEGORIA_IDH': 'CATEGORIA_IDH',
+    'CATEGORIA_INFRAESTRUTURA': 'CATEGORIA_INFRAESTRUTURA',
+    'PRESENCA': 'PRESENCA_PROVAS',
+}
+PARAMETROS = {'agrupar', 'medidas', 'desvio_padrao'}
+
+TAMANHO_CACHE = 1024
+TAMANHO_MAXIMO_REQUISICAO = 64 * 1024
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Content Too Large'}
+
+
+class ErroConsulta(ValueError):
+    """Parâmetros de consulta inválidos (respondidos com status 400)."""
+
+
+def _lista(valor):
+    return [item for item in valor.split(',') if item]
+
+
+class ServicoConsultas:
+    """Responde consultas de filtro, agrupamento e medidas sobre o cubo.
+
+    As colunas do cubo são renomeadas para os nomes públicos de
+    ``DIMENSOES_CONSULTA`` e o tipo de escola recebe os rótulos de
+    ``TIPOS_ESCOLA``. ``tamanho_cache=0`` desliga o cache.
+    """
+
+    def __init__(self, cubo, tamanho_cache=TAMANHO_CACHE):
+        cubo = cubo.copy()
+        if 'TP_ESCOLA' in cubo.columns and pd.api.types.is_integer_dtype(cubo['TP_ESCOLA']):
+            cubo['TP_ESCOLA'] = cubo['TP_ESCOLA'].map(TIPOS_ESCOLA).astype('category')
+        self.cubo = cubo.rename(columns={col: nome for nome, col in DIMENSOES_CONSULTA.items()})
+        self.dimensoes = [nome for nome in DIMENSOES_CONSULTA if nome in self.cubo.columns]
+        self.medidas = [col for col in MEDIDAS_CUBO if 'SOMA_' + col in self.cubo.columns]
+        # Rótulos em texto de cada dimensão, usados nos filtros (nulos não casam com nenhum valor)
+        self._rotulos = {
+            nome: self.cubo[nome].astype('string').astype(object).where(self.cubo[nome].notna())
+            for nome in self.dimensoes
+        }
+        self._executar_em_cache = lru_cache(maxsize=tamanho_cache)(self._executar)
+
+    def valores_dimensoes(self):
+        """Valores presentes de cada dimensão, na ordem das categorias quando houver."""
+        valores = {}
+        for nome in self.dimensoes:
+            presentes = set(self._rotulos[nome].dropna())
+            if isinstance(self.cubo[nome].dtype, pd.CategoricalDtype):
+                valores[nome] = [str(valor) for valor in self.cubo[nome].cat.categories if str(valor) in presentes]
+            else:
+                valores[nome] = sorted(presentes)
+        return valores
+
+    def normalizar(self, parametros):
+        """Converte os parâmetros da URL em uma chave de consulta canônica (e hashable)."""
+        agrupar = _lista(parametros.get('agrupar', ''))
+        medidas = _lista(parametros.get('medidas', '')) or ['MEDIA_NOTAS']
+        desvio_padrao = parametros.get('desvio_padrao', '0') in ('1', 'true', 'sim')
+        filtros = {nome: _lista(valor) for nome, valor in parametros.items() if nome not in PARAMETROS}
+
+        desconhecidas = [nome for nome in agrupar + list(filtros) if nome not in self.dimensoes]
+        if desconhecidas:
+            raise ErroConsulta(f"Dimensões desconhecidas: {', '.join(desconhecidas)}")
+        desconhecidas = [col for col in medidas if col not in self.medidas]
+        if desconhecidas:
+            raise ErroConsulta(f"Medidas desconhecidas: {', '.join(desconhecidas)}")
+
+        return (
+            tuple(dict.fromkeys(agrupar)),
+            tuple(dict.fromkeys(medidas)),
+            desvio_padrao,
+            tuple(sorted((nome, tuple(sorted(set(valores)))) for nome, valores in filtros.items())),
+        )
+
+    def consultar(self, parametros):
+        """Resultado da consulta como JSON (bytes)."""
+        return self._executar_em_cache(self.normalizar(parametros))
+
+    def _executar(self, chave):
+        agrupar, medidas, desvio_padrao, filtros = chave
+        cubo = self.cubo
+        if filtros:
+            selecionadas = pd.Series(True, index=cubo.index)
+            for nome, valores in filtros:
+                selecionadas &= self._rotulos[nome].isin(valores)
+            cubo = cubo[selecionadas]
+        resultado = agregar_cubo(cubo, list(agrupar), list(medidas), desvio_padrao=desvio_padrao)
+        for nome in agrupar:
+            resultado[nome] = resultado[nome].astype('string')
+        linhas = resultado.to_json(orient='records', force_ascii=False)
+        return f'{{"total": {len(resultado)}, "linhas": {linhas}}}'.encode('utf-8')
+
+    def estatisticas_cache(self):
+        info = self._executar_em_cache.cache_info()
+        return {'acertos': info.hits, 'falhas': info.misses, 'tamanho': info.currsize, 'limite': info.maxsize}
+
+
+def _resposta(status, corpo, manter_conexao):
+    cabecalho = (
+        f'HTTP/1.1 {status} {STATUS[status]}\r\n'
+        'Content-Type: application/json; charset=utf-8\r\n'
+        f'Content-Length: {len(corpo)}\r\n'
+        f'Connection: {"keep-alive" if manter_conexao else "close"}\r\n\r\n'
+    )
+    return cabecalho.encode('ascii') + corpo
+
+
+def _json(dados):
+    return json.dumps(dados, ensure_ascii=False).encode('utf-8')
+
+
+class ServidorConsultas:
+    """Servidor HTTP/1.1 mínimo (asyncio) que encaminha as rotas para ``ServicoConsultas``.
+
+    As conexões são mantidas abertas (keep-alive) e atendidas concorrentemente;
+    consultas fora do cache são calculadas em uma thread para não bloquear o laço.
+    """
+
+    def __init__(self, servico):
+        self.servico = servico
+
+    async def responder(self, metodo, alvo):
+        if metodo != 'GET':
+            return 405, _json({'erro': 'Apenas GET é suportado'})
+        url = urlsplit(alvo)
+        parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+        if url.path == '/consulta':
+            loop = asyncio.get_running_loop()
+            try:
+                return 200, await loop.run_in_executor(None, self.servico.consultar, parametros)
+            except ErroConsulta as erro:
+                return 400, _json({'erro': str(erro)})
+        if url.path == '/dimensoes':
+            return 200, _json({'dimensoes': self.servico.valores_dimensoes(), 'medidas': self.servico.medidas})
+        if url.path == '/saude':
+            return 200, _json({'linhas_cubo': len(self.servico.cubo), 'cache': self.servico.estatisticas_cache()})
+        return 404, _json({'erro': f'Rota desconhecida: {url.path}'})
+
+    async def atender(self, leitor, escritor):
+        try:
+            while True:
+                try:
+                    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                linhas = cabecalho.decode('latin1').split('\r\n')
+                partes = linhas[0].split(' ')
+                if len(partes) != 3:
+                    escritor.write(_resposta(400, _json({'erro': 'Requisição inválida'}), False))
+                    break
+                metodo, alvo, versao = partes
+                campos = {}
+                for linha in linhas[1:]:
+                    nome, _, valor = linha.partition(':')
+                    campos[nome.strip().lower()] = valor.strip().lower()
+                # Só GET é atendido: um corpo é lido e descartado, até TAMANHO_MAXIMO_REQUISICAO
+                try:
+                    tamanho_corpo = int(campos.get('content-length') or 0)
+                except ValueError:
+                    tamanho_corpo = -1
+                if tamanho_corpo < 0:
+                    escritor.write(_resposta(400, _json({'erro': 'Content-Length inválido'}), False))
+                    break
+                if tamanho_corpo > TAMANHO_MAXIMO_REQUISICAO:
+                    escritor.write(_resposta(413, _json({'erro': 'Corpo da requisição grande demais'}), False))
+                    break
+                try:
+                    await leitor.readexactly(tamanho_corpo)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                manter_conexao = (campos.get('connection') != 'close'
+                                  and (versao == 'HTTP/1.1' or campos.get('connection') == 'keep-alive'))
+
+                status, corpo = await self.responder(metodo, alvo)
+                escritor.write(_resposta(status, corpo, manter_conexao))
+                await escritor.drain()
+                if not manter_conexao:
+                    break
+        finally:
+            escritor.close()
+
+    async def executar(self, host, porta):
+        servidor = await asyncio.start_server(self.atender, host, porta, limit=TAMANHO_MAXIMO_REQUISICAO)
+        print(f"Servidor de consultas em http://{host}:{porta} (cubo com {len(self.servico.cubo)} linhas)",
+              flush=True)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local de consultas sobre o cubo do ENEM')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8050)
+    parser.add_argument('--pasta', default=PASTA_TRATADOS, help='Pasta com o cubo_enem tratado')
+    parser.add_argument('--tamanho-cache', type=int, default=TAMANHO_CACHE,
+                        help='Consultas guardadas no cache LRU (0 desliga o cache)')
+    args = parser.parse_args()
+
+    servico = ServicoConsultas(carregar_tratado('cubo_enem', pasta=args.pasta), args.tamanho_cache)
+    try:
+        asyncio.run(ServidorConsultas(servico).executar(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Leitura do ENEM em blocos de tamanho limitado.
+
+Permite processar os microdados completos (~3,5 milhões de linhas) sem carregar
+o arquivo inteiro: cada bloco passa pelo mesmo tratamento do modo em memória e
+é gravado em seguida, de forma que o pico de memória depende apenas do tamanho
+do bloco.
+"""
+import pandas as pd
+
+from pipeline_enem.leitura import converter_tolerante, opcoes_pandas, opcoes_tolerantes
+from pipeline_enem.tratamento import COLS_ENEM, tratar_enem
+
+# Quantas cópias de um bloco convivem em memória durante o tratamento
+# (bloco bruto, projeção de colunas e colunas derivadas)
+FATOR_TRABALHO = 4
+
+TAMANHO_MINIMO_BLOCO = 1_000
+
+# Bytes lidos de cada vez ao procurar o início de uma linha no arquivo bruto
+TAMANHO_LEITURA = 8 * 1024 ** 2
+
+
+def estimar_tamanho_bloco(caminho, limite_memoria_mb, sep=';', encoding='latin1', linhas_amostra=1_000):
+    """Calcula quantas linhas cabem em um bloco respeitando o teto de memória."""
+    opcoes = opcoes_pandas(caminho, 'enem', sep, encoding)
+    try:
+        amostra = pd.read_csv(caminho, nrows=linhas_amostra, **opcoes)
+    except ValueError:
+        amostra = converter_tolerante(pd.read_csv(caminho, nrows=linhas_amostra, **opcoes_tolerantes(opcoes)),
+                                      opcoes['dtype'])
+    if amostra.empty:
+        return TAMANHO_MINIMO_BLOCO
+
+    bytes_por_linha = amostra.memory_usage(deep=True, index=False).sum() / len(amostra)
+    limite_bytes = limite_memoria_mb * 1024 ** 2
+    return max(TAMANHO_MINIMO_BLOCO, int(limite_bytes / (bytes_por_linha * FATOR_TRABALHO)))
+
+
+def colunas_leitura(caminho, sep=';', encoding='latin1'):
+    """Retorna as colunas a ler do arquivo bruto (``COLS_ENEM`` quando disponíveis)."""
+    cabecalho = pd.read_csv(caminho, sep=sep, encoding=encoding, nrows=0).columns
+    if all(col in cabecalho for col in COLS_ENEM):
+        return COLS_ENEM
+    return None
+
+
+def _avancar_linhas(arquivo, linhas):
+    """Posiciona ``arquivo`` (binário) ``linhas`` linhas adiante, contando as quebras sem guardar o conteúdo."""
+    while linhas:
+        inicio = arquivo.tell()
+        trecho = arquivo.read(TAMANHO_LEITURA)
+        if not trecho:
+            return
+        quebras = trecho.count(b'\n')
+        if quebras < linhas:
+            linhas -= quebras
+            continue
+        posicao = -1
+        for _ in range(linhas):
+            posicao = trecho.index(b'\n', posicao + 1)
+        arquivo.seek(inicio + posicao + 1)
+        return
+
+
+def _blocos_brutos(caminho, tamanho_bloco, sep, encoding):
+    opcoes = opcoes_pandas(caminho, 'enem', sep, encoding)
+    lidas = 0
+    try:
+        with pd.read_csv(caminho, chunksize=tamanho_bloco, **opcoes) as leitor:
+            for bloco in leitor:
+                lidas += len(bloco)
+                yield bloco
+    except ValueError:
+        # Valor que não converte para o tipo declarado (texto numa coluna numérica, inteiro com
+        # nulos): continua do bloco que falhou lendo as colunas numéricas como texto, e os valores
+        # inválidos ficam anotados para a validação (ver leitura.converter_tolerante). A leitura
+        # recomeça da posição em bytes do bloco, sem reinterpretar as linhas já lidas; como nas
+        # partições de pipeline_enem.paralelo, cada linha do arquivo é uma linha da tabela.
+        tolerantes = opcoes_tolerantes(opcoes)
+        with open(caminho, 'rb') as arquivo:
+            nomes = arquivo.readline().decode(encoding).rstrip('\r\n').split(sep)
+            _avancar_linhas(arquivo, lidas)
+            with pd.read_csv(arquivo, chunksize=tamanho_bloco, header=None, names=nomes, **tolerantes) as leitor:
+                for bloco in leitor:
+                    bloco.index += lidas
+                    yield converter_tolerante(bloco, opcoes['dtype'])
+
+
+def blocos_enem_tratados(caminho, tamanho_bloco, sep=';', encoding='latin1'):
+    """Gera os blocos do ENEM já tratados, na ordem do arquivo (só as colunas usadas, com os tipos declarados)."""
+    for bloco in _blocos_brutos(caminho, tamanho_bloco, sep, encoding):
+        yield tratar_enem(bloco)
+
@@ -0,0 +1,127 @@
+"""Etapas de tratamento dos dados do ENEM, do Censo Escolar e dos indicadores municipais.
+
+As funções do ENEM trabalham linha a linha e servem tanto para o arquivo
+inteiro quanto para os blocos do modo streaming.
+"""
+
+import numpy as np
+
+from .pontuacao import (
+    categorizar, codigos_faixas, contar_itens, faixas, mascara_itens, mascara_presenca, media_presentes
+)
+
+# Colunas mais importantes para a análise
+COLS_ENEM = [
+    'NU_INSCRICAO', 'TP_SEXO', 'NU_IDADE', 'CO_MUNICIPIO_RESIDENCIA',
+    'NO_MUNICIPIO_RESIDENCIA', 'SG_UF_RESIDENCIA', 'TP_ESCOLA',
+    'TP_ENSINO', 'IN_TREINEIRO', 'CO_ESCOLA', 'NU_NOTA_CN',
+    'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO'
+]
+
+# Colunas de cada linha com valores que não convertem para o tipo declarado, anotadas pela
+# leitura (ver pipeline_enem.leitura.converter_tolerante) e conferidas pela validação
+COLUNA_VALORES_INVALIDOS = 'COLUNAS_INVALIDAS'
+
+# Tipos de escola do ENEM (ajustar conforme os códigos reais)
+TIPOS_ESCOLA = {
+    1: 'Pública',
+    2: 'Privada',
+    3: 'Exterior',
+}
+
+# Áreas objetivas usadas no cálculo da média
+AREAS_COLS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT']
+
+# Provas registradas na máscara PRESENCA: as quatro áreas nos bits 0 a 3 e a redação no bit 4
+PROVAS_COLS = AREAS_COLS + ['NU_NOTA_REDACAO']
+MASCARA_AREAS = np.uint8((1 << len(AREAS_COLS)) - 1)
+
+# Situação do candidato nas provas (dimensão do cubo), para cada máscara PRESENCA possível
+LABELS_PRESENCA = ['Todas as provas', 'Parcial', 'Ausente']
+CODIGOS_PRESENCA = np.ones(1 << len(PROVAS_COLS), dtype='int8')
+CODIGOS_PRESENCA[-1] = 0
+CODIGOS_PRESENCA[0] = 2
+
+# Faixas etárias
+BINS_IDADE = [0, 17, 20, 25, 30, 100]
+LABELS_IDADE = ['Até 17 anos', '18 a 20 anos', '21 a 25 anos', '26 a 30 anos', 'Acima de 30 anos']
+
+# Itens de infraestrutura do Censo Escolar somados em NIVEL_INFRAESTRUTURA
+INFRA_COLS = [
+    'IN_BIBLIOTECA', 'IN_LABORATORIO_INFORMATICA', 'IN_LABORATORIO_CIENCIAS',
+    'IN_QUADRA_ESPORTES', 'IN_SALA_ATENDIMENTO_ESPECIAL', 'IN_INTERNET'
+]
+# Escolas sem nenhum dos itens ficam em uma faixa própria, em vez de ficarem sem categoria
+BINS_INFRAESTRUTURA = [-1, 0, 2, 4, 6]
+LABELS_INFRAESTRUTURA = ['Sem infraestrutura', 'Básica', 'Intermediária', 'Avançada']
+
+# Código da categoria de infraestrutura para cada nível possível (0 a 6 itens)
+CODIGOS_INFRAESTRUTURA = codigos_faixas(range(len(INFRA_COLS) + 1), BINS_INFRAESTRUTURA)
+
+# Categorias de IDH
+BINS_IDH = [0, 0.5, 0.6, 0.7, 0.8, 1.0]
+LABELS_IDH = ['Muito baixo', 'Baixo', 'Médio', 'Alto', 'Muito alto']
+
+
+def possui_colunas_enem(colunas):
+    """Indica se todas as colunas de ``COLS_ENEM`` estão presentes."""
+    return all(col in colunas for col in COLS_ENEM)
+
+
+def tratar_enem(enem_df):
+    """Aplica a projeção de colunas e calcula a presença nas provas e as colunas derivadas.
+
+    Funciona sobre o arquivo inteiro ou sobre um bloco dele, já que todas as
+    operações são feitas linha a linha.
+    """
+    # Filtrar apenas as colunas relevantes (e a anotação dos valores inválidos, quando houver)
+    if possui_colunas_enem(enem_df.columns):
+        enem_df = enem_df[COLS_ENEM + [col for col in [COLUNA_VALORES_INVALIDOS] if col in enem_df.columns]]
+
+    # Notas nulas são de quem faltou à prova e continuam nulas (como zero, puxariam as médias
+    # para baixo). Uma passada pela matriz de notas registra as provas feitas (PRESENCA), conta
+    # as áreas feitas (QTD_AREAS) e calcula a média das notas (primeira coluna derivada) só
+    # sobre as áreas presentes; quem faltou às quatro fica sem média.
+    if all(col in enem_df.columns for col in AREAS_COLS):
+        provas = [col for col in PROVAS_COLS if col in enem_df.columns]
+        notas = enem_df[provas].to_numpy(dtype='float64', na_value=np.nan)
+        presenca = mascara_presenca(notas)
+        qtd_areas = contar_itens(presenca & MASCARA_AREAS)
+        enem_df['PRESENCA'] = presenca
+        enem_df['QTD_AREAS'] = qtd_areas.astype('int8')
+        enem_df['MEDIA_NOTAS'] = media_presentes(notas[:, :len(AREAS_COLS)], qtd_areas)
+
+    # Criar coluna de faixa etária (segunda coluna derivada)
+    if 'NU_IDADE' in enem_df.columns:
+        enem_df['FAIXA_ETARIA'] = faixas(enem_df['NU_IDADE'], BINS_IDADE, LABELS_IDADE)
+
+    return enem_df
+
+
+def tratar_censo(censo_escolar_df):
+    """Filtra as escolas de Ensino Médio e calcula o nível e a categoria de infraestrutura."""
+    # Filtrar apenas escolas de Ensino Médio (ajustar conforme necessidade)
+    if 'IN_ENSINO_MEDIO' in censo_escolar_df.columns:
+        censo_escolar_df = censo_escolar_df[censo_escolar_df['IN_ENSINO_MEDIO'] == 1].copy()
+
+    # Criar coluna com indicador de infraestrutura (terceira coluna derivada):
+    # quantidade de itens presentes, pela contagem de bits da máscara dos itens
+    if all(col in censo_escolar_df.columns for col in INFRA_COLS):
+        nivel = contar_itens(mascara_itens(censo_escolar_df, INFRA_COLS))
+        censo_escolar_df['NIVEL_INFRAESTRUTURA'] = nivel.astype('int8')
+
+        # Categorizar o nível de infraestrutura
+        censo_escolar_df['CATEGORIA_INFRAESTRUTURA'] = categorizar(
+            CODIGOS_INFRAESTRUTURA[nivel], LABELS_INFRAESTRUTURA
+        )
+
+    return censo_escolar_df
+
+
+def tratar_municipios(municipios_df):
+    """Cria a categorização do IDH dos municípios."""
+    # Quarta coluna derivada
+    if 'IDH' in municipios_df.columns:
+        municipios_df['CATEGORIA_IDH'] = faixas(municipios_df['IDH'], BINS_IDH, LABELS_IDH)
+
+    return municipios_df
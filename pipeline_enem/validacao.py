@@ -0,0 +1,262 @@
+"""Validação do ENEM no tratamento: esquema, faixas de valores, chaves e UF.
+
+Cada bloco do ENEM (o arquivo inteiro ou um bloco do modo streaming) passa por
+verificações vetorizadas, uma máscara por regra de ``REGRAS_VALIDACAO``:
+
+- ``tipo_invalido``: valor que não converte para o tipo declarado na leitura,
+  anotado por pipeline_enem.leitura em COLUNAS_INVALIDAS;
+- ``chave_nula``: sem NU_INSCRICAO, CO_MUNICIPIO_RESIDENCIA ou SG_UF_RESIDENCIA;
+- ``uf_invalida``: SG_UF_RESIDENCIA fora das 27 UFs;
+- ``nota_fora_do_intervalo``: alguma nota fora de 0 a 1000;
+- ``idade_fora_dos_limites``: NU_IDADE fora de ``LIMITES_IDADE``;
+- ``municipio_inexistente``: CO_MUNICIPIO_RESIDENCIA sem município nos indicadores (IBGE);
+- ``escola_inexistente``: CO_ESCOLA sem escola no Censo Escolar tratado;
+- ``uf_divergente``: SG_UF_RESIDENCIA diferente da UF do município nos indicadores.
+
+As linhas que violam alguma das regras de quarentena (``REGRAS_QUARENTENA``, ou
+``tratar --quarentena``) saem do fluxo e são gravadas em
+dados_tratados/quarentena_enem, com as colunas VIOLACOES e COLUNAS_INVALIDAS; as demais violações só
+são contadas. As chaves são resolvidas pelas categorias distintas, como em
+pipeline_enem.dimensoes, e um bloco sem linhas em quarentena segue sem cópia.
+O esquema (colunas de ``COLS_ENEM`` ausentes e tipos diferentes dos
+declarados na leitura) é conferido em cada bloco. O relatório, com as
+contagens e exemplos de NU_INSCRICAO de cada regra, vai para
+dados_tratados/validacao_enem.json.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .armazenamento import EXTENSOES, PASTA_TRATADOS, caminho_tratado
+from .dimensoes import dimensao_escolas, dimensao_municipios
+from .esquemas import UFS
+from .leitura import TIPOS_ENEM
+from .tratamento import COLS_ENEM, COLUNA_VALORES_INVALIDOS, PROVAS_COLS
+
+NOME_QUARENTENA = 'quarentena_enem'
+ARQUIVO_VALIDACAO = os.path.join(PASTA_TRATADOS, 'validacao_enem.json')
+
+LIMITES_NOTAS = (0, 1000)
+# As faixas etárias (BINS_IDADE) vão até 100 anos
+LIMITES_IDADE = (10, 100)
+CHAVES_OBRIGATORIAS = ['NU_INSCRICAO', 'CO_MUNICIPIO_RESIDENCIA', 'SG_UF_RESIDENCIA']
+
+# Regras da validação e as que, por padrão, colocam a linha em quarentena (tratar --quarentena);
+# as demais só são contadas
+REGRAS_VALIDACAO = [
+    'tipo_invalido', 'chave_nula', 'uf_invalida', 'nota_fora_do_intervalo', 'idade_fora_dos_limites',
+    'municipio_inexistente', 'escola_inexistente', 'uf_divergente',
+]
+REGRAS_QUARENTENA = [
+    'tipo_invalido', 'chave_nula', 'uf_invalida', 'nota_fora_do_intervalo', 'idade_fora_dos_limites',
+    'municipio_inexistente',
+]
+
+DESCRICOES_REGRAS = {
+    'tipo_invalido': f'valor que não converte para o tipo declarado (colunas em {COLUNA_VALORES_INVALIDOS})',
+    'chave_nula': 'NU_INSCRICAO, CO_MUNICIPIO_RESIDENCIA ou SG_UF_RESIDENCIA ausente',
+    'uf_invalida': 'SG_UF_RESIDENCIA fora das 27 UFs',
+    'nota_fora_do_intervalo': f'nota fora de {LIMITES_NOTAS[0]} a {LIMITES_NOTAS[1]}',
+    'idade_fora_dos_limites': f'NU_IDADE fora de {LIMITES_IDADE[0]} a {LIMITES_IDADE[1]} anos',
+    'municipio_inexistente': 'CO_MUNICIPIO_RESIDENCIA fora dos indicadores municipais (IBGE)',
+    'escola_inexistente': 'CO_ESCOLA fora do Censo Escolar tratado',
+    'uf_divergente': 'SG_UF_RESIDENCIA diferente da UF do município',
+}
+
+# Quantas inscrições de cada regra são guardadas como exemplo no relatório
+EXEMPLOS_VIOLACOES = 10
+
+
+def caminhos_quarentena(pasta=PASTA_TRATADOS):
+    return [caminho_tratado(NOME_QUARENTENA, formato, pasta) for formato in EXTENSOES]
+
+
+def remover_saidas(pasta=PASTA_TRATADOS):
+    """Apaga a quarentena e o relatório de uma validação anterior."""
+    for caminho in caminhos_quarentena(pasta) + [os.path.join(pasta, os.path.basename(ARQUIVO_VALIDACAO))]:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+def sem_anotacao(df):
+    """``df`` sem a anotação dos valores inválidos da leitura, para quando o ENEM não é validado."""
+    if COLUNA_VALORES_INVALIDOS in df.columns:
+        return df.drop(columns=COLUNA_VALORES_INVALIDOS)
+    return df
+
+
+def _codigos_uf(valores):
+    # Posição de cada valor em UFS (-1 para ausentes e desconhecidos), resolvida nas categorias distintas
+    indice = pd.Index(UFS)
+    if not isinstance(valores.dtype, pd.CategoricalDtype):
+        return indice.get_indexer(valores.astype(object))
+    codigos = valores.cat.codes.to_numpy()
+    if len(valores.cat.categories) == 0:
+        return np.full(len(valores), -1)
+    return np.where(codigos >= 0, indice.get_indexer(valores.cat.categories)[codigos], -1)
+
+
+def _tipo_compativel(tipo, esperado):
+    if esperado == 'category':
+        return isinstance(tipo, pd.CategoricalDtype)
+    if pd.api.types.is_integer_dtype(esperado):
+        # Inteiros com nulos chegam nas versões que aceitam nulos (ou em float, com o pyarrow)
+        return pd.api.types.is_integer_dtype(tipo) or pd.api.types.is_float_dtype(tipo)
+    return pd.api.types.is_float_dtype(tipo)
+
+
+class ValidadorEnem:
+    """Verifica os blocos do ENEM e separa as linhas em quarentena, acumulando as contagens de cada regra.
+
+    ``municipios_df`` e ``censo_escolar_df`` (já tratados) são as referências
+    das chaves; ``quarentena`` são as regras que retiram a linha do fluxo.
+    """
+
+    def __init__(self, municipios_df, censo_escolar_df, quarentena=REGRAS_QUARENTENA):
+        self.quarentena = [regra for regra in REGRAS_VALIDACAO if regra in quarentena]
+        self.municipios = dimensao_municipios(municipios_df, ['UF'])
+        self.uf_municipios = _codigos_uf(pd.Series(self.municipios.valores['UF']))
+        self.escolas = dimensao_escolas(censo_escolar_df, ['CO_ENTIDADE'])
+        self.zerar_estatisticas()
+
+    def verificar_esquema(self, df):
+        """Registra as colunas de ``COLS_ENEM`` ausentes e as de tipo diferente do declarado na leitura."""
+        self.colunas_ausentes.update(col for col in COLS_ENEM if col not in df.columns)
+        for col, esperado in TIPOS_ENEM.items():
+            if col in df.columns and not _tipo_compativel(df[col].dtype, esperado):
+                self.tipos_divergentes[col] = f'{df[col].dtype} (esperado {esperado})'
+
+    def violacoes(self, df):
+        """Máscara booleana de cada regra cujas colunas estão em ``df``."""
+        mascaras = {}
+        if COLUNA_VALORES_INVALIDOS in df.columns:
+            mascaras['tipo_invalido'] = df[COLUNA_VALORES_INVALIDOS].notna().to_numpy()
+        chaves = [col for col in CHAVES_OBRIGATORIAS if col in df.columns]
+        if chaves:
+            mascaras['chave_nula'] = np.logical_or.reduce([df[col].isna().to_numpy() for col in chaves])
+
+        if 'SG_UF_RESIDENCIA' in df.columns:
+            ufs = _codigos_uf(df['SG_UF_RESIDENCIA'])
+            mascaras['uf_invalida'] = (ufs == -1) & df['SG_UF_RESIDENCIA'].notna().to_numpy()
+
+        provas = [col for col in PROVAS_COLS if col in df.columns]
+        if provas:
+            fora = np.zeros(len(df), dtype=bool)
+            for col in provas:
+                nota = df[col].to_numpy(dtype='float64', na_value=np.nan)
+                fora |= (nota < LIMITES_NOTAS[0]) | (nota > LIMITES_NOTAS[1])
+            mascaras['nota_fora_do_intervalo'] = fora
+
+        if 'NU_IDADE' in df.columns:
+            idade = df['NU_IDADE'].to_numpy(dtype='float64', na_value=np.nan)
+            mascaras['idade_fora_dos_limites'] = (idade < LIMITES_IDADE[0]) | (idade > LIMITES_IDADE[1])
+
+        if 'CO_MUNICIPIO_RESIDENCIA' in df.columns:
+            municipios = df['CO_MUNICIPIO_RESIDENCIA']
+            posicoes = self.municipios.posicoes(municipios)
+            mascaras['municipio_inexistente'] = (posicoes == -1) & municipios.notna().to_numpy()
+            if 'SG_UF_RESIDENCIA' in df.columns:
+                uf_municipio = np.where(posicoes >= 0, self.uf_municipios[posicoes], -1)
+                mascaras['uf_divergente'] = (posicoes >= 0) & (ufs >= 0) & (uf_municipio != ufs)
+
+        if 'CO_ESCOLA' in df.columns:
+            posicoes = self.escolas.posicoes(df['CO_ESCOLA'])
+            mascaras['escola_inexistente'] = (posicoes == -1) & df['CO_ESCOLA'].notna().to_numpy()
+        return mascaras
+
+    def separar(self, df):
+        """Retorna ``(linhas que seguem, linhas em quarentena com VIOLACOES e COLUNAS_INVALIDAS)``.
+
+        A anotação da leitura sai das linhas que seguem; na quarentena, fica em
+        todos os blocos (nula quando o bloco não tem valores inválidos).
+        """
+        self.verificar_esquema(df)
+        mascaras = self.violacoes(df)
+        invalidas = df.get(COLUNA_VALORES_INVALIDOS, pd.Series(pd.NA, index=df.index, dtype='string'))
+        df = sem_anotacao(df)
+        self.linhas += len(df)
+
+        bits = np.zeros(len(df), dtype='uint8')
+        quarentena = np.zeros(len(df), dtype=bool)
+        for regra, mascara in mascaras.items():
+            violadas = int(mascara.sum())
+            if not violadas:
+                continue
+            self.contagens[regra] += violadas
+            faltam = EXEMPLOS_VIOLACOES - len(self.exemplos[regra])
+            if faltam > 0 and 'NU_INSCRICAO' in df.columns:
+                inscricoes = df['NU_INSCRICAO'][mascara].head(faltam)
+                self.exemplos[regra].extend(None if pd.isna(valor) else int(valor) for valor in inscricoes)
+            bits |= mascara.astype('uint8') << np.uint8(REGRAS_VALIDACAO.index(regra))
+            if regra in self.quarentena:
+                quarentena |= mascara
+
+        if not quarentena.any():
+            return df, df.iloc[:0].assign(VIOLACOES=pd.Series(dtype='string'),
+                                          **{COLUNA_VALORES_INVALIDOS: pd.Series(dtype='string')})
+        self.linhas_quarentena += int(quarentena.sum())
+        nomes = {valor: ','.join(regra for posicao, regra in enumerate(REGRAS_VALIDACAO) if valor >> posicao & 1)
+                 for valor in np.unique(bits[quarentena])}
+        em_quarentena = df[quarentena].assign(
+            VIOLACOES=pd.Series(bits[quarentena], index=df.index[quarentena]).map(nomes).astype('string'),
+            **{COLUNA_VALORES_INVALIDOS: invalidas[quarentena]})
+        return df[~quarentena], em_quarentena
+
+    def estatisticas(self):
+        """Contadores da validação, para somar os de processos diferentes com ``acumular``."""
+        return {
+            'linhas': self.linhas,
+            'linhas_quarentena': self.linhas_quarentena,
+            'contagens': dict(self.contagens),
+            'exemplos': {regra: list(exemplos) for regra, exemplos in self.exemplos.items()},
+            'colunas_ausentes': set(self.colunas_ausentes),
+            'tipos_divergentes': dict(self.tipos_divergentes),
+        }
+
+    def zerar_estatisticas(self):
+        self.linhas = 0
+        self.linhas_quarentena = 0
+        self.contagens = dict.fromkeys(REGRAS_VALIDACAO, 0)
+        self.exemplos = {regra: [] for regra in REGRAS_VALIDACAO}
+        self.colunas_ausentes = set()
+        self.tipos_divergentes = {}
+
+    def acumular(self, estatisticas):
+        self.linhas += estatisticas['linhas']
+        self.linhas_quarentena += estatisticas['linhas_quarentena']
+        for regra, violadas in estatisticas['contagens'].items():
+            self.contagens[regra] += violadas
+            faltam = EXEMPLOS_VIOLACOES - len(self.exemplos[regra])
+            self.exemplos[regra].extend(estatisticas['exemplos'][regra][:max(faltam, 0)])
+        self.colunas_ausentes.update(estatisticas['colunas_ausentes'])
+        self.tipos_divergentes.update(estatisticas['tipos_divergentes'])
+
+    def relatorio(self):
+        print(f"{self.linhas} linhas validadas, {self.linhas_quarentena} em quarentena")
+        if self.colunas_ausentes:
+            print(f"  Colunas ausentes: {', '.join(sorted(self.colunas_ausentes))}")
+        for col, tipo in self.tipos_divergentes.items():
+            print(f"  Tipo divergente: {col} {tipo}")
+        for regra in REGRAS_VALIDACAO:
+            if self.contagens[regra]:
+                acao = 'quarentena' if regra in self.quarentena else 'aviso'
+                exemplos = ', '.join('sem inscrição' if inscricao is None else str(inscricao)
+                                     for inscricao in self.exemplos[regra][:3])
+                print(f"  {regra} ({acao}): {self.contagens[regra]} linhas - {DESCRICOES_REGRAS[regra]} "
+                      f"(ex.: {exemplos})")
+
+    def gravar_relatorio(self, caminho=ARQUIVO_VALIDACAO):
+        relatorio = {
+            'linhas': self.linhas,
+            'linhas_quarentena': self.linhas_quarentena,
+            'esquema': {'colunas_ausentes': sorted(self.colunas_ausentes), 'tipos_divergentes': self.tipos_divergentes},
+            'regras': {
+                regra: {'descricao': DESCRICOES_REGRAS[regra], 'quarentena': regra in self.quarentena,
+                        'linhas': self.contagens[regra], 'exemplos': self.exemplos[regra]}
+                for regra in REGRAS_VALIDACAO
+            },
+        }
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=1)